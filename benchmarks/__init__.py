@@ -0,0 +1 @@
+"""Benchmark suite for the analyzer hot paths, run with airspeed velocity (asv)."""
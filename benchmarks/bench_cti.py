@@ -0,0 +1,91 @@
+"""Benchmarks for paging through and filtering an `IntelProfileIndicatorList`."""
+
+from passivetotal.analyzer.illuminate.cti import IntelProfileIndicatorList
+
+from .common import SIZES, TIMEOUT, init_analyzer, peak_memory, require_pandas
+from .synthetic import intel_indicator_pages
+
+PAGE_SIZE = 400
+
+
+
+def load_indicators(n, pages=None):
+    """Load an indicator list by paging through synthetic API responses."""
+    if pages is None:
+        pages = intel_indicator_pages(n, PAGE_SIZE)
+    iocs = IntelProfileIndicatorList(profile_id='apt33', pagesize=PAGE_SIZE)
+    iocs._pagination_callable = lambda page: pages[page]
+    iocs.load_all_pages()
+    return iocs
+
+
+
+class IntelIndicatorLoad:
+
+    """Load all pages of intel profile indicators from synthetic API responses."""
+
+    params = SIZES
+    param_names = ['records']
+    timeout = TIMEOUT
+
+    def setup(self, n):
+        init_analyzer()
+        self.pages = intel_indicator_pages(n, PAGE_SIZE)
+
+    def time_load_all_pages(self, n):
+        load_indicators(n, self.pages)
+
+    def track_peakmem_load_all_pages(self, n):
+        return peak_memory(load_indicators, n, self.pages)
+    track_peakmem_load_all_pages.unit = 'bytes'
+
+
+
+class IntelIndicatorOperations:
+
+    """Filter, sort and serialize a loaded `IntelProfileIndicatorList`."""
+
+    params = SIZES
+    param_names = ['records']
+    timeout = TIMEOUT
+
+    def setup(self, n):
+        init_analyzer()
+        self.iocs = load_indicators(n)
+
+    def time_only_osint(self, n):
+        self.iocs.only_osint
+
+    def time_filter_in_type(self, n):
+        self.iocs.filter_in(type=['domain', 'ip'])
+
+    def time_sorted_by_value(self, n):
+        self.iocs.sorted_by('value')
+
+    def time_values(self, n):
+        self.iocs.values
+
+    def time_as_dict(self, n):
+        self.iocs.as_dict
+
+
+
+class IntelIndicatorDataFrame:
+
+    """Render an `IntelProfileIndicatorList` as a pandas DataFrame."""
+
+    params = SIZES
+    param_names = ['records']
+    timeout = TIMEOUT
+
+    def setup(self, n):
+        require_pandas()
+        init_analyzer()
+        self.iocs = load_indicators(n)
+
+    def time_to_dataframe(self, n):
+        self.iocs.to_dataframe()
+
+    def track_peakmem_to_dataframe(self, n):
+        return peak_memory(self.iocs.to_dataframe)
+    track_peakmem_to_dataframe.unit = 'bytes'
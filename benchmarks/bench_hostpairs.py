@@ -0,0 +1,90 @@
+"""Benchmarks for `HostpairHistory` parsing, host extraction and domain filters."""
+
+from passivetotal.analyzer.hostpairs import HostpairHistory
+
+from .common import SIZES, TIMEOUT, init_analyzer, peak_memory, require_pandas
+from .synthetic import hostpair_response
+
+EXCLUDE_HOSTS = ['sub{}.domain{}.com'.format(i, i) for i in range(10)]
+
+
+
+class HostpairParse:
+
+    """Parse a hostpairs API response into a `HostpairHistory` list."""
+
+    params = SIZES
+    param_names = ['records']
+    timeout = TIMEOUT
+
+    def setup(self, n):
+        init_analyzer()
+        self.response = hostpair_response(n)
+
+    def time_parse(self, n):
+        HostpairHistory(self.response, 'children', 'passivetotal.org')
+
+    def track_peakmem_parse(self, n):
+        return peak_memory(HostpairHistory, self.response, 'children', 'passivetotal.org')
+    track_peakmem_parse.unit = 'bytes'
+
+
+
+class HostpairOperations:
+
+    """Derive host sets, sort, filter and serialize a parsed `HostpairHistory`."""
+
+    params = SIZES
+    param_names = ['records']
+    timeout = TIMEOUT
+
+    def setup(self, n):
+        init_analyzer()
+        self.pairs = HostpairHistory(hostpair_response(n), 'children', 'passivetotal.org')
+
+    def time_hosts(self, n):
+        self.pairs.hosts
+
+    def time_causes(self, n):
+        self.pairs.causes
+
+    def time_sorted_by_lastseen(self, n):
+        self.pairs.sorted_by('lastseen')
+
+    def time_filter_cause(self, n):
+        self.pairs.filter(cause='redirect')
+
+    def time_exclude_hosts_in(self, n):
+        self.pairs.exclude_hosts_in(EXCLUDE_HOSTS)
+
+    def time_exclude_domains_in(self, n):
+        self.pairs.exclude_domains_in(EXCLUDE_HOSTS)
+
+    def time_as_dict(self, n):
+        self.pairs.as_dict
+
+    def track_peakmem_as_dict(self, n):
+        return peak_memory(lambda: self.pairs.as_dict)
+    track_peakmem_as_dict.unit = 'bytes'
+
+
+
+class HostpairDataFrame:
+
+    """Render a `HostpairHistory` list as a pandas DataFrame."""
+
+    params = SIZES
+    param_names = ['records']
+    timeout = TIMEOUT
+
+    def setup(self, n):
+        require_pandas()
+        init_analyzer()
+        self.pairs = HostpairHistory(hostpair_response(n), 'children', 'passivetotal.org')
+
+    def time_to_dataframe(self, n):
+        self.pairs.to_dataframe()
+
+    def track_peakmem_to_dataframe(self, n):
+        return peak_memory(self.pairs.to_dataframe)
+    track_peakmem_to_dataframe.unit = 'bytes'
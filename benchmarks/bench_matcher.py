@@ -0,0 +1,79 @@
+"""Benchmarks for building and querying the offline indicator matcher."""
+
+import os
+import random
+import tempfile
+
+from passivetotal.analyzer.matcher import IndicatorMatcher
+
+from .common import SIZES, TIMEOUT, peak_memory
+
+
+
+def build_matcher(n, seed=0):
+    """Matcher with `n` domains, `n` IPs and `n` MD5 hashes spread over 500 sources."""
+    rng = random.Random(seed)
+    matcher = IndicatorMatcher()
+    for i in range(n):
+        source = 'a{:04d}'.format(i % 500)
+        matcher.add('evil{}.example{}.com'.format(i, i % 97), 'domain', 'article', source)
+        matcher.add('10.{}.{}.{}'.format(i % 256, (i >> 8) % 256, (i >> 16) % 256), 'ip', 'article', source)
+        matcher.add('{:032x}'.format(rng.getrandbits(128)), 'hash_md5', 'profile', source)
+    return matcher
+
+def log_tokens(count=100000, hit_ratio=0.01):
+    """Synthetic hostnames from a DNS log where `hit_ratio` of lookups are subdomains of indicators."""
+    step = int(1 / hit_ratio)
+    return [ 'www.evil{}.example{}.com'.format(i, i % 97) if i % step == 0 else 'host{}.benign.org'.format(i)
+             for i in range(count) ]
+
+
+
+class MatcherBuild:
+
+    """Compile indicators into an `IndicatorMatcher` and save it for memory mapping."""
+
+    params = SIZES[:3]
+    param_names = ['indicators']
+    timeout = TIMEOUT
+
+    def setup(self, n):
+        self.path = os.path.join(tempfile.mkdtemp(), 'iocs.bin')
+
+    def time_build(self, n):
+        build_matcher(n)
+
+    def track_peakmem_build(self, n):
+        return peak_memory(build_matcher, n)
+    track_peakmem_build.unit = 'bytes'
+
+    def time_save(self, n):
+        build_matcher(n).save(self.path)
+
+
+
+class MatcherMatch:
+
+    """Stream 100k log tokens through in-memory and memory-mapped matchers."""
+
+    params = SIZES[:3]
+    param_names = ['indicators']
+    timeout = TIMEOUT
+
+    def setup(self, n):
+        self.matcher = build_matcher(n)
+        self.path = os.path.join(tempfile.mkdtemp(), 'iocs.bin')
+        self.matcher.save(self.path)
+        self.mapped = IndicatorMatcher.load(self.path)
+        self.tokens = log_tokens()
+
+    def teardown(self, n):
+        self.mapped.close()
+
+    def time_match(self, n):
+        for hit in self.matcher.match(self.tokens):
+            pass
+
+    def time_match_mapped(self, n):
+        for hit in self.mapped.match(self.tokens):
+            pass
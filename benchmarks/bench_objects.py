@@ -0,0 +1,40 @@
+"""Benchmarks for building analyzer objects from indicator files."""
+
+from passivetotal import analyzer
+from passivetotal.analyzer.hostname import Hostname
+from passivetotal.analyzer.ip import IPAddress
+
+from .common import SIZES, TIMEOUT, peak_memory
+from .synthetic import indicator_lines
+
+
+
+class GetObjects:
+
+    """Classify, refang and deduplicate indicator lines into Hostname and IPAddress objects."""
+
+    params = SIZES
+    param_names = ['indicators']
+    timeout = TIMEOUT
+
+    def setup(self, n):
+        self.lines = indicator_lines(n)
+        Hostname._instances.clear()
+        IPAddress._instances.clear()
+
+    def time_get_objects(self, n):
+        analyzer.get_objects(self.lines)
+
+    def time_get_objects_grouped(self, n):
+        analyzer.get_objects(self.lines, grouped=True)
+
+    def time_get_object(self, n):
+        for line in self.lines:
+            try:
+                analyzer.get_object(line.strip())
+            except analyzer.AnalyzerError:
+                pass
+
+    def track_peakmem_get_objects(self, n):
+        return peak_memory(analyzer.get_objects, self.lines)
+    track_peakmem_get_objects.unit = 'bytes'
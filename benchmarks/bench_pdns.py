@@ -0,0 +1,104 @@
+"""Benchmarks for parsing passive DNS responses and the generic RecordList operations."""
+
+from passivetotal.analyzer.pdns import PdnsResolutions, PdnsRecord
+
+from .common import SIZES, TIMEOUT, init_analyzer, peak_memory, require_pandas
+from .synthetic import pdns_response
+
+
+
+class PdnsParse:
+
+    """Parse a passive DNS API response into a `PdnsResolutions` list."""
+
+    params = SIZES
+    param_names = ['records']
+    timeout = TIMEOUT
+
+    def setup(self, n):
+        init_analyzer()
+        self.response = pdns_response(n)
+
+    def _parse(self):
+        PdnsRecord._instances.clear() # measure a cold parse, not identity-map hits
+        return PdnsResolutions(api_response=self.response, query='passivetotal.org')
+
+    def time_parse(self, n):
+        self._parse()
+
+    def track_peakmem_parse(self, n):
+        return peak_memory(self._parse)
+    track_peakmem_parse.unit = 'bytes'
+
+
+
+class PdnsRecordList:
+
+    """Filter, sort and serialize a parsed `PdnsResolutions` list."""
+
+    params = SIZES
+    param_names = ['records']
+    timeout = TIMEOUT
+
+    def setup(self, n):
+        init_analyzer()
+        PdnsRecord._instances.clear()
+        self.resolutions = PdnsResolutions(api_response=pdns_response(n), query='passivetotal.org')
+
+    def time_filter_and(self, n):
+        self.resolutions.filter(recordtype='A', resolvetype='ip')
+
+    def time_filter_or(self, n):
+        self.resolutions.filter_or(recordtype='CNAME', resolvetype='ip')
+
+    def time_filter_in(self, n):
+        self.resolutions.filter_in(recordtype=['A', 'AAAA'])
+
+    def time_filter_substring(self, n):
+        self.resolutions.filter_substring(resolve='domain1')
+
+    def time_filter_substring_in(self, n):
+        self.resolutions.filter_substring_in(resolve='domain1,domain2,sub3')
+
+    def time_filter_dateseen_between(self, n):
+        list(self.resolutions.filter_dateseen_between('2021-03-01', '2021-09-01'))
+
+    def time_sorted_by_lastseen(self, n):
+        self.resolutions.sorted_by('lastseen')
+
+    def time_sorted_by_duration(self, n):
+        self.resolutions.sorted_by('duration', reverse=True)
+
+    def time_as_dict(self, n):
+        self.resolutions.as_dict
+
+    def track_peakmem_as_dict(self, n):
+        return peak_memory(lambda: self.resolutions.as_dict)
+    track_peakmem_as_dict.unit = 'bytes'
+
+    def track_peakmem_sorted_by(self, n):
+        return peak_memory(self.resolutions.sorted_by, 'lastseen')
+    track_peakmem_sorted_by.unit = 'bytes'
+
+
+
+class PdnsDataFrame:
+
+    """Render a `PdnsResolutions` list as a pandas DataFrame."""
+
+    params = SIZES
+    param_names = ['records']
+    timeout = TIMEOUT
+
+    def setup(self, n):
+        require_pandas()
+        init_analyzer()
+        PdnsRecord._instances.clear()
+        self.resolutions = PdnsResolutions(api_response=pdns_response(n), query='passivetotal.org')
+
+    def time_to_dataframe(self, n):
+        self.resolutions.to_dataframe()
+
+    def track_peakmem_to_dataframe(self, n):
+        return peak_memory(self.resolutions.to_dataframe)
+    track_peakmem_to_dataframe.unit = 'bytes'
@@ -0,0 +1,31 @@
+"""Benchmarks for registered-domain extraction with the offline suffix list."""
+
+from passivetotal.analyzer import suffixes
+
+from .common import SIZES, TIMEOUT, peak_memory
+from .synthetic import hostnames
+
+
+
+class ExtractMany:
+
+    """Split hostnames into subdomain, domain and suffix in bulk and through the shared cache."""
+
+    params = SIZES
+    param_names = ['hostnames']
+    timeout = TIMEOUT
+
+    def setup(self, n):
+        self.hostnames = hostnames(n)
+        suffixes.extract('warm.example.com')
+
+    def time_extract_many(self, n):
+        suffixes.extract_many(self.hostnames)
+
+    def track_peakmem_extract_many(self, n):
+        return peak_memory(suffixes.extract_many, self.hostnames)
+    track_peakmem_extract_many.unit = 'bytes'
+
+    def time_extract_cached(self, n):
+        for hostname in self.hostnames:
+            suffixes.extract(hostname)
@@ -0,0 +1,33 @@
+"""Shared helpers for analyzer benchmarks."""
+
+import tracemalloc
+
+SIZES = [1000, 10000, 100000, 1000000]
+TIMEOUT = 1800
+
+
+
+def init_analyzer():
+    """Initialize the analyzer with placeholder credentials; benchmarks never reach the network."""
+    from passivetotal import analyzer
+    if not analyzer.config['is_ready']:
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+    analyzer.set_date_range(start='2021-01-01 00:00:00', end='2021-12-31 23:59:59')
+    return analyzer
+
+def peak_memory(fn, *args, **kwargs):
+    """Peak memory allocated by Python while calling `fn`, in bytes (via tracemalloc)."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        fn(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def require_pandas():
+    """Skip the benchmark (asv convention) when pandas is not installed."""
+    try:
+        import pandas # noqa: F401
+    except ImportError:
+        raise NotImplementedError('pandas is not installed')
@@ -0,0 +1,143 @@
+"""Synthetic API response generator for benchmarks.
+
+Builds deterministic response dictionaries shaped like the real API payloads
+so list types can be parsed, filtered and rendered at arbitrary sizes without
+network access.
+"""
+
+import hashlib
+import random
+from datetime import datetime, timedelta
+
+EPOCH = datetime(2021, 1, 1)
+RECORD_TYPES = ['A', 'A', 'A', 'CNAME', 'NS', 'MX', 'AAAA']
+SOURCES = ['riskiq', 'pingly', 'kaspersky', 'farsight', 'mnemonic']
+HOSTPAIR_CAUSES = ['redirect', 'iframe.src', 'script.src', 'image.src', 'parentPage']
+INDICATOR_TYPES = ['domain', 'ip', 'hash_sha256', 'hash_md5', 'url', 'email']
+INDICATOR_CATEGORIES = ['C2', 'phishing', 'malware', 'infrastructure']
+TLDS = ['com', 'net', 'org', 'io', 'co.uk', 'ru', 'cn']
+
+
+
+def _rng(seed):
+    return random.Random(seed)
+
+def _date_pair(rng):
+    """Return firstseen/lastseen strings in API format."""
+    first = EPOCH + timedelta(seconds=rng.randrange(0, 365 * 86400))
+    last = first + timedelta(seconds=rng.randrange(0, 180 * 86400))
+    return first.strftime('%Y-%m-%d %H:%M:%S'), last.strftime('%Y-%m-%d %H:%M:%S')
+
+def _ip(rng):
+    return '{}.{}.{}.{}'.format(rng.randrange(1, 224), rng.randrange(256), rng.randrange(256), rng.randrange(1, 255))
+
+def _hostname(rng, domains=1000):
+    """Hostname drawn from a bounded pool of registered domains so hosts repeat."""
+    domain = 'domain{}.{}'.format(rng.randrange(domains), TLDS[rng.randrange(len(TLDS))])
+    if rng.random() < 0.6:
+        return 'sub{}.{}'.format(rng.randrange(50), domain)
+    return domain
+
+def pdns_response(n, query='passivetotal.org', seed=0):
+    """Passive DNS response with `n` unique records."""
+    rng = _rng(seed)
+    results = []
+    for i in range(n):
+        firstseen, lastseen = _date_pair(rng)
+        recordtype = RECORD_TYPES[rng.randrange(len(RECORD_TYPES))]
+        if recordtype == 'A':
+            resolve, resolvetype = _ip(rng), 'ip'
+        else:
+            resolve, resolvetype = _hostname(rng), 'domain'
+        results.append({
+            'recordHash': hashlib.sha256('{}:{}:{}'.format(seed, i, resolve).encode()).hexdigest(),
+            'resolve': resolve,
+            'resolveType': resolvetype,
+            'recordType': recordtype,
+            'value': query,
+            'source': rng.sample(SOURCES, rng.randrange(1, 3)),
+            'firstSeen': firstseen,
+            'lastSeen': lastseen,
+            'collected': lastseen,
+        })
+    return {
+        'results': results,
+        'queryValue': query,
+        'queryType': 'domain',
+        'firstSeen': min(r['firstSeen'] for r in results) if results else None,
+        'lastSeen': max(r['lastSeen'] for r in results) if results else None,
+        'totalRecords': n,
+        'pager': None,
+    }
+
+def hostnames(n, seed=0):
+    """List of `n` hostnames drawn from a bounded pool of registered domains."""
+    rng = _rng(seed)
+    return [ _hostname(rng) for i in range(n) ]
+
+def indicator_lines(n, seed=0):
+    """Lines of a mixed indicator file, with repeats, defanged dots and trailing newlines."""
+    rng = _rng(seed)
+    lines = []
+    for i in range(n):
+        roll = rng.random()
+        if roll < 0.4:
+            value = _hostname(rng)
+        elif roll < 0.7:
+            value = _ip(rng)
+        elif roll < 0.85:
+            value = hashlib.md5(str(rng.randrange(n)).encode()).hexdigest()
+        elif roll < 0.95:
+            value = 'user{}@{}'.format(rng.randrange(100), _hostname(rng))
+        else:
+            value = '2001:db8::{:x}'.format(rng.randrange(65536))
+        if rng.random() < 0.2:
+            value = value.replace('.', '[.]')
+        lines.append(value + '\n')
+    return lines
+
+def hostpair_response(n, query='passivetotal.org', direction='children', seed=0):
+    """Hostpair response with `n` records."""
+    rng = _rng(seed)
+    results = []
+    for i in range(n):
+        firstseen, lastseen = _date_pair(rng)
+        other = _hostname(rng)
+        results.append({
+            'firstSeen': firstseen,
+            'lastSeen': lastseen,
+            'parent': query if direction == 'children' else other,
+            'child': other if direction == 'children' else query,
+            'cause': HOSTPAIR_CAUSES[rng.randrange(len(HOSTPAIR_CAUSES))],
+        })
+    return {'totalRecords': n, 'results': results}
+
+def intel_indicator_pages(n, pagesize=400, profile_id='apt33', seed=0):
+    """List of intel profile indicator API pages totalling `n` records."""
+    rng = _rng(seed)
+    pages = []
+    for start in range(0, max(n, 1), pagesize):
+        results = []
+        for i in range(start, min(start + pagesize, n)):
+            firstseen, lastseen = _date_pair(rng)
+            ioctype = INDICATOR_TYPES[rng.randrange(len(INDICATOR_TYPES))]
+            if ioctype == 'ip':
+                value = _ip(rng)
+            elif ioctype.startswith('hash'):
+                value = hashlib.sha256(str(i).encode()).hexdigest()
+            else:
+                value = _hostname(rng)
+            results.append({
+                'id': '{}-{}'.format(profile_id, i),
+                'profileId': profile_id,
+                'type': ioctype,
+                'value': value,
+                'category': INDICATOR_CATEGORIES[rng.randrange(len(INDICATOR_CATEGORIES))],
+                'firstSeen': firstseen,
+                'lastSeen': lastseen,
+                'osint': rng.random() < 0.5,
+                'osintUrl': None,
+                'articleGuids': [],
+            })
+        pages.append({'totalCount': n, 'types': INDICATOR_TYPES, 'results': results})
+    return pages
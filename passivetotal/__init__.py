@@ -1,19 +1,43 @@
-from .libs.account import AccountClient
-from .libs.actions import ActionsClient
-from .libs.articles import ArticlesRequest
-from .libs.attributes import AttributeRequest
-from .libs.artifacts import ArtifactsRequest
-from .libs.cards import CardsRequest
-from .libs.cookies import CookiesRequest
-from .libs.dns import DnsRequest
-from .libs.enrichment import EnrichmentRequest
-from .libs.host_attributes import HostAttributeRequest
-from .libs.intelligence import IntelligenceRequest
-from .libs.projects import ProjectsRequest
-from .libs.services import ServicesRequest
-from .libs.ssl import SslRequest
-from .libs.whois import WhoisRequest
-from .libs.generic import GenericRequest
-from .libs.illuminate import IlluminateRequest
-from .libs.monitor import MonitorRequest
-from .libs.trackers import TrackerRequest
+"""Python client for the RiskIQ PassiveTotal API.
+
+Request wrappers are imported on first access so that importing the package,
+or a single submodule, does not load every API library.
+"""
+
+_LIBS = {
+    'AccountClient': 'account',
+    'ActionsClient': 'actions',
+    'ArticlesRequest': 'articles',
+    'AttributeRequest': 'attributes',
+    'ArtifactsRequest': 'artifacts',
+    'CardsRequest': 'cards',
+    'CookiesRequest': 'cookies',
+    'DnsRequest': 'dns',
+    'EnrichmentRequest': 'enrichment',
+    'HostAttributeRequest': 'host_attributes',
+    'IntelligenceRequest': 'intelligence',
+    'ProjectsRequest': 'projects',
+    'ServicesRequest': 'services',
+    'SslRequest': 'ssl',
+    'WhoisRequest': 'whois',
+    'GenericRequest': 'generic',
+    'IlluminateRequest': 'illuminate',
+    'MonitorRequest': 'monitor',
+    'TrackerRequest': 'trackers',
+}
+
+__all__ = list(_LIBS)
+
+
+def __getattr__(name):
+    """Import request wrappers from `passivetotal.libs` on first access."""
+    if name not in _LIBS:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    from importlib import import_module
+    value = getattr(import_module('passivetotal.libs.' + _LIBS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
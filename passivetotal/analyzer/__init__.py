@@ -2,12 +2,13 @@
 
 from collections import namedtuple
 from datetime import datetime, timezone, timedelta
-from passivetotal import *
+import ipaddress
 from passivetotal._version import VERSION
 from passivetotal.api import Context
-from passivetotal.analyzer._common import AnalyzerError, AnalyzerAPIError, is_ip
+from passivetotal.analyzer._common import AnalyzerError, AnalyzerAPIError, is_ip, refang, classify, INDICATOR_TYPES
 
 DEFAULT_DAYS_BACK = 90
+DEFAULT_CONCURRENCY = 8
 
 api_clients = {}
 config = {
@@ -21,7 +22,13 @@ config = {
     'dateorder': None,
     'project_name': None,
     'project_visiblity': 'analyzer',
-    'project_guid': None
+    'project_guid': None,
+    'concurrency': DEFAULT_CONCURRENCY,
+    'article_store': None,
+    'intel_profile_cache': None,
+    'project_catalog': True,
+    'suffix_list': None,
+    'resolver': None,
 }
 
 
@@ -32,6 +39,12 @@ def init(**kwargs):
     none are provided, the class method from_config()
     is called to instantiate an API client from config files.
     """
+    from passivetotal import (
+        AccountClient, ActionsClient, ArticlesRequest, AttributeRequest, CardsRequest,
+        CookiesRequest, DnsRequest, EnrichmentRequest, HostAttributeRequest,
+        IntelligenceRequest, ProjectsRequest, ServicesRequest, SslRequest, WhoisRequest,
+        IlluminateRequest, ArtifactsRequest, MonitorRequest, TrackerRequest
+    )
     api_classes = [
         (AccountClient,'Account'), 
         (ActionsClient, 'Actions'),
@@ -53,6 +66,8 @@ def init(**kwargs):
         (MonitorRequest, 'Monitor'),
         (TrackerRequest, 'Trackers'),
     ]
+    if 'session' not in kwargs:
+        kwargs['session'] = _pooled_session(config['concurrency'])
     for c, name in api_classes:
         if 'username' in kwargs and 'api_key' in kwargs:
             api_clients[name] = c(**kwargs)
@@ -60,8 +75,20 @@ def init(**kwargs):
             api_clients[name] = c.from_config(**kwargs)
         api_clients[name].exception_class = AnalyzerAPIError
         api_clients[name].set_context('python','passivetotal',VERSION,'analyzer')
+    if config['project_catalog'] is not None:
+        config['project_catalog'] = True
     config['is_ready'] = True
 
+def _pooled_session(size):
+    """Build an HTTP session shared by all API clients with room for `size` concurrent queries."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=max(size, 10))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
 def get_api(name):
     """Return an instance of an API client by name."""
     if not config['is_ready']:
@@ -87,6 +114,8 @@ def get_object(input, type=None):
 
     Returns :class:`analyzer.Hostname` or :class:`analyzer.IPAddress`.
     """
+    from passivetotal.analyzer.hostname import Hostname
+    from passivetotal.analyzer.ip import IPAddress
     if isinstance(input, IPAddress) or isinstance(input, Hostname):
         return input
     objs = {
@@ -99,6 +128,53 @@ def get_object(input, type=None):
         raise AnalyzerError('type must be IPAddress or Hostname')
     return objs[type](input) 
 
+def get_objects(inputs, grouped=False):
+    """Get Analyzer objects for many inputs at once, such as the lines of an indicator file.
+
+    Each input is stripped, refanged and classified once with precompiled patterns, and
+    repeated indicators are skipped after normalization, so `www[.]example.com` and
+    `www.example.com` count once. Inputs that are already Analyzer objects are kept as-is.
+
+    Only IPv4 addresses and hostnames have Analyzer objects; use `grouped=True` to also
+    get IPv6 addresses, hashes, emails and unrecognized inputs.
+
+    :param inputs: Iterable of indicators as strings or Analyzer objects
+    :param grouped: Whether to return the unique inputs grouped by type (optional, defaults to False)
+    :return: List of unique :class:`analyzer.Hostname` and :class:`analyzer.IPAddress` objects in input order,
+        or if `grouped` is True, a dict of lists keyed by 'IPAddress', 'Hostname', 'IPv6', 'Hash', 'Email' and 'Unknown'
+    """
+    from passivetotal.analyzer.hostname import Hostname
+    from passivetotal.analyzer.ip import IPAddress
+    factories = {
+        'IPAddress': IPAddress._get_instance,
+        'Hostname': Hostname._get_instance,
+        'IPv6': lambda value: str(ipaddress.IPv6Address(value)),
+        'Hash': str.lower,
+        'Email': str,
+        None: str,
+    }
+    groups = { key: [] for key in INDICATOR_TYPES + ['Unknown'] }
+    objects = []
+    seen = set()
+    for value in inputs:
+        if value.__class__ is str:
+            indicator = refang(value.strip())
+            if not indicator:
+                continue
+            kind = classify(indicator)
+            obj = factories[kind](indicator)
+        elif isinstance(value, (IPAddress, Hostname)):
+            kind, obj = value.__class__.__name__, value
+        else:
+            raise AnalyzerError('inputs must be strings or Analyzer objects')
+        if obj in seen:
+            continue
+        seen.add(obj)
+        if kind in ('IPAddress', 'Hostname'):
+            objects.append(obj)
+        groups[kind or 'Unknown'].append(obj)
+    return groups if grouped else objects
+
 def get_version():
     """Get the current version of this package."""
     return VERSION
@@ -147,6 +223,108 @@ def set_pdns_timeout(timeout):
     """Set a timeout on pDNS queries to third-party sources."""
     config['pdns_timeout'] = timeout
 
+def set_concurrency(concurrency):
+    """Set the number of concurrent API queries used by bulk loading methods.
+
+    Set to 1 to disable concurrency and query the API serially.
+    """
+    if concurrency < 1:
+        raise AnalyzerError('concurrency must be at least 1')
+    config['concurrency'] = concurrency
+    if api_clients:
+        session = _pooled_session(concurrency)
+        for client in api_clients.values():
+            client.session = session
+
+def set_article_store(path):
+    """Keep a local copy of threat intelligence articles in a SQLite database.
+
+    Once set, :class:`analyzer.AllArticles` syncs the store incrementally and loads
+    articles from it. Pass None to query the API directly again.
+
+    :param path: Path to the SQLite database file, created if missing.
+    """
+    config['article_store'] = path
+
+def set_intel_profile_cache(enabled=True, max_age=None):
+    """Answer `IntelProfiles.find_by_indicator` lookups from a local indicator cache.
+
+    Indicators from every intel profile are synced on the first lookup and reloaded
+    once they are older than `max_age` seconds. Lookups for indicator types not in
+    the cache still query the API.
+
+    :param enabled: Whether to use the cache (optional, defaults to True)
+    :param max_age: Seconds between refreshes (optional, defaults to one day)
+    """
+    from passivetotal.analyzer.illuminate.cti import IntelProfileIndicatorCache, INDICATOR_CACHE_MAX_AGE
+    if not enabled:
+        config['intel_profile_cache'] = None
+        return
+    config['intel_profile_cache'] = IntelProfileIndicatorCache(max_age or INDICATOR_CACHE_MAX_AGE)
+
+def set_project_catalog(enabled=True, max_age=None):
+    """Answer project lookups by name or GUID from a local project catalog.
+
+    The catalog is enabled by default and shared by `set_project`, `Project.find`,
+    `ProjectList.find` and `IsArtifact.projects`. It loads every project on first use,
+    reloads once it is older than `max_age` seconds and is reset by `init()`.
+
+    :param enabled: Whether to use the catalog (optional, defaults to True)
+    :param max_age: Seconds between reloads (optional, defaults to five minutes)
+    :rtype: :class:`passivetotal.analyzer.projects.ProjectCatalog`
+    """
+    from passivetotal.analyzer.projects import ProjectCatalog, PROJECT_CATALOG_MAX_AGE
+    config['project_catalog'] = ProjectCatalog(max_age or PROJECT_CATALOG_MAX_AGE) if enabled else None
+    return config['project_catalog']
+
+def set_suffix_list(path=None):
+    """Use a saved public suffix list for registered domain and TLD extraction.
+
+    Extraction never queries the network. Without a path, the list saved by
+    `suffixes.refresh_suffix_list()` (or `pt-config refresh-suffixes`) in the
+    config directory is used if present, and otherwise the snapshot bundled
+    with `tldextract`.
+
+    :param path: Path to a public suffix list file (optional)
+    """
+    from os.path import expanduser
+    from passivetotal.analyzer.suffixes import reset
+    config['suffix_list'] = expanduser(path) if path else None
+    reset()
+
+def set_resolver(timeout=None, ttl=None, family='A', lookup=None, concurrency=None):
+    """Configure live DNS lookups for `Hostname.ip` and `analyzer.resolve_many()`.
+
+    Lookups run on a thread pool, are abandoned after `timeout` seconds and are cached
+    for `ttl` seconds. Failed lookups are cached briefly so they are not retried at once.
+
+    :param timeout: Seconds to wait for each lookup (optional, defaults to 5)
+    :param ttl: Seconds to cache answers (optional, defaults to five minutes)
+    :param family: Default address family for `resolve_many`, 'A', 'AAAA' or 'ANY' (optional, defaults to 'A')
+    :param lookup: Callable that accepts a hostname and family and returns a list of addresses, such as a wrapper around a custom DNS client (optional, defaults to the system resolver)
+    :param concurrency: Number of lookups to run at once (optional, defaults to 32)
+    :rtype: :class:`passivetotal.analyzer.resolver.Resolver`
+    """
+    from passivetotal.analyzer.resolver import Resolver, DNS_TIMEOUT, DNS_CACHE_TTL, DNS_CONCURRENCY
+    config['resolver'] = Resolver(timeout or DNS_TIMEOUT, ttl or DNS_CACHE_TTL, family, lookup,
+                                  concurrency or DNS_CONCURRENCY)
+    return config['resolver']
+
+def resolve_many(hosts, family=None, concurrency=None, progress=None):
+    """Resolve the current addresses of many hostnames with live DNS lookups.
+
+    Lookups run concurrently with the resolver configured by `set_resolver()` and share
+    its cache with `Hostname.ip`. Failed or timed out lookups return an empty list.
+
+    :param hosts: Iterable of hostnames as strings or :class:`analyzer.Hostname` objects
+    :param family: 'A', 'AAAA' or 'ANY' (optional, defaults to the resolver's family)
+    :param concurrency: Number of lookups to run at once (optional, defaults to the resolver's concurrency)
+    :param progress: Callable that accepts the number of completed lookups and the total (optional)
+    :return: Dict of address lists as strings keyed by hostname, in input order
+    """
+    from passivetotal.analyzer.resolver import Resolver
+    return Resolver.shared().resolve_many(hosts, family, concurrency, progress)
+
 def set_pdns_sources(sources):
     """Set a list of third-sources for pDNS queries."""
     config['pdns_sources'] = sources
@@ -199,6 +377,7 @@ def get_project():
     """
     if config['project_guid'] is None:
         return None
+    from passivetotal.analyzer.projects import Project
     return Project.find(config['project_guid'])
 
 def set_project(name_or_guid, visibility='analyst', description='', tags=None, create_if_missing=True):
@@ -212,13 +391,17 @@ def set_project(name_or_guid, visibility='analyst', description='', tags=None, c
     :param description: Description of the project (optional).
     :param tags: List of tags to apply to the project (optional).
     :param create_if_missing: Whether to auto-create the project if it doesn't exist (optional, defaults to true)."""
+    from passivetotal.analyzer.projects import ProjectCatalog, _find_projects
     projreq = get_api('Projects')
-    projects = projreq.find_projects(name_or_guid, visibility)
+    projects = _find_projects(name_or_guid, visibility)
     if len(projects) == 0:
         if projreq.is_guid(name_or_guid):
             raise AnalyzerError('No project found with that GUID')
         if create_if_missing:
             result = projreq.create_project(name_or_guid, visibility, description=description, tags=tags)
+            catalog = ProjectCatalog.shared()
+            if catalog is not None and 'guid' in result:
+                catalog.add(result)
             config['project_name'] = name_or_guid
             config['project_guid'] = result['guid']
             config['project_visibility'] = visibility
@@ -247,10 +430,34 @@ def AttackSurface(id_or_name=None):
     return ASI.find(id_or_name)
 
 
+_LAZY_OBJECTS = {
+    'Hostname': 'passivetotal.analyzer.hostname',
+    'IPAddress': 'passivetotal.analyzer.ip',
+    'CertificateField': 'passivetotal.analyzer.ssl',
+    'DomainFilter': 'passivetotal.analyzer._common',
+    'extract_many': 'passivetotal.analyzer.suffixes',
+    'AllArticles': 'passivetotal.analyzer.articles',
+    'ArticleIndex': 'passivetotal.analyzer.articleindex',
+    'ArticleStore': 'passivetotal.analyzer.articles',
+    'IndicatorMatcher': 'passivetotal.analyzer.matcher',
+    'Project': 'passivetotal.analyzer.projects',
+    'ProjectList': 'passivetotal.analyzer.projects',
+    'Tracker': 'passivetotal.analyzer.trackers',
+}
 
-from passivetotal.analyzer.hostname import Hostname
-from passivetotal.analyzer.ip import IPAddress
-from passivetotal.analyzer.ssl import CertificateField
-from passivetotal.analyzer.articles import AllArticles
-from passivetotal.analyzer.projects import Project, ProjectList
-from passivetotal.analyzer.trackers import Tracker
\ No newline at end of file
+def __getattr__(name):
+    """Import analyzer objects and request wrappers on first access.
+
+    Keeps `import passivetotal.analyzer` cheap for scripts that only need
+    a few object types.
+    """
+    from importlib import import_module
+    import passivetotal
+    if name in _LAZY_OBJECTS:
+        value = getattr(import_module(_LAZY_OBJECTS[name]), name)
+    elif name in passivetotal.__all__:
+        value = getattr(passivetotal, name)
+    else:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    globals()[name] = value
+    return value
\ No newline at end of file
@@ -1,24 +1,110 @@
 """Base classes and common methods for the analyzer package."""
 from datetime import datetime
+import ipaddress
 import pprint
 import re
+import threading
+import time
 
-try:
-    import pandas
-    PANDAS = True
-except ImportError:
-    PANDAS = False
+
+
+INDICATOR_TYPES = ['IPAddress', 'Hostname', 'IPv6', 'Hash', 'Email']
+
+_IPV4 = re.compile(r"^(\d{1,3}(?:\.|\]\.\[|\[\.\]|\(\.\)|{\.})\d{1,3}(?:\.|\]\.\[|\[\.\]|\(\.\)|{\.})\d{1,3}(?:\.|\]\.\[|\[\.\]|\(\.\)|{\.})\d{1,3})$")
+_INDICATOR = re.compile(r"""
+    (?P<IPAddress>\d{1,3}(?:\.|\(\.\)|{\.})\d{1,3}(?:\.|\(\.\)|{\.})\d{1,3}(?:\.|\(\.\)|{\.})\d{1,3})
+    |(?P<Hash>[0-9a-fA-F]{32}|[0-9a-fA-F]{40}|[0-9a-fA-F]{64})
+    |(?P<Email>[^@\s]+@[^@\s]+\.[^@\s]+)
+    |(?P<Hostname>(?:[\w](?:[\w-]{0,61}[\w])?\.)+[a-zA-Z0-9-]{2,63}\.?)
+""", re.VERBOSE | re.ASCII)
 
 
 
 def is_ip(test):
     """Test to see if a string contains an IPv4 address."""
-    pattern = re.compile(r"^(\d{1,3}(?:\.|\]\.\[|\[\.\]|\(\.\)|{\.})\d{1,3}(?:\.|\]\.\[|\[\.\]|\(\.\)|{\.})\d{1,3}(?:\.|\]\.\[|\[\.\]|\(\.\)|{\.})\d{1,3})$")
-    return len(pattern.findall(test)) > 0
+    return _IPV4.match(test) is not None
 
 def refang(host):
     """Remove square braces around dots in a host."""
-    return re.sub(r'[\[\]]','', host)
+    if '[' in host or ']' in host:
+        return host.replace('[', '').replace(']', '')
+    return host
+
+def classify(indicator):
+    """Detect the type of a refanged indicator with precompiled patterns.
+
+    :param indicator: Indicator as a string, already passed through `refang()`
+    :return: One of `INDICATOR_TYPES`, or None if the type is not recognized
+    """
+    match = _INDICATOR.fullmatch(indicator)
+    if match is not None:
+        return match.lastgroup
+    if ':' in indicator:
+        try:
+            ipaddress.IPv6Address(indicator)
+        except ValueError:
+            return None
+        return 'IPv6'
+    return None
+
+def run_concurrently(fn, items, concurrency=None, progress=None):
+    """Call a function once for each item on a thread pool.
+
+    Results are returned in the same order as the items. The first exception
+    raised by any call is re-raised after the pool shuts down.
+
+    :param fn: Callable that accepts one item
+    :param items: Iterable of items
+    :param concurrency: Number of worker threads (optional, defaults to `analyzer.set_concurrency()` value)
+    :param progress: Callable that accepts the number of completed calls and the total, called as each call completes (optional)
+    :rtype: list
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    items = list(items)
+    if concurrency is None:
+        from passivetotal.analyzer import get_config
+        concurrency = get_config('concurrency')
+    if concurrency < 1:
+        raise AnalyzerError('concurrency must be at least 1')
+    if concurrency == 1 or len(items) < 2:
+        results = []
+        for item in items:
+            results.append(fn(item))
+            if progress is not None:
+                progress(len(results), len(items))
+        return results
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as executor:
+        futures = [ executor.submit(fn, item) for item in items ]
+        if progress is not None:
+            for done, _ in enumerate(as_completed(futures), 1):
+                progress(done, len(futures))
+        return [ future.result() for future in futures ]
+
+
+
+class RateLimiter:
+
+    """Spaces out calls made from many threads so no more than `rate` start per second."""
+
+    def __init__(self, rate):
+        """Initialize the limiter.
+
+        :param rate: Maximum number of calls per second
+        """
+        if rate <= 0:
+            raise AnalyzerError('rate must be greater than zero')
+        self._interval = 1.0 / rate
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the next call may start."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self._interval
+        if start > now:
+            time.sleep(start - now)
 
 
 
@@ -69,7 +155,9 @@ class ForPandas:
 
         Throws `AnalyzerMissingModule` if pandas is not installed.
         """
-        if not PANDAS:
+        try:
+            import pandas
+        except ImportError:
             raise AnalyzerMissingModule('Missing "pandas" Python module')
         return pandas
 
@@ -434,11 +522,103 @@ class PagedRecordList:
 
 
 
+class DomainFilter:
+
+    """Compiled set of hostnames, registered domains, TLDs and parent domains to match hosts against.
+
+    Build once and reuse across lists with `FilterDomains.filter_domains()`. Hostnames,
+    registered domains and TLDs are held in hash sets, and parent domains in a trie of
+    reversed labels, so each host is tested in one pass no matter how many values the
+    filter holds. Matching is case-insensitive. A host matches if it meets any criterion.
+    """
+
+    def __init__(self, hosts=None, domains=None, tlds=None, subdomains_of=None):
+        """Compile a filter.
+
+        Each parameter accepts a comma-separated string or a list of strings or
+        `analyzer.Hostname` objects. Values are stripped and refanged.
+
+        :param hosts: Hostnames or IP addresses to match exactly (optional)
+        :param domains: Hostnames whose registered domain should match (optional)
+        :param tlds: TLDs of registered domains to match (optional)
+        :param subdomains_of: Domains to match along with any of their subdomains (optional)
+        """
+        from .suffixes import extract
+        hosts, domains, tlds, subdomains_of = [
+            value.split(',') if isinstance(value, str) else (value or [])
+            for value in (hosts, domains, tlds, subdomains_of)
+        ]
+        self._hosts = { refang(str(host).strip()).casefold() for host in hosts }
+        self._domains = set()
+        for host in domains:
+            host = refang(str(host).strip())
+            registered = '' if is_ip(host) else extract(host).registered_domain
+            if registered:
+                self._domains.add(registered.casefold())
+        self._tlds = { str(tld).strip().casefold().lstrip('.') for tld in tlds }
+        self._trie = {}
+        for domain in subdomains_of:
+            node = self._trie
+            for label in reversed(refang(str(domain).strip()).casefold().strip('.').split('.')):
+                node = node.setdefault(label, {})
+            node[None] = True
+
+    def __contains__(self, host):
+        return self.match(host)
+
+    def __repr__(self):
+        return '<DomainFilter {} hosts, {} domains, {} tlds>'.format(
+            len(self._hosts), len(self._domains), len(self._tlds))
+
+    def _under_parent(self, name):
+        node = self._trie
+        for label in reversed(name.split('.')):
+            node = node.get(label)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
+
+    def match(self, host):
+        """Whether a host matches any criterion of this filter.
+
+        :param host: Hostname or IP address as a string or an Analyzer object
+        :rtype: bool
+        """
+        if host is None:
+            return False
+        name = str(host).casefold()
+        if name in self._hosts or (self._trie and self._under_parent(name)):
+            return True
+        if self._domains or self._tlds:
+            if isinstance(host, str):
+                if is_ip(host):
+                    return False
+                from .suffixes import extract
+                parts = extract(host)
+                registered, tld = parts.registered_domain, parts.suffix
+            elif host.is_hostname:
+                registered, tld = host.registered_domain, host.tld
+            else:
+                return False
+            if self._domains and (registered or '').casefold() in self._domains:
+                return True
+            if self._tlds and (tld or '').casefold() in self._tlds:
+                return True
+        return False
+
+
+
 class FilterDomains:
 
     """Object that supports filtering records against a list of hostnames, registered domains, or tlds.
     
     Expects a `filter_fn` method on `self` and for each record to expose a `host` property.
+
+    Each method compiles its arguments into a :class:`DomainFilter` once; build a
+    `DomainFilter` directly and pass it to `filter_domains()` to reuse it across lists
+    or to combine criteria in a single pass.
     """
 
     def _get_object(self, input):
@@ -446,6 +626,21 @@ class FilterDomains:
         from . import get_object
         return get_object(input)
 
+    def filter_domains(self, domain_filter, exclude=False):
+        """Filter the list against a compiled :class:`DomainFilter` in one pass.
+
+        :param domain_filter: :class:`DomainFilter` to match each record's host against
+        :param exclude: Whether to exclude matching records instead of keeping them (optional, defaults to False)
+        """
+        return self.filter_fn(lambda r: domain_filter.match(r.host) != exclude)
+
+    def _exclude_hostnames(self, domain_filter):
+        """Keep only records for hostnames that do not match a filter."""
+        def keep(record):
+            host = record.host
+            return host is not None and host.is_hostname and not domain_filter.match(host)
+        return self.filter_fn(keep)
+
     def exclude_hosts_in(self, hosts):
         """Filter the list to exclude records where the parent or child is contained in not in 
         a list of hosts. Accepts either a list of strings or a list of `analyzer.Hostname` objects.
@@ -457,9 +652,14 @@ class FilterDomains:
         
         :param hosts: List of hostnames to directly match against, as a comma-separated string or a list.
         """
-        if isinstance(hosts, str):
-            hosts = hosts.split(',')
-        return self.filter_fn(lambda h:  h.host not in [self._get_object(h) for h in hosts])
+        return self.filter_domains(DomainFilter(hosts=hosts), exclude=True)
+
+    def include_hosts_in(self, hosts):
+        """Filter the list to only records where the parent or child is in a list of hosts.
+
+        :param hosts: List of hostnames to directly match against, as a comma-separated string or a list.
+        """
+        return self.filter_domains(DomainFilter(hosts=hosts))
     
     def exclude_domains_in(self, hosts):
         """Filter the list to exclude records where the registered domain of the parent or child 
@@ -468,16 +668,20 @@ class FilterDomains:
         
         Will apply to parents if `direction` is parents (from `hostpair_parents` property) or to
         children if `direction` is children(from `hostpair_children` property).
+
+        Records for IP addresses are also excluded.
         
         :param hosts: List of hostnames to directly match against, as a comma-separated string or a list.
         """
-        if isinstance(hosts, str):
-            hosts = hosts.split(',')
-        return self.filter_fn(
-            lambda h: h.host.registered_domain not in [
-                h.registered_domain for h in [self._get_object(host) for host in hosts] if h.is_hostname
-            ] if h.host.is_hostname else False
-        )
+        return self._exclude_hostnames(DomainFilter(domains=hosts))
+
+    def include_domains_in(self, hosts):
+        """Filter the list to only records where the registered domain of the parent or child
+        matches the registered domain of a host in a list.
+
+        :param hosts: List of hostnames whose registered domains to match, as a comma-separated string or a list.
+        """
+        return self.filter_domains(DomainFilter(domains=hosts))
     
     def exclude_tlds_in(self, tlds):
         """Filter the list to exclude records where the tld of the registered domain of the 
@@ -486,14 +690,35 @@ class FilterDomains:
         
         Will apply to parents if `direction` is parents (from `hostpair_parents` property) or to
         children if `direction` is children(from `hostpair_children` property).
+
+        Records for IP addresses are also excluded.
         
         :param hosts: List of hostnames to directly match against, as a comma-separated string or a list.
         """
-        if isinstance(tlds, str):
-            tlds = tlds.split(',')
-        return self.filter_fn(
-            lambda h: h.host.tld not in tlds if h.host.is_hostname else False
-        )
+        return self._exclude_hostnames(DomainFilter(tlds=tlds))
+
+    def include_tlds_in(self, tlds):
+        """Filter the list to only records where the tld of the parent or child is in a list of tlds.
+
+        :param tlds: List of tlds, as a comma-separated string or a list.
+        """
+        return self.filter_domains(DomainFilter(tlds=tlds))
+
+    def exclude_subdomains_of(self, domains):
+        """Filter the list to exclude records where the parent or child is one of a list of
+        domains or any of their subdomains.
+
+        :param domains: List of domains, as a comma-separated string or a list.
+        """
+        return self.filter_domains(DomainFilter(subdomains_of=domains), exclude=True)
+
+    def include_subdomains_of(self, domains):
+        """Filter the list to only records where the parent or child is one of a list of
+        domains or any of their subdomains.
+
+        :param domains: List of domains, as a comma-separated string or a list.
+        """
+        return self.filter_domains(DomainFilter(subdomains_of=domains))
                    
 
 
@@ -0,0 +1,223 @@
+"""In-memory full-text index for threat intelligence articles."""
+
+from collections import Counter, namedtuple
+import math
+import re
+
+
+
+INDEX_FIELDS = ['title', 'summary', 'tags', 'categories', 'indicators']
+TEXT_FIELDS = ['title', 'summary', 'tags']
+FIELD_WEIGHTS = {'title': 3.0, 'tags': 2.0, 'summary': 1.0, 'categories': 1.0, 'indicators': 1.0}
+GRAM_SIZE = 3
+
+SearchResult = namedtuple('SearchResult', ['article', 'score'])
+
+_TOKEN = re.compile(r'\w[\w.\-]*\w|\w')
+
+
+
+def tokenize(text):
+    """Split text into lowercase search tokens.
+
+    Dots and dashes inside a token are kept, so hostnames and IPs stay whole.
+    """
+    return _TOKEN.findall(text.casefold())
+
+def _grams(text):
+    return { text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1) }
+
+
+
+class ArticleIndex:
+
+    """Inverted index over article titles, summaries, tags, categories and indicators.
+
+    Supports ranked keyword search with AND/OR operators and tag facets, and
+    exact substring matching with the same semantics as `Article.match_text`.
+    Articles can be added, replaced or removed incrementally.
+    """
+
+    def __init__(self, articles=None):
+        """Initialize the index.
+
+        :param articles: Iterable of :class:`passivetotal.analyzer.articles.Article` to index (optional)
+        """
+        self._articles = {}
+        self._postings = {}
+        self._lengths = {}
+        self._tokens = {}
+        self._text = {}
+        self._grams = {}
+        self._tags = {}
+        if articles is not None:
+            self.update(articles)
+
+    def __len__(self):
+        return len(self._articles)
+
+    def __contains__(self, guid):
+        return guid in self._articles
+
+    def __repr__(self):
+        return '<ArticleIndex {} articles, {} tokens>'.format(len(self), len(self._postings))
+
+    def update(self, articles):
+        """Add or replace articles in the index.
+
+        :param articles: Iterable of :class:`passivetotal.analyzer.articles.Article`
+        :return: this index, to allow chaining
+        """
+        for article in articles:
+            self.add(article)
+        return self
+
+    def add(self, article):
+        """Add an article to the index, replacing any earlier version with the same GUID.
+
+        :param article: :class:`passivetotal.analyzer.articles.Article`
+        """
+        guid = article.guid
+        if guid in self._articles:
+            self.remove(guid)
+        self._articles[guid] = article
+        fields = {
+            'title': [article.title or ''],
+            'summary': [article.summary or ''],
+            'tags': list(article.tags or []),
+            'categories': list(article.categories or []),
+            'indicators': [ value for group in article.indicators or [] for value in group.get('values', []) ],
+        }
+        length = 0
+        tokens = set()
+        for field, values in fields.items():
+            counts = Counter(token for value in values for token in tokenize(str(value)))
+            for token, count in counts.items():
+                self._postings.setdefault(token, {}).setdefault(guid, {})[field] = count
+            length += sum(counts.values())
+            tokens.update(counts)
+        self._lengths[guid] = length
+        self._tokens[guid] = tokens
+        text = {
+            'title': fields['title'][0].casefold(),
+            'summary': fields['summary'][0].casefold(),
+            'tags': [ tag.casefold() for tag in fields['tags'] ],
+        }
+        self._text[guid] = text
+        for gram in _grams(text['title']) | _grams(text['summary']).union(*[ _grams(t) for t in text['tags'] ]):
+            self._grams.setdefault(gram, set()).add(guid)
+        for tag in fields['tags']:
+            self._tags.setdefault(tag, set()).add(guid)
+
+    def remove(self, guid):
+        """Remove an article from the index by GUID."""
+        article = self._articles.pop(guid, None)
+        if article is None:
+            return
+        text = self._text.pop(guid)
+        self._lengths.pop(guid)
+        for token in self._tokens.pop(guid):
+            del self._postings[token][guid]
+            if not self._postings[token]:
+                del self._postings[token]
+        for gram in _grams(text['title']) | _grams(text['summary']).union(*[ _grams(t) for t in text['tags'] ]):
+            self._grams[gram].discard(guid)
+            if not self._grams[gram]:
+                del self._grams[gram]
+        for tag in set(article.tags or []):
+            self._tags[tag].discard(guid)
+            if not self._tags[tag]:
+                del self._tags[tag]
+
+    def get(self, guid):
+        """Return the indexed article with a GUID, or None."""
+        return self._articles.get(guid)
+
+    def match_text(self, text, fields=TEXT_FIELDS):
+        """GUIDs of articles that contain the text in one or more fields.
+
+        Case insensitive substring match with the same results as `Article.match_text`.
+
+        :param text: text to search for
+        :param fields: list of fields to search, any of title, summary and tags (optional)
+        :rtype: set
+        """
+        text = text.casefold()
+        grams = _grams(text)
+        if grams:
+            candidates = set.intersection(*[ self._grams.get(gram, set()) for gram in grams ])
+        else:
+            candidates = self._text.keys()
+        found = set()
+        for guid in candidates:
+            stored = self._text[guid]
+            if (('title' in fields and text in stored['title']) or
+                    ('summary' in fields and text in stored['summary']) or
+                    ('tags' in fields and any(text in tag for tag in stored['tags']))):
+                found.add(guid)
+        return found
+
+    def match_tags(self, tags):
+        """GUIDs of articles with an exact match to one or more tags.
+
+        :param tags: String with one or multiple comma-separated tags, or a list
+        :rtype: set
+        """
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        return set().union(*[ self._tags.get(tag, set()) for tag in tags ])
+
+    def search(self, query, operator='and', fields=INDEX_FIELDS, tags=None, limit=None):
+        """Ranked keyword search.
+
+        Terms are scored with TF-IDF, and matches in titles and tags are weighted
+        above matches in summaries and indicators.
+
+        :param query: Search terms separated by spaces
+        :param operator: 'and' to require every term, 'or' to require any term (optional, defaults to 'and')
+        :param fields: Fields to search (optional, defaults to all indexed fields)
+        :param tags: Only return articles with one or more of these tags (optional)
+        :param limit: Maximum number of results (optional)
+        :return: List of :class:`SearchResult` tuples, best match first
+        """
+        if operator not in ['and', 'or']:
+            raise ValueError("operator must be 'and' or 'or'")
+        terms = tokenize(query)
+        if not terms:
+            return []
+        total = len(self._articles)
+        scores = {}
+        matched = Counter()
+        for term in set(terms):
+            docs = { guid: counts for guid, counts in self._postings.get(term, {}).items()
+                     if any(field in counts for field in fields) }
+            if not docs:
+                continue
+            idf = math.log(1 + total / len(docs))
+            for guid, counts in docs.items():
+                weight = sum(FIELD_WEIGHTS.get(field, 1.0) * count
+                             for field, count in counts.items() if field in fields)
+                scores[guid] = scores.get(guid, 0) + weight * idf / math.sqrt(self._lengths[guid] or 1)
+                matched[guid] += 1
+        if operator == 'and':
+            needed = len(set(terms))
+            scores = { guid: score for guid, score in scores.items() if matched[guid] == needed }
+        if tags is not None:
+            allowed = self.match_tags(tags)
+            scores = { guid: score for guid, score in scores.items() if guid in allowed }
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [ SearchResult(self._articles[guid], score) for guid, score in ranked ]
+
+    def facets(self, guids=None):
+        """Count articles per tag.
+
+        :param guids: Only count these article GUIDs (optional, defaults to every indexed article)
+        :rtype: :class:`collections.Counter`
+        """
+        if guids is None:
+            return Counter({ tag: len(members) for tag, members in self._tags.items() })
+        guids = set(guids)
+        return Counter({ tag: len(members & guids) for tag, members in self._tags.items()
+                         if members & guids })
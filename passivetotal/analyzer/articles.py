@@ -1,9 +1,16 @@
 from collections import OrderedDict
-from datetime import datetime, timezone
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+import hashlib
+import json
+import os
+import sqlite3
+import threading
 from passivetotal.analyzer._common import (
-    RecordList, Record, ForPandas
+    RecordList, Record, ForPandas, AnalyzerAPIError, run_concurrently
 )
 from passivetotal.analyzer import get_api, get_config
+from passivetotal.analyzer.articleindex import ArticleIndex
 
 
 
@@ -46,32 +53,112 @@ class ArticlesList(RecordList, ForPandas):
         articles.parse(response)
         return articles
     
+    def load_details(self, concurrency=None):
+        """Fetch details for every article in the list that is missing them.
+
+        Queries run concurrently and each article GUID is only queried once, even
+        if it appears in the list more than once. List-level operations that need
+        details, such as `filter_tags`, `filter_text`, `as_dict` and `to_dataframe`,
+        call this method automatically.
+
+        :param concurrency: number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+        :return: this list, to allow chaining
+        :rtype: :class:`passivetotal.analyzer.articles.ArticlesList`
+        """
+        missing = OrderedDict()
+        for article in self._records:
+            if article._needs_details():
+                missing.setdefault(article.guid, []).append(article)
+        if not missing:
+            return self
+        api = get_api('Articles')
+        responses = run_concurrently(api.get_details, missing.keys(), concurrency)
+        for articles, response in zip(missing.values(), responses):
+            for article in articles:
+                article._set_details(response)
+        return self
+
+    @property
+    def as_dict(self):
+        """Return the list as a dictionary, loading article details concurrently first."""
+        self.load_details()
+        return super().as_dict
+
+    def to_dataframe(self, ensure_details=True, **kwargs):
+        """Render this list as a Pandas DataFrame.
+
+        :param bool ensure_details: Whether to ensure details are available, fetched concurrently (optional, defaults to True)
+        :param bool include_indicators: Whether to include indicators (optional, defaults to False)
+        :rtype: :class:`pandas.DataFrame`
+        """
+        if ensure_details:
+            self.load_details()
+        return super().to_dataframe(ensure_details=ensure_details, **kwargs)
+
+    @property
+    def index(self):
+        """Full-text index of the articles in this list.
+
+        Built once, after loading article details, and extended incrementally
+        when articles are added to the list.
+
+        :rtype: :class:`passivetotal.analyzer.articleindex.ArticleIndex`
+        """
+        index = getattr(self, '_index', None)
+        if index is None or getattr(self, '_index_records', None) is not self._records:
+            index = self._index = ArticleIndex()
+            self._index_records = self._records
+        if len(index) < len(self._records):
+            new = [ r for r in self._records if r.guid not in index ]
+            if new:
+                self.load_details()
+                index.update(new)
+        return index
+
+    def _filter_guids(self, guids):
+        filtered_results = self._make_shallow_copy()
+        filtered_results._records = [ r for r in self._records if r.guid in guids ]
+        return filtered_results
+
     def filter_tags(self, tags):
         """Filtered article list that includes articles with an exact match to one
         or more tags.
 
-        Tests the `match_tags` method on each article.
+        Uses the list's full-text index, with the same results as the `match_tags`
+        method on each article.
 
         :param tags: String with one or multiple comma-separated tags, or a list
         :rtype: :class:`passivetotal.analyzer.articles.ArticlesList`
         """
-        filtered_results = self._make_shallow_copy()
-        filtered_results._records = filter(lambda r: r.match_tags(tags), self._records)
-        return filtered_results
+        return self._filter_guids(self.index.match_tags(tags))
     
     def filter_text(self, text, fields=['tags','title','summary']):
         """Filtered article list that contain the text in one or more fields.
         
         Searches tags, title and summary by default - set `fields` param to a 
-        smaller list to narrow the search.
+        smaller list to narrow the search. Uses the list's full-text index, with
+        the same results as the `match_text` method on each article.
         
         :param text: text to search for
         :param fields: list of fields to search (optional)
         :rtype: :class:`passivetotal.analyzer.articles.ArticlesList`
         """
-        filtered_results = self._make_shallow_copy()
-        filtered_results._records = filter(lambda r: r.match_text(text, fields), self._records)
-        return filtered_results
+        return self._filter_guids(self.index.match_text(text, fields))
+
+    def search(self, query, operator='and', tags=None, limit=None):
+        """Ranked keyword search across article titles, summaries, tags, categories and indicators.
+
+        :param query: Search terms separated by spaces
+        :param operator: 'and' to require every term, 'or' to require any term (optional, defaults to 'and')
+        :param tags: Only return articles with one or more of these tags (optional)
+        :param limit: Maximum number of results (optional)
+        :return: List of :class:`passivetotal.analyzer.articleindex.SearchResult` tuples, best match first
+        """
+        records = { r.guid: r for r in self._records }
+        results = [ result._replace(article=records[result.article.guid])
+                    for result in self.index.search(query, operator, tags=tags)
+                    if result.article.guid in records ]
+        return results if limit is None else results[:limit]
 
 
 
@@ -89,23 +176,213 @@ class AllArticles(ArticlesList):
     constructor.
     """
 
-    def __init__(self, created_after=None, autoload=True):
+    def __init__(self, created_after=None, autoload=True, store=None):
         """Initialize a list of articles; will autoload by default.
         :param autoload: whether to automatically load articles upon instantiation (defaults to true)
+        :param store: :class:`ArticleStore` or path to sync into and load from (optional, defaults to `analyzer.set_article_store()` value)
         """
         super().__init__()
         if autoload:
-            self.load(created_after)
+            self.load(created_after, store)
 
-    def load(self, created_after=None):
+    def _make_shallow_copy(self):
+        """Creates a shallow copy of the instance without reloading articles."""
+        copy = self.__class__(autoload=False)
+        for field in self._get_shallow_copy_fields():
+            setattr(copy, field, getattr(self, field))
+        return copy
+
+    def load(self, created_after=None, store=None):
         """Query the API for articles and load them into an articles list.
+
+        When an article store is configured, the store is synced incrementally and
+        articles are loaded from it with their details already filled in.
         
         :param created_after: only return articles created after this date (optional, defaults to date set by `analyzer.set_date_range()`
+        :param store: :class:`ArticleStore` or path to sync into and load from (optional, defaults to `analyzer.set_article_store()` value)
         """
         if created_after is None:
             created_after = get_config('start_date')
+        store = store or get_config('article_store')
+        if store is not None:
+            if not isinstance(store, ArticleStore):
+                store = ArticleStore(store)
+            store.sync(created_after)
+            self._records = store.load(created_after, self._query)
+            self._totalrecords = len(self._records)
+            return
         response = get_api('Articles').get_articles(createdAfter=created_after)
         self.parse(response)
+
+
+
+class ArticleStore:
+    """Local SQLite repository of threat intelligence articles.
+
+    Keeps full article details on disk and syncs incrementally from the newest
+    article creation date seen (the watermark), so repeated runs only query the
+    API for details of new or changed articles.
+
+    One instance is shared per database path.
+    """
+
+    SYNC_OVERLAP_DAYS = 1
+    _instances = {}
+
+    def __new__(cls, path):
+        """Create or find a store for the given database path."""
+        path = os.path.abspath(os.path.expanduser(path))
+        self = cls._instances.get(path)
+        if self is None:
+            self = cls._instances[path] = object.__new__(cls)
+            self._path = path
+            self._lock = threading.Lock()
+            self._create_schema()
+        return self
+
+    def __repr__(self):
+        return '<ArticleStore {}>'.format(self._path)
+
+    @property
+    def index(self):
+        """Full-text index of every article in the store.
+
+        Built from the database on first use and updated incrementally by `sync`.
+
+        :rtype: :class:`passivetotal.analyzer.articleindex.ArticleIndex`
+        """
+        if getattr(self, '_index', None) is None:
+            with self._connect() as db:
+                rows = db.execute('SELECT data FROM articles').fetchall()
+            self._index = ArticleIndex(Article(json.loads(data)) for (data,) in rows)
+        return self._index
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection for one transaction, committing on success and always closing it."""
+        db = sqlite3.connect(self._path)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _create_schema(self):
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS articles ('
+                       'guid TEXT PRIMARY KEY, created TEXT, fingerprint TEXT, data TEXT)')
+            db.execute('CREATE INDEX IF NOT EXISTS articles_created ON articles (created)')
+            db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+
+    @staticmethod
+    def _normalize_date(date):
+        """Normalize API and config date strings to YYYY-MM-DD HH:MM:SS for comparison."""
+        if date is None:
+            return ''
+        return str(date).replace('T', ' ')[:19]
+
+    @staticmethod
+    def _fingerprint(article):
+        return hashlib.sha1(json.dumps(article, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _get_meta(self, db, key):
+        row = db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def _set_meta(self, db, key, value):
+        db.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    @property
+    def path(self):
+        """Path to the SQLite database file."""
+        return self._path
+
+    @property
+    def watermark(self):
+        """Creation date of the newest article in the store, or None if never synced."""
+        with self._connect() as db:
+            return self._get_meta(db, 'watermark')
+
+    def sync(self, created_after=None, concurrency=None):
+        """Sync the store with the Articles API.
+
+        Queries articles created after the watermark (less a small overlap, to catch
+        recent edits), or after `created_after` if that is earlier than anything synced
+        so far. Details are fetched concurrently, and only for articles that are new or
+        changed and arrived without them.
+
+        :param created_after: earliest creation date to sync (optional, defaults to date set by `analyzer.set_date_range()`)
+        :param concurrency: number of concurrent detail queries (optional, defaults to `analyzer.set_concurrency()` value)
+        :return: number of articles added or updated
+        """
+        if created_after is None:
+            created_after = get_config('start_date')
+        created_after = self._normalize_date(created_after)
+        with self._lock:
+            with self._connect() as db:
+                watermark = self._get_meta(db, 'watermark')
+                floor = self._get_meta(db, 'floor')
+                fingerprints = dict(db.execute('SELECT guid, fingerprint FROM articles'))
+            start = created_after
+            if floor is not None and floor <= created_after and watermark:
+                overlap = datetime.fromisoformat(watermark) - timedelta(days=self.SYNC_OVERLAP_DAYS)
+                start = max(created_after, overlap.strftime('%Y-%m-%d %H:%M:%S'))
+            response = get_api('Articles').get_articles(createdAfter=start)
+            changed = [ article for article in response.get('articles') or []
+                        if fingerprints.get(article.get('guid')) != self._fingerprint(article) ]
+            needs_details = [ article for article in changed
+                              if article.get('summary') is None and article.get('publishedDate') is None ]
+            details = dict(zip(
+                [ article['guid'] for article in needs_details ],
+                run_concurrently(self._get_details, [ a['guid'] for a in needs_details ], concurrency)
+            ))
+            rows = []
+            retry_from = None
+            for article in changed:
+                full = dict(article)
+                created = self._normalize_date(article.get('createdDate') or article.get('publishedDate'))
+                if article['guid'] in details:
+                    if details[article['guid']] is None:
+                        retry_from = created if retry_from is None else min(retry_from, created)
+                        continue
+                    full.update(details[article['guid']])
+                rows.append((article['guid'], created, self._fingerprint(article), json.dumps(full)))
+            with self._connect() as db:
+                db.executemany('INSERT OR REPLACE INTO articles (guid, created, fingerprint, data) '
+                               'VALUES (?, ?, ?, ?)', rows)
+                newest = db.execute('SELECT MAX(created) FROM articles').fetchone()[0]
+                if retry_from is not None and newest:
+                    newest = min(newest, retry_from) # keep failed articles inside the next sync window
+                if newest:
+                    self._set_meta(db, 'watermark', newest)
+                if floor is None or created_after < floor:
+                    self._set_meta(db, 'floor', created_after)
+            if getattr(self, '_index', None) is not None:
+                self._index.update(Article(json.loads(data)) for (_, _, _, data) in rows)
+        return len(rows)
+
+    def _get_details(self, guid):
+        """Fetch article details, returning None if the query fails so a later sync can retry."""
+        try:
+            return get_api('Articles').get_details(guid)
+        except AnalyzerAPIError:
+            return None
+
+    def load(self, created_after=None, query=None):
+        """Load articles from the store without querying the API.
+
+        :param created_after: only return articles created after this date (optional, defaults to date set by `analyzer.set_date_range()`)
+        :rtype: list of :class:`passivetotal.analyzer.articles.Article`
+        """
+        if created_after is None:
+            created_after = get_config('start_date')
+        with self._connect() as db:
+            rows = db.execute('SELECT data FROM articles WHERE created >= ? ORDER BY created DESC',
+                              (self._normalize_date(created_after),)).fetchall()
+        return [ Article(json.loads(data), query) for (data,) in rows ]
     
 
 
@@ -133,7 +410,10 @@ class Article(Record, ForPandas):
     
     def _api_get_details(self):
         """Query the articles detail endpoint to fill in missing fields."""
-        response = get_api('Articles').get_details(self._guid)
+        self._set_details(get_api('Articles').get_details(self._guid))
+
+    def _set_details(self, response):
+        """Fill in fields from an article details API response."""
         self._summary = response.get('summary')
         self._publishdate = response.get('publishedDate')
         self._createdate = response.get('createdDate')
@@ -151,8 +431,12 @@ class Article(Record, ForPandas):
 
         Some API responses do not include full article details. This internal method
         will determine if they are missing and trigger an API call to fetch them."""
-        if self._summary is None and self._publishdate is None:
+        if self._needs_details():
             self._api_get_details()
+
+    def _needs_details(self):
+        """Whether this article is missing the fields returned by the details endpoint."""
+        return self._summary is None and self._publishdate is None
     
     def _indicators_by_type(self, type):
         """Get indicators of a specific type. 
@@ -1,7 +1,5 @@
 """Hostname analyzer for the RiskIQ PassiveTotal API."""
 
-import socket
-import tldextract
 from passivetotal.analyzer import get_api, get_object
 from passivetotal.analyzer._common import is_ip, refang, AnalyzerError
 from passivetotal.analyzer.pdns import HasResolutions
@@ -40,6 +38,11 @@ class Hostname(HasComponents, HasCookies, HasTrackers, HasHostpairs,
         hostname = refang(hostname)
         if is_ip(hostname):
             raise AnalyzerError('Use analyzer.IPAddress for IPv4 addresses.')
+        return cls._get_instance(hostname)
+
+    @classmethod
+    def _get_instance(cls, hostname):
+        """Find or create the instance for a hostname that is already refanged and validated."""
         self = cls._instances.get(hostname)
         if self is None:
             self = cls._instances[hostname] = object.__new__(Hostname)
@@ -104,17 +107,22 @@ class Hostname(HasComponents, HasCookies, HasTrackers, HasHostpairs,
         return self._whois_history
     
     def _query_dns(self):
-        """Perform a DNS lookup."""
-        try:
-            ip = socket.gethostbyname(self._hostname)
-        except Exception:
-            raise AnalyzerError('Cannot resolve IP for hostname {}'.format(self._hostname))
-        self._current_ip = get_object(ip,'IPAddress')
-        return self._current_ip
+        """Perform a DNS lookup for IPv4 addresses with the shared resolver.
+
+        Answers are cached by the resolver for the TTL set with `analyzer.set_resolver()`.
+        """
+        from passivetotal.analyzer.resolver import Resolver
+        addresses = Resolver.shared().resolve(self._hostname, 'A')
+        return get_object(addresses[0],'IPAddress')
     
     def _extract(self):
-        """Use the tldextract library to extract parts out of the hostname."""
-        self._tldextract = tldextract.extract(self._hostname)
+        """Use the tldextract library to extract parts out of the hostname.
+
+        Goes through the shared, bounded cache in :mod:`passivetotal.analyzer.suffixes`,
+        which never fetches the suffix list over the network.
+        """
+        from passivetotal.analyzer.suffixes import extract
+        self._tldextract = extract(self._hostname)
         return self._tldextract
     
     @property
@@ -170,12 +178,11 @@ class Hostname(HasComponents, HasCookies, HasTrackers, HasHostpairs,
     def ip(self):
         """Hostname's current IP address.
         
-        Performs an local on-demand DNS query if needed.
+        Performs a local on-demand DNS query unless the address is in the resolver cache.
+        Use `analyzer.resolve_many()` to resolve many hostnames concurrently.
 
         :rtype: :class:`passivetotal.analyzer.IPAddress`
         """
-        if getattr(self, '_current_ip', None) is not None:
-            return self._current_ip
         return self._query_dns()
     
     @property
@@ -10,6 +10,7 @@ from .reputation import ReputationScore, HasReputation
 from .cti import IntelProfile, IntelProfiles, HasIntelProfiles
 from .asi import AttackSurface, AttackSurfaces
 from .vuln import AttackSurfaceCVEs, AttackSurfaceComponents, VulnArticle
+from .snapshot import AttackSurfaceSnapshot
 
 
  
\ No newline at end of file
@@ -6,12 +6,13 @@ from urllib.parse import parse_qsl
 from passivetotal.analyzer import get_api, get_object
 from passivetotal.analyzer._common import (
     Record, RecordList, PagedRecordList, FirstLastSeen,
-    ForPandas, AnalyzerError
+    ForPandas, AnalyzerError, RateLimiter, run_concurrently
 )
 
 
 
 INDICATOR_PAGE_SIZE = 400
+PORTFOLIO_QUERIES = ['summary', 'priority', 'cves']
 
 
 
@@ -74,6 +75,79 @@ class AttackSurfaces(RecordList, PagedRecordList, ForPandas):
         attack_surfaces.load_all_pages()
         return attack_surfaces
 
+    def load_details(self, observations=True, vulns=True, cve_observations=False,
+                     concurrency=None, progress=None, pagesize=INDICATOR_PAGE_SIZE):
+        """Load insights, observations, CVEs and components for every attack surface in this list.
+
+        Queries for all attack surfaces share one concurrency limit. See
+        :meth:`AttackSurface.load_details` for the parameters.
+
+        :return: this list, to allow chaining
+        """
+        load_attack_surface_details(self._records, observations, vulns, cve_observations,
+                                    concurrency, progress, pagesize)
+        return self
+
+    def portfolio(self, queries=PORTFOLIO_QUERIES, concurrency=None, rate_limit=None):
+        """Run per-vendor queries across every attack surface in this list and consolidate
+        the results in one DataFrame, with one row per attack surface.
+
+        Queries run concurrently. A query that fails for one vendor does not stop the
+        others; its error is reported in the `errors` column and its columns are left empty.
+
+        Available queries and the columns they add:
+
+        * `summary`: `high_observations`, `medium_observations`, `low_observations`
+        * `priority`: `{level}_active_insights`, `{level}_total_insights` and `{level}_total_observations` for each level
+        * `cves`: `cve_count`, `cve_observations`, `cve_max_score`
+
+        :param queries: List of queries to run (optional, defaults to all)
+        :param concurrency: Number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+        :param rate_limit: Maximum number of API requests started per second, counting each page of paged results (optional)
+        :rtype: :class:`pandas.DataFrame`
+        """
+        pd = self._get_pandas()
+        unknown = set(queries) - set(PORTFOLIO_QUERIES)
+        if unknown:
+            raise AnalyzerError('Unknown portfolio queries: {}'.format(', '.join(sorted(unknown))))
+        limiter = RateLimiter(rate_limit) if rate_limit else None
+        tasks = []
+        for attack_surface in self._records:
+            if 'summary' in queries:
+                tasks.append((attack_surface, 'summary', None))
+            if 'priority' in queries:
+                tasks.extend([ (attack_surface, 'priority', level) for level in AttackSurface._LEVELS ])
+            if 'cves' in queries:
+                tasks.append((attack_surface, 'cves', None))
+
+        def run(task):
+            attack_surface, query, level = task
+            try:
+                return attack_surface._portfolio_columns(query, level, limiter)
+            except Exception as e:
+                return e
+
+        columns = ['asi_id', 'name']
+        if 'summary' in queries:
+            columns.extend([ '{}_observations'.format(level) for level in AttackSurface._LEVELS ])
+        if 'priority' in queries:
+            for level in AttackSurface._LEVELS:
+                columns.extend([ '{}_{}'.format(level, field)
+                                 for field in ['active_insights', 'total_insights', 'total_observations'] ])
+        if 'cves' in queries:
+            columns.extend(['cve_count', 'cve_observations', 'cve_max_score'])
+        columns.append('errors')
+        rows = { id(attack_surface): {'asi_id': attack_surface.id, 'name': attack_surface.name, 'errors': None}
+                 for attack_surface in self._records }
+        for (attack_surface, query, level), result in zip(tasks, run_concurrently(run, tasks, concurrency)):
+            row = rows[id(attack_surface)]
+            if isinstance(result, Exception):
+                error = '{}: {}'.format(query if level is None else '{} {}'.format(query, level), result)
+                row['errors'] = error if row['errors'] is None else '{}; {}'.format(row['errors'], error)
+            else:
+                row.update(result)
+        return pd.DataFrame.from_records(list(rows.values()), columns=columns)
+
 
 
 class AttackSurface(Record, ForPandas):
@@ -154,18 +228,96 @@ class AttackSurface(Record, ForPandas):
             raise AnalyzerError('More than one attack surface was found - try a more specific name')
         return filtered_asi[0]
 
-    def get_insights(self, level):
+    def get_insights(self, level, reload=False):
         """Get insights at a level (high, medium or low).
         
         :param level: Priority level (high, medium, or low).
+        :param reload: Whether to query the API even if insights were already loaded (optional, defaults to False)
         :returns: :class:`AttackSurfaceInsights`
         """
         self._ensure_valid_level(level)
-        if self._insights[level] is not None:
+        if self._insights[level] is not None and not reload:
             return self._insights[level]
         self._insights[level] = AttackSurfaceInsights.load(self, level)
         return self._insights[level]
     
+    def load_details(self, observations=True, vulns=True, cve_observations=False,
+                     concurrency=None, progress=None, pagesize=INDICATOR_PAGE_SIZE):
+        """Load insights at every level, their observations, CVEs and components concurrently.
+
+        Always queries the API, replacing previously loaded values of the
+        `all_insights`, `cves` and `components` properties.
+
+        :param observations: Whether to load observations for insights that have them (optional, defaults to True)
+        :param vulns: Whether to load CVEs and vulnerable components (optional, defaults to True)
+        :param cve_observations: Whether to load observations for each CVE (optional, defaults to False)
+        :param concurrency: Number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+        :param progress: Callable that accepts a stage name, completed count and total, called as each query completes (optional)
+        :param pagesize: Size of pages to retrieve from the API (optional)
+        :return: this attack surface, to allow chaining
+        """
+        load_attack_surface_details([self], observations, vulns, cve_observations,
+                                    concurrency, progress, pagesize)
+        return self
+
+    def snapshot(self, observations=True, vulns=True, cve_observations=True, concurrency=None, progress=None):
+        """Load the current state of this attack surface and capture it in a compact snapshot.
+
+        Compare with an earlier snapshot to find new, resolved and changed insights,
+        assets, CVEs and components:
+
+        >>> previous = AttackSurfaceSnapshot.load('asi.snapshot')
+        >>> current = attack_surface.snapshot()
+        >>> changes = current.diff(previous)
+        >>> current.save('asi.snapshot')
+
+        Parameters are passed to `load_details`.
+
+        :rtype: :class:`passivetotal.analyzer.illuminate.snapshot.AttackSurfaceSnapshot`
+        """
+        from passivetotal.analyzer.illuminate.snapshot import AttackSurfaceSnapshot
+        self.load_details(observations, vulns, cve_observations, concurrency, progress)
+        snapshot = AttackSurfaceSnapshot(self.id)
+        for level in self._LEVELS:
+            snapshot.add_insights(self._insights[level])
+        if vulns:
+            snapshot.add_cves(self._cves)
+            snapshot.add_components(self._components)
+        return snapshot
+
+    def _portfolio_columns(self, query, level=None, limiter=None):
+        """Run one portfolio query and return its columns as a dictionary.
+
+        When a :class:`RateLimiter` is passed, it is waited on before every API request,
+        including each page of CVEs.
+        """
+        wait = limiter.wait if limiter is not None else lambda: None
+        if query == 'summary':
+            wait()
+            response = get_api('Illuminate').get_asi_3p_vendor_summary(self.id)
+            response['own'] = False
+            self._parse(response)
+            return { '{}_observations'.format(l): self.get_observation_count(l) for l in self._LEVELS }
+        if query == 'priority':
+            wait()
+            insights = self.get_insights(level, reload=True)
+            return {
+                '{}_active_insights'.format(level): insights.active_insight_count,
+                '{}_total_insights'.format(level): insights.total_insight_count,
+                '{}_total_observations'.format(level): insights.total_observations,
+            }
+        from passivetotal.analyzer.illuminate import AttackSurfaceCVEs
+        cves = AttackSurfaceCVEs(self, INDICATOR_PAGE_SIZE)
+        while cves.has_more_records:
+            wait()
+            cves.load_next_page()
+        self._cves = cves
+        return {
+            'cve_count': len(cves),
+            'cve_observations': sum(cve.observation_count or 0 for cve in cves),
+            'cve_max_score': max([ cve.score for cve in cves if cve.score is not None ], default=None),
+        }
+
     def get_observation_count(self, level):
         """Get number of insights with impacted assets (observations) at a given level.
         
@@ -316,6 +468,42 @@ class AttackSurface(Record, ForPandas):
         return self.get_components()
 
 
+def load_attack_surface_details(attack_surfaces, observations=True, vulns=True, cve_observations=False,
+                                concurrency=None, progress=None, pagesize=INDICATOR_PAGE_SIZE):
+    """Load insights, observations, CVEs and components for many attack surfaces.
+
+    Runs in two stages on a thread pool capped at `concurrency` queries: first the
+    insight lists for every level plus the CVE and component lists, then the
+    observations for every insight (and optionally every CVE) that has any.
+
+    :param attack_surfaces: Iterable of :class:`AttackSurface` objects
+    :param progress: Callable that accepts a stage name ('lists' or 'observations'), completed count and total (optional)
+    """
+    from passivetotal.analyzer.illuminate import AttackSurfaceCVEs
+    def report(stage):
+        if progress is None:
+            return None
+        return partial(progress, stage)
+
+    tasks = []
+    for attack_surface in attack_surfaces:
+        tasks.extend([ partial(attack_surface.get_insights, level, reload=True) for level in AttackSurface._LEVELS ])
+        if vulns:
+            tasks.append(partial(attack_surface.get_cves, pagesize))
+            tasks.append(partial(attack_surface.get_components, pagesize))
+    results = run_concurrently(lambda task: task(), tasks, concurrency, report('lists'))
+    tasks = []
+    for result in results:
+        if observations and isinstance(result, AttackSurfaceInsights):
+            tasks.extend([ partial(insight.get_observations, pagesize)
+                           for insight in result if insight.has_observations ])
+        if cve_observations and isinstance(result, AttackSurfaceCVEs):
+            tasks.extend([ partial(cve.get_observations, pagesize)
+                           for cve in result if cve.observation_count ])
+    run_concurrently(lambda task: task(), tasks, concurrency, report('observations'))
+
+
+
 class AttackSurfaceInsights(RecordList, ForPandas):
 
     """Collection of insights associated with an attack surface in a list-like object
@@ -481,7 +669,7 @@ class AttackSurfaceInsight(Record, ForPandas):
         :param pagesize: Size of pages to retrieve from the API.
         :rtype: :class:`AttackSurfaceObservations`
         """
-        self._observations = AttackSurfaceObservations(self, self._group_by, self._segment_by)
+        self._observations = AttackSurfaceObservations(self, self._group_by, self._segment_by, pagesize)
         self._observations.load_all_pages()
         return self._observations
 
@@ -1,16 +1,22 @@
 from collections import namedtuple
 from functools import lru_cache, partial
+import hashlib
+import json
+import re
+import threading
+import time
 
 
-from passivetotal.analyzer import get_api
+from passivetotal.analyzer import get_api, get_config
 from passivetotal.analyzer._common import (
     Record, RecordList, PagedRecordList, FirstLastSeen,
-    ForPandas, AnalyzerError, AnalyzerAPIError
+    ForPandas, AnalyzerError, AnalyzerAPIError, is_ip, run_concurrently
 )
 
 
 
 INDICATOR_PAGE_SIZE = 400
+INDICATOR_CACHE_MAX_AGE = 86400
 
 
 
@@ -49,11 +55,23 @@ class IntelProfiles(RecordList, ForPandas):
     def find_by_indicator(query, **kwargs):
         """Search profiles by indicator.
 
+        When the indicator cache is enabled with `analyzer.set_intel_profile_cache()`,
+        lookups are answered locally and the API is only queried for indicator
+        types the cache does not hold.
+
         :param query: Indicator value as a string
         :param types: Types of indicators (optional)
         :param categories: Categories of indicators (optional)
         :param sources: Sources of indicators [riskiq, osint] (optional)
         """
+        cache = get_config('intel_profile_cache')
+        if cache is not None:
+            profile_ids = cache.lookup(query, **kwargs)
+            if profile_ids is not None:
+                profiles = IntelProfiles()
+                profiles._totalrecords = len(profile_ids)
+                profiles._records = [ IntelProfile(id=profile_id) for profile_id in profile_ids ]
+                return profiles
         try:
             response = get_api('Illuminate').get_intel_profiles_for_indicator(query, **kwargs)
         except AnalyzerAPIError as e:
@@ -410,6 +428,156 @@ class IntelProfileIndicator(Record, FirstLastSeen, ForPandas):
 
 
 
+class IntelProfileIndicatorCache:
+
+    """Local membership cache of every indicator in every RiskIQ Intel Profile.
+
+    Syncs all profile indicators into an in-memory hash table keyed by indicator
+    value, so `IntelProfiles.find_by_indicator` can answer lookups - including the
+    common "no profile" answer - without an API query. Explicit syncs are incremental:
+    only profiles that are new or whose profile record changed are reloaded. A profile
+    record does not change when one indicator is swapped for another, so lookups
+    reload every profile once the last full sync is older than `max_age`.
+    """
+
+    def __init__(self, max_age=INDICATOR_CACHE_MAX_AGE):
+        """Initialize the cache.
+
+        :param max_age: Seconds before a lookup triggers a full refresh (optional, defaults to one day)
+        """
+        self.max_age = max_age
+        self._synced = None
+        self._full_synced = None
+        self._digests = {}
+        self._profile_values = {}
+        self._values = {}
+        self._sources = {}
+        self._types = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, value):
+        self._ensure_fresh()
+        return value.casefold() in self._values
+
+    def __repr__(self):
+        return '<IntelProfileIndicatorCache {} indicators, {} profiles>'.format(len(self), len(self._digests))
+
+    @property
+    def types(self):
+        """Indicator types held in the cache."""
+        return self._types
+
+    @property
+    def synced(self):
+        """Time of the last sync in seconds since the epoch, or None if never synced."""
+        return self._synced
+
+    @staticmethod
+    def detect_type(value):
+        """Guess the intel profile indicator type of a value, or None if unknown."""
+        if is_ip(value):
+            return 'ip'
+        if '://' in value:
+            return 'url'
+        if '@' in value:
+            return 'email'
+        if re.fullmatch(r'[0-9a-fA-F]+', value):
+            return {32: 'hash_md5', 40: 'hash_sha1', 64: 'hash_sha256'}.get(len(value))
+        if re.fullmatch(r'[\w\-]+(\.[\w\-]+)+\.?', value):
+            return 'domain'
+        return None
+
+    def _load_indicators(self, profile_id):
+        iocs = IntelProfileIndicatorList(profile_id=profile_id)
+        iocs.load_all_pages()
+        return iocs
+
+    @staticmethod
+    def _digest(result):
+        return hashlib.sha1(json.dumps(result, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _remove_profile(values, profile_values, profile_id):
+        for value in profile_values.pop(profile_id, set()):
+            entries = tuple(e for e in values[value] if e[0] != profile_id)
+            if entries:
+                values[value] = entries
+            else:
+                del values[value]
+
+    def sync(self, concurrency=None, full=False):
+        """Sync the cache with the Intel Profiles API.
+
+        Reloads the profile list, then fetches indicators concurrently for every profile
+        (`full`), or only for profiles that are new or whose profile record changed, and
+        drops profiles that no longer exist. The new index is built separately and
+        swapped in, so lookups during a sync see either the old or the new contents.
+
+        :param concurrency: number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+        :param full: Whether to reload every profile (optional, defaults to False)
+        :return: number of profiles reloaded
+        """
+        with self._lock:
+            digests = {}
+            for result in get_api('Illuminate').get_intel_profiles().get('results', []):
+                IntelProfile(result.get('id'))._parse(result)
+                digests[result.get('id')] = self._digest(result)
+            changed = [ profile_id for profile_id, digest in digests.items()
+                        if full or self._digests.get(profile_id) != digest ]
+            loaded = run_concurrently(self._load_indicators, changed, concurrency)
+            if full:
+                values, profile_values, types = {}, {}, set()
+            else:
+                values, types = dict(self._values), set(self._types)
+                profile_values = dict(self._profile_values)
+                for profile_id in (set(self._digests) - set(digests)) | set(changed):
+                    self._remove_profile(values, profile_values, profile_id)
+            for profile_id, iocs in zip(changed, loaded):
+                keys = profile_values[profile_id] = set()
+                for ioc in iocs:
+                    key = (ioc.value or '').casefold()
+                    entry = (profile_id, ioc.type, ioc.category, ioc.is_osint)
+                    entry = self._sources.setdefault(entry, entry)
+                    if entry not in values.get(key, ()):
+                        values[key] = values.get(key, ()) + (entry,)
+                    keys.add(key)
+                    types.add(ioc.type)
+            self._values, self._profile_values, self._types, self._digests = values, profile_values, types, digests
+            self._synced = time.time()
+            if full:
+                self._full_synced = self._synced
+        return len(changed)
+
+    def _ensure_fresh(self):
+        if self._full_synced is None or time.time() - self._full_synced > self.max_age:
+            self.sync(full=True)
+
+    def lookup(self, query, types=None, categories=None, sources=None):
+        """Find the profiles that list an indicator.
+
+        :param query: Indicator value as a string
+        :param types: Types of indicators (optional)
+        :param categories: Categories of indicators (optional)
+        :param sources: Sources of indicators [riskiq, osint] (optional)
+        :return: Sorted list of profile ids, or None if the cache cannot answer for this indicator type
+        """
+        self._ensure_fresh()
+        types, categories, sources = [ v.split(',') if isinstance(v, str) else v
+                                       for v in (types, categories, sources) ]
+        values, known_types = self._values, self._types
+        wanted = types or [self.detect_type(query)]
+        if not set(wanted) & known_types:
+            return None
+        return sorted({ profile_id for profile_id, type, category, osint in values.get(query.casefold(), ())
+                        if (types is None or type in types)
+                        and (categories is None or category in categories)
+                        and (sources is None or ('osint' if osint else 'riskiq') in sources) })
+
+
+
 class HasIntelProfiles:
     
     """An object that may be listed in threat intel profiles."""
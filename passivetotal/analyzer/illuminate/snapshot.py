@@ -0,0 +1,184 @@
+"""Compact, content-hashed snapshots of attack surface and vulnerability state."""
+
+from collections import namedtuple
+from datetime import datetime, timezone
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+from passivetotal.analyzer._common import AnalyzerError, run_concurrently
+
+
+
+SNAPSHOT_VERSION = 1
+KEY_SEPARATOR = '\t'
+
+SnapshotDiff = namedtuple('SnapshotDiff', ['added', 'removed', 'changed'])
+
+
+
+def _digest(*values):
+    """Short stable hash of record content."""
+    data = json.dumps(values, default=str, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+def _key(*parts):
+    return KEY_SEPARATOR.join(str(part) for part in parts)
+
+
+
+class AttackSurfaceSnapshot:
+
+    """State of an attack surface at a point in time.
+
+    Each insight, observation (asset), CVE, CVE observation and vulnerable component
+    is stored as a key that identifies it and a short hash of the content that may
+    change, such as observation counts, scores and severities. Snapshots can be
+    saved to disk and compared with `diff` to find only what changed.
+
+    Keys are tuples that start with the record kind:
+
+    * ('insight', level, insight_id)
+    * ('observation', insight_id, asset_type, asset_name)
+    * ('cve', cve_id)
+    * ('cve_observation', cve_id, asset_type, asset_name)
+    * ('component', component_type, component_name)
+    """
+
+    def __init__(self, attack_surface_id=None, entries=None, taken=None):
+        """Initialize a snapshot.
+
+        :param attack_surface_id: Identifier of the attack surface
+        :param entries: Dictionary of record keys to content hashes (optional)
+        :param taken: ISO-format UTC timestamp (optional, defaults to now)
+        """
+        self.attack_surface_id = attack_surface_id
+        self.taken = taken or datetime.now(timezone.utc).isoformat()
+        self._entries = entries if entries is not None else {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return _key(*key) in self._entries
+
+    def __iter__(self):
+        for key in self._entries:
+            yield tuple(key.split(KEY_SEPARATOR))
+
+    def __repr__(self):
+        return '<AttackSurfaceSnapshot #{0} {1} records at {2}>'.format(
+            self.attack_surface_id, len(self), self.taken)
+
+    def add(self, kind, *parts, content=()):
+        """Record one item in the snapshot.
+
+        :param kind: Record kind, such as 'insight' or 'cve'
+        :param parts: Values that identify the record
+        :param content: Tuple of values whose changes should be reported
+        """
+        self._entries[_key(kind, *parts)] = _digest(*content)
+
+    def add_insights(self, insights):
+        """Record a list of :class:`passivetotal.analyzer.illuminate.asi.AttackSurfaceInsight` objects
+        and any observations already loaded for them."""
+        for insight in insights:
+            self.add('insight', insight.level, insight.id,
+                     content=(insight.name, insight.description, insight.observation_count))
+            for obs in getattr(insight, '_observations', None) or []:
+                self.add('observation', insight.id, obs.type, obs.name, content=(obs._firstseen,))
+
+    def add_cves(self, cves):
+        """Record a list of :class:`passivetotal.analyzer.illuminate.vuln.AttackSurfaceCVE` objects
+        and any observations already loaded for them."""
+        for cve in cves:
+            self.add('cve', cve.id, content=(cve.score, cve.observation_count))
+            for obs in getattr(cve, '_observations', None) or []:
+                self.add('cve_observation', cve.id, obs.type, obs.name, content=(obs._firstseen,))
+
+    def add_components(self, components):
+        """Record a list of :class:`passivetotal.analyzer.illuminate.vuln.AttackSurfaceComponent` objects."""
+        for component in components:
+            self.add('component', component.type, component.name,
+                     content=(component.severity, component.count))
+
+    def diff(self, previous):
+        """Compare this snapshot with an earlier one.
+
+        :param previous: Earlier :class:`AttackSurfaceSnapshot`, or None to treat every record as new
+        :return: :class:`SnapshotDiff` with sorted lists of added, removed and changed record keys
+        """
+        old = previous._entries if previous is not None else {}
+        added, changed = [], []
+        for key, digest in self._entries.items():
+            before = old.get(key)
+            if before is None:
+                added.append(key)
+            elif before != digest:
+                changed.append(key)
+        removed = [ key for key in old if key not in self._entries ]
+        split = lambda keys: [ tuple(key.split(KEY_SEPARATOR)) for key in sorted(keys) ]
+        return SnapshotDiff(split(added), split(removed), split(changed))
+
+    def save(self, path):
+        """Write the snapshot to a gzip-compressed JSON file.
+
+        The file is replaced atomically, so a reader never sees a partial snapshot.
+
+        :param path: Path to the snapshot file
+        """
+        path = os.path.expanduser(path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handle, temp = tempfile.mkstemp(dir=directory or None, prefix='.snapshot.')
+        try:
+            with os.fdopen(handle, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as stream:
+                stream.write(json.dumps({
+                    'version': SNAPSHOT_VERSION,
+                    'attack_surface': self.attack_surface_id,
+                    'taken': self.taken,
+                    'entries': self._entries,
+                }, separators=(',', ':')).encode('utf-8'))
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+    @staticmethod
+    def load(path):
+        """Read a snapshot written by `save`.
+
+        Returns None if the file does not exist, so a first run can diff against nothing.
+
+        :param path: Path to the snapshot file
+        :rtype: :class:`AttackSurfaceSnapshot`
+        """
+        path = os.path.expanduser(path)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rb') as stream:
+            data = json.loads(stream.read())
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise AnalyzerError('Unsupported snapshot version {}'.format(data.get('version')))
+        return AttackSurfaceSnapshot(data.get('attack_surface'), data.get('entries'), data.get('taken'))
+
+
+
+def snapshot_cves(cves, observations=True, concurrency=None):
+    """Build a snapshot of a list of CVEs, loading their observations concurrently.
+
+    :param cves: :class:`passivetotal.analyzer.illuminate.vuln.AttackSurfaceCVEs`
+    :param observations: Whether to include observations for each CVE (optional, defaults to True)
+    :param concurrency: Number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+    :rtype: :class:`AttackSurfaceSnapshot`
+    """
+    if observations:
+        run_concurrently(lambda cve: cve.get_observations(),
+                         [ cve for cve in cves if cve.observation_count ], concurrency)
+    attack_surface = cves.attack_surface
+    snapshot = AttackSurfaceSnapshot(attack_surface.id if attack_surface is not None else None)
+    snapshot.add_cves(cves)
+    return snapshot
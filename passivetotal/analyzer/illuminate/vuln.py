@@ -43,6 +43,18 @@ class AttackSurfaceCVEs(RecordList, PagedRecordList, ForPandas):
         for result in api_response.get('cves',[]):
             self._records.append(AttackSurfaceCVE(self._attack_surface, result))
     
+    def snapshot(self, observations=True, concurrency=None):
+        """Capture the CVEs in this list, and optionally their observations, in a compact snapshot.
+
+        Observations are loaded concurrently. Compare with an earlier snapshot using `diff`.
+
+        :param observations: Whether to include observations for each CVE (optional, defaults to True)
+        :param concurrency: Number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+        :rtype: :class:`passivetotal.analyzer.illuminate.snapshot.AttackSurfaceSnapshot`
+        """
+        from passivetotal.analyzer.illuminate.snapshot import snapshot_cves
+        return snapshot_cves(self, observations, concurrency)
+
     @property
     def attack_surface(self):
         """Get the Illuminate Attack Surface associated with this list of CVEs.
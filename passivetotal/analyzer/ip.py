@@ -39,6 +39,11 @@ class IPAddress(HasComponents, HasCookies, HasHostpairs, HasTrackers,
         ip = refang(ip)
         if not is_ip(ip):
             raise AnalyzerError('Invalid IP address')
+        return cls._get_instance(ip)
+
+    @classmethod
+    def _get_instance(cls, ip):
+        """Find or create the instance for an IP that is already refanged and validated."""
         self = cls._instances.get(ip)
         if self is None:
             self = cls._instances[ip] = object.__new__(IPAddress)
@@ -0,0 +1,383 @@
+"""Offline indicator of compromise (IOC) matching for the RiskIQ PassiveTotal API."""
+
+from bisect import bisect_left
+from collections import namedtuple
+from hashlib import blake2b as _blake2b
+import json
+import mmap
+import re
+import struct
+import sys
+from passivetotal.analyzer._common import refang, AnalyzerError
+
+
+
+DOMAIN_TYPES = ['domain', 'hostname']
+DEFAULT_TOKEN_PATTERN = r'[A-Za-z0-9][A-Za-z0-9._:/@-]*'
+BLOOM_BITS_PER_KEY = 10
+_MAGIC = b'PTIOC001'
+_HEADER = struct.Struct('<8sQQQQ')
+_CHILDREN = 0x80000000
+
+IndicatorSource = namedtuple('IndicatorSource', ['kind', 'id', 'type'])
+IndicatorMatch = namedtuple('IndicatorMatch', ['value', 'indicator', 'sources'])
+
+
+
+def _host_part(token):
+    """Return the host of a URL, host:port or ip:port token, or None if it has no other host part."""
+    if '://' in token:
+        host = token.split('://', 1)[1]
+    elif ':' in token or '/' in token:
+        host = token
+    else:
+        return None
+    host = host.split('/', 1)[0].rsplit('@', 1)[-1]
+    if host.count(':') == 1: # leave IPv6 addresses whole
+        host = host.split(':', 1)[0]
+    return host if host and host != token else None
+
+def _with_hosts(tokens):
+    """Yield each token, followed by its host part when it has one."""
+    for token in tokens:
+        yield token
+        host = _host_part(token)
+        if host is not None:
+            yield host
+
+
+
+class _BaseMatcher:
+
+    """Matching methods shared by in-memory and memory-mapped matchers.
+
+    Implementations provide `_lookup(value)`, which returns a tuple of the matched
+    indicator and a list of source indexes, or None, and a `_sources` list.
+    """
+
+    def match(self, values):
+        """Match an iterable of values (hostnames, IPs, hashes, URLs, etc.) against the indicators.
+
+        Hostnames match domain indicators exactly or as subdomains. Every other
+        value must match an indicator exactly. Matching is case-insensitive.
+
+        :param values: Iterable of strings, such as one field from each log line
+        :return: Generator of :class:`IndicatorMatch` tuples, one per matching value
+        """
+        lookup = self._lookup
+        sources = self._sources
+        for value in values:
+            hit = lookup(value.lower().rstrip('.'))
+            if hit is not None:
+                yield IndicatorMatch(value, hit[0], [ sources[i] for i in hit[1] ])
+
+    def match_lines(self, lines, pattern=DEFAULT_TOKEN_PATTERN):
+        """Split lines into tokens with a regular expression and match each token.
+
+        URL, `host:port` and `ip:port` tokens, as found in proxy and firewall logs, are
+        matched whole and by their host, so `http://www.evil.com/x` and `10.1.2.3:443`
+        match domain and IP indicators.
+
+        :param lines: Iterable of strings, such as an open log file
+        :param pattern: Regular expression that finds candidate tokens in a line (optional)
+        :return: Generator of (line, :class:`IndicatorMatch`) tuples
+        """
+        findall = re.compile(pattern).findall
+        for line in lines:
+            for match in self.match(_with_hosts(findall(line))):
+                yield line, match
+
+    def __contains__(self, value):
+        return self._lookup(value.lower().rstrip('.')) is not None
+
+
+
+class IndicatorMatcher(_BaseMatcher):
+
+    """Compiled set of indicators from threat intelligence articles and intel profiles.
+
+    Exact values (IPs, hashes, emails, URLs) are kept in a hash table. Domain indicators
+    are kept in a trie of reversed labels, so `evil.com` also matches `www.evil.com`.
+    Each match maps back to the articles and intel profiles that list the indicator.
+
+    Use :meth:`save` to write a compact file that :meth:`load` memory-maps, so many
+    worker processes can share one copy of a large indicator set.
+    """
+
+    def __init__(self):
+        self._sources = []
+        self._source_index = {}
+        self._exact = {}
+        self._trie = {}
+        self._domain_count = 0
+
+    def __len__(self):
+        return len(self._exact) + self._domain_count
+
+    def __repr__(self):
+        return '<IndicatorMatcher {} indicators from {} sources>'.format(len(self), len(self._sources))
+
+    def _source_id(self, kind, id, type):
+        source = IndicatorSource(kind, id, type)
+        index = self._source_index.get(source)
+        if index is None:
+            index = self._source_index[source] = len(self._sources)
+            self._sources.append(source)
+        return index
+
+    def add(self, value, type, kind, id):
+        """Add one indicator.
+
+        :param value: Indicator value
+        :param type: Indicator type, such as 'domain', 'ip' or 'hash_md5'
+        :param kind: Kind of source that lists the indicator, such as 'article' or 'profile'
+        :param id: Identifier of the source, such as an article GUID or profile ID
+        :return: This matcher, to allow chaining
+        """
+        if not value:
+            return self
+        value = refang(str(value)).strip().lower().rstrip('.')
+        source = self._source_id(kind, id, type)
+        if type in DOMAIN_TYPES:
+            node = self._trie
+            for label in reversed(value.split('.')):
+                node = node.setdefault(label, {})
+            if None not in node:
+                node[None] = []
+                self._domain_count += 1
+            if source not in node[None]:
+                node[None].append(source)
+        else:
+            sources = self._exact.setdefault(value, [])
+            if source not in sources:
+                sources.append(source)
+        return self
+
+    def add_articles(self, articles):
+        """Add the indicators listed in threat intelligence articles.
+
+        Article details are loaded if they are missing, concurrently when `articles`
+        is an :class:`passivetotal.analyzer.articles.ArticlesList`.
+
+        :param articles: Iterable of :class:`passivetotal.analyzer.articles.Article`
+        :return: This matcher, to allow chaining
+        """
+        if hasattr(articles, 'load_details'):
+            articles.load_details()
+        for article in articles:
+            for group in article.indicators or []:
+                for value in group.get('values', []):
+                    self.add(value, group.get('type'), 'article', article.guid)
+        return self
+
+    def add_article_indicators(self, api_response):
+        """Add indicators from an `ArticlesRequest.get_indicators` API response.
+
+        :param api_response: Response dictionary with an `indicators` list
+        :return: This matcher, to allow chaining
+        """
+        for indicator in api_response.get('indicators', []):
+            self.add(indicator.get('value'), indicator.get('type'), 'article', indicator.get('guid'))
+        return self
+
+    def add_intel_profile_indicators(self, indicators):
+        """Add indicators from an intel profile.
+
+        :param indicators: Iterable of :class:`passivetotal.analyzer.illuminate.cti.IntelProfileIndicator`,
+            such as :attr:`passivetotal.analyzer.illuminate.cti.IntelProfile.indicators`
+        :return: This matcher, to allow chaining
+        """
+        for indicator in indicators:
+            self.add(indicator.value, indicator.type, 'profile', indicator.profile_id)
+        return self
+
+    def _lookup(self, value):
+        sources = self._exact.get(value)
+        indicator = value if sources is not None else None
+        node = self._trie
+        labels = value.split('.')
+        for i in range(len(labels) - 1, -1, -1):
+            node = node.get(labels[i])
+            if node is None:
+                break
+            if None in node:
+                indicator = '.'.join(labels[i:])
+                sources = node[None] if sources is None else sources + node[None]
+        if sources is None:
+            return None
+        return indicator, sources
+
+    def _entries(self):
+        """Yield (key, source indexes, has children) for every exact value and domain trie node.
+
+        Trie nodes without an indicator of their own have None for source indexes;
+        they let a memory-mapped lookup stop as soon as no indicator can match.
+        """
+        for value, sources in self._exact.items():
+            yield 'x:' + value, sources, False
+        stack = [((), self._trie)]
+        while stack:
+            labels, node = stack.pop()
+            if labels:
+                children = len(node) > 1 or None not in node
+                yield 'd:' + '.'.join(reversed(labels)), node.get(None), children
+            for label, child in node.items():
+                if label is not None:
+                    stack.append((labels + (label,), child))
+
+    def save(self, path, bloom_bits_per_key=BLOOM_BITS_PER_KEY):
+        """Write the matcher to a file that can be memory-mapped with :meth:`load`.
+
+        Keys are stored as a sorted array of 64-bit hashes, with an optional Bloom
+        filter in front that lets most non-matching values skip the binary search.
+
+        :param path: Destination file path
+        :param bloom_bits_per_key: Bloom filter size, 0 to omit the filter (optional, defaults to 10)
+        """
+        entries = {}
+        for key, sources, children in self._entries():
+            entry = entries.setdefault(_hash(key), [set(), False])
+            entry[0].update(sources or []) # a 64-bit collision merges the entries
+            entry[1] = entry[1] or children
+        groups, group_index, pairs = [], {}, {}
+        for digest, (sources, children) in entries.items():
+            value = _CHILDREN if children else 0
+            if sources:
+                group = tuple(sorted(sources))
+                if group not in group_index:
+                    group_index[group] = len(groups)
+                    groups.append(list(group))
+                value |= group_index[group] + 1
+            pairs[digest] = value
+        keys = sorted(pairs)
+        bloom_bits = 0
+        bloom = b''
+        if bloom_bits_per_key and keys:
+            bloom_bits = max(64, (len(keys) * bloom_bits_per_key + 63) // 64 * 64)
+            bits = bytearray(bloom_bits // 8)
+            hashes = max(1, round(bloom_bits_per_key * 0.69))
+            for digest in keys:
+                for position in _bloom_positions(digest, hashes, bloom_bits):
+                    bits[position >> 3] |= 1 << (position & 7)
+            bloom = bytes(bits)
+        meta = json.dumps({
+            'sources': self._sources,
+            'groups': groups,
+            'bloom_hashes': max(1, round(bloom_bits_per_key * 0.69)) if bloom_bits else 0,
+            'indicators': len(self),
+        }).encode('utf-8')
+        values = struct.pack('<{}I'.format(len(keys)), *[ pairs[k] for k in keys ])
+        with open(path, 'wb') as stream:
+            stream.write(_HEADER.pack(_MAGIC, len(keys), bloom_bits, len(meta), len(values)))
+            stream.write(struct.pack('<{}Q'.format(len(keys)), *keys))
+            stream.write(values + b'\0' * (-len(values) % 8))
+            stream.write(bloom)
+            stream.write(meta)
+
+    @staticmethod
+    def load(path):
+        """Memory-map a matcher written by :meth:`save`.
+
+        :rtype: :class:`MappedIndicatorMatcher`
+        """
+        return MappedIndicatorMatcher(path)
+
+
+
+class MappedIndicatorMatcher(_BaseMatcher):
+
+    """Read-only indicator matcher backed by a memory-mapped file.
+
+    Pages are shared between processes that map the same file, so each worker
+    only pays for the small source table. Create with :meth:`IndicatorMatcher.load`.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as stream:
+            self._mmap = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, bloom_bits, meta_length, values_length = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or sys.byteorder != 'little':
+            self._mmap.close()
+            raise AnalyzerError('{} is not an indicator matcher file for this platform'.format(path))
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+        self._keys = view[offset:offset + count * 8].cast('Q')
+        offset += count * 8
+        self._values = view[offset:offset + values_length].cast('I')
+        offset += values_length + (-values_length % 8)
+        self._bloom = view[offset:offset + bloom_bits // 8]
+        self._bloom_bits = bloom_bits
+        offset += bloom_bits // 8
+        meta = json.loads(bytes(view[offset:offset + meta_length]))
+        self._sources = [ IndicatorSource(*source) for source in meta['sources'] ]
+        self._groups = meta['groups']
+        self._bloom_hashes = meta['bloom_hashes']
+        self._count = meta['indicators']
+
+    def __len__(self):
+        return self._count
+
+    def __repr__(self):
+        return '<MappedIndicatorMatcher {} indicators from {} sources>'.format(self._count, len(self._sources))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the memory map."""
+        for name in ['_keys', '_values', '_bloom']:
+            if getattr(self, name, None) is not None:
+                getattr(self, name).release()
+                setattr(self, name, None)
+        self._mmap.close()
+
+    def _find(self, key):
+        digest = int.from_bytes(_blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+        bits = self._bloom_bits
+        if bits:
+            bloom = self._bloom
+            h1 = digest & 0xffffffff
+            h2 = (digest >> 32) | 1
+            for i in range(self._bloom_hashes): # inlined _bloom_positions, exits on the first unset bit
+                position = (h1 + i * h2) % bits
+                if not bloom[position >> 3] & (1 << (position & 7)):
+                    return None
+        keys = self._keys
+        i = bisect_left(keys, digest)
+        if i < len(keys) and keys[i] == digest:
+            return self._values[i]
+        return None
+
+    def _lookup(self, value):
+        found = self._find('x:' + value)
+        sources = self._groups[(found & ~_CHILDREN) - 1] if found else None
+        indicator = value if sources is not None else None
+        labels = value.split('.')
+        for i in range(len(labels) - 1, -1, -1):
+            found = self._find('d:' + '.'.join(labels[i:]))
+            if found is None:
+                break
+            if found & ~_CHILDREN:
+                indicator = '.'.join(labels[i:])
+                group = self._groups[(found & ~_CHILDREN) - 1]
+                sources = group if sources is None else sources + group
+            if not found & _CHILDREN:
+                break
+        if sources is None:
+            return None
+        return indicator, sources
+
+
+
+def _hash(key):
+    """64-bit hash of a matcher key, stable across processes."""
+    return int.from_bytes(_blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def _bloom_positions(digest, hashes, bits):
+    """Bit positions for a key in a Bloom filter, derived from its 64-bit hash."""
+    h1 = digest & 0xffffffff
+    h2 = (digest >> 32) | 1
+    return [ (h1 + i * h2) % bits for i in range(hashes) ]
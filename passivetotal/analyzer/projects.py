@@ -1,12 +1,182 @@
-from collections import OrderedDict
-from datetime import datetime
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from functools import lru_cache, partial
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
 from passivetotal.analyzer import get_api, get_config, get_object
 from passivetotal.analyzer._common import (
-    RecordList, PagedRecordList, Record, AnalyzerError, ForPandas
+    RecordList, PagedRecordList, Record, AnalyzerError, ForPandas, run_concurrently
 )
 
 ALERT_PAGE_SIZE = 500
+ALERT_POLL_OVERLAP = 3600
+ARTIFACT_BULK_SIZE = 1000
+PROJECT_CATALOG_MAX_AGE = 300
+PROJECT_CATALOG_MISS_AGE = 30
+
+ArtifactChanges = namedtuple('ArtifactChanges', ['create', 'update', 'delete'])
+
+
+
+class ProjectCatalog:
+
+    """Local catalog of the projects visible to the API user.
+
+    Loads project lists once and indexes them by GUID and by name, so
+    `Project.find`, `ProjectList.find`, `analyzer.set_project` and `IsArtifact.projects`
+    can answer lookups without a query per call. Name lookups load only the projects
+    with the requested visibility, filtered by the API as `ProjectsRequest.find_projects`
+    does, and each visibility is loaded and aged separately. GUID lookups use the
+    unfiltered list, since the API ignores visibility for them.
+
+    A list reloads once it is older than `max_age` seconds; between reloads, unknown
+    GUIDs are fetched one at a time and merged in, and unknown names trigger a reload
+    only if the list is older than `miss_age` seconds.
+    """
+
+    def __init__(self, max_age=PROJECT_CATALOG_MAX_AGE, miss_age=PROJECT_CATALOG_MISS_AGE):
+        """Initialize the catalog.
+
+        :param max_age: Seconds before a lookup triggers a full reload (optional, defaults to five minutes)
+        :param miss_age: Minimum age in seconds before an unknown name triggers a reload (optional)
+        """
+        self.max_age = max_age
+        self.miss_age = miss_age
+        self._loaded = {}
+        self._by_guid = {}
+        self._by_name = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._by_guid)
+
+    def __contains__(self, guid):
+        return guid in self._by_guid
+
+    def __repr__(self):
+        return '<ProjectCatalog {} projects>'.format(len(self))
+
+    @staticmethod
+    def shared():
+        """Catalog shared by the analyzer, or None if disabled with `analyzer.set_project_catalog()`."""
+        catalog = get_config('project_catalog')
+        if catalog is True:
+            from passivetotal.analyzer import set_project_catalog
+            catalog = set_project_catalog()
+        return catalog
+
+    @property
+    def loaded(self):
+        """Time of the most recent load in seconds since the epoch, or None if never loaded."""
+        return max(self._loaded.values(), default=None)
+
+    def _age(self, visibility=None):
+        loaded = self._loaded.get(visibility)
+        return math.inf if loaded is None else time.time() - loaded
+
+    def _index(self, project):
+        self.discard(project['guid'])
+        self._by_guid[project['guid']] = project
+        for visibility, by_name in self._by_name.items():
+            if visibility is None or project.get('visibility') == visibility:
+                by_name.setdefault(project.get('name'), []).append(project)
+
+    def refresh(self, visibility=None):
+        """Reload the projects with a visibility from the API and rebuild their index.
+
+        :param visibility: Project visibility to load: public, private, or analyst (optional, defaults to every project)
+        """
+        params = {} if visibility is None else {'visibility': visibility}
+        response = get_api('Projects').get_projects(**params)
+        results = response.get('results', [response] if 'guid' in response else [])
+        with self._lock:
+            stale = { p['guid'] for named in self._by_name.get(visibility, {}).values() for p in named }
+            self._by_name[visibility] = {}
+            for project in results:
+                self._index(project)
+                stale.discard(project['guid'])
+            for guid in stale:
+                self.discard(guid)
+            self._loaded[visibility] = time.time()
+
+    def add(self, project):
+        """Add or replace one project, such as one just created, using its API response dict."""
+        with self._lock:
+            self._index(project)
+
+    def discard(self, guid):
+        """Remove a project from the catalog if it is present."""
+        with self._lock:
+            project = self._by_guid.pop(guid, None)
+            if project is None:
+                return
+            name = project.get('name')
+            for by_name in self._by_name.values():
+                named = [ p for p in by_name.get(name, []) if p['guid'] != guid ]
+                if named:
+                    by_name[name] = named
+                else:
+                    by_name.pop(name, None)
+
+    def _ensure_fresh(self, visibility=None):
+        with self._lock:
+            if self._age(visibility) > self.max_age:
+                self.refresh(visibility)
+
+    def get(self, guid):
+        """Find one project by GUID, fetching and merging it if it is not in the catalog.
+
+        :return: Project API response dict, or None if the project does not exist
+        """
+        self._ensure_fresh()
+        project = self._by_guid.get(guid)
+        if project is None:
+            found = get_api('Projects').find_projects(guid)
+            if found:
+                project = found[0]
+                self.add(project)
+        return project
+
+    def find(self, name_or_guid, visibility=None):
+        """Find projects by exact name or by GUID.
+
+        Visibility is ignored for GUID lookups, matching `ProjectsRequest.find_projects`.
+
+        :param name_or_guid: Project name or project guid
+        :param visibility: Project visiblity: public, private, or analyst (optional)
+        :return: List of project API response dicts
+        """
+        if get_api('Projects').is_guid(name_or_guid):
+            project = self.get(name_or_guid)
+            return [] if project is None else [project]
+        self._ensure_fresh(visibility)
+        with self._lock:
+            if name_or_guid not in self._by_name[visibility] and self._age(visibility) > self.miss_age:
+                self.refresh(visibility)
+            return list(self._by_name[visibility].get(name_or_guid, []))
+
+
+
+def _find_projects(name_or_guid, visibility=None, owner=None, creator=None, org=None):
+    """Find project dicts through the shared catalog when the criteria allow it.
+
+    Owner, creator and organization filters are matched by the API, which accepts
+    emails and organization ids, so those lookups bypass the catalog.
+    """
+    catalog = ProjectCatalog.shared()
+    if catalog is None or owner or creator or org:
+        return get_api('Projects').find_projects(name_or_guid, visibility, owner, creator, org)
+    return catalog.find(name_or_guid, visibility)
 
 
 
@@ -35,8 +205,7 @@ class ProjectList(RecordList, ForPandas):
         :param org: Project owner, optional
         :rtype: `passivetotal.analyzer.projects.ProjectList`
         """
-        results = get_api('Projects').find_projects(name_or_guid, visibility, owner, creator, org)
-        return ProjectList(results)
+        return ProjectList(_find_projects(name_or_guid, visibility, owner, creator, org))
 
     @property
     def totalrecords(self):
@@ -100,6 +269,103 @@ class Project(Record, ForPandas):
         self._artifacts = ArtifactList(result, query=self._query)
         return self._artifacts
     
+    @staticmethod
+    def _normalize_desired(desired):
+        """Turn desired artifacts into a dict of normalized value to tags, monitor and type."""
+        if isinstance(desired, str):
+            desired = [desired]
+        if not isinstance(desired, dict):
+            desired = { value: {} for value in desired }
+        normalized = {}
+        for value, options in desired.items():
+            options = dict(options or {})
+            tags = options.get('tags')
+            if isinstance(tags, str):
+                tags = tags.split(',')
+            options['tags'] = sorted(set(tags)) if tags is not None else None
+            options['query'] = str(value).strip()
+            normalized[options['query'].lower()] = options
+        return normalized
+
+    def plan_artifacts(self, desired, delete_missing=False):
+        """Compute the changes needed to make this project's artifacts match a desired set.
+
+        Fetches the current artifact list with one API query. See `reconcile_artifacts`
+        for the format of `desired`. Deletions are only planned when `delete_missing` is True.
+
+        :return: :class:`ArtifactChanges` with lists of artifacts to create, update and delete
+        """
+        return self._plan_artifacts(self._normalize_desired(desired), delete_missing)
+
+    def _plan_artifacts(self, desired, delete_missing):
+        current = {}
+        result = get_api('Artifacts').get_artifacts(project=self.guid)
+        for artifact in result.get('artifacts', [result] if 'guid' in result else []):
+            current[artifact['query'].lower()] = artifact
+        create, update, delete = [], [], []
+        for key, options in desired.items():
+            artifact = current.get(key)
+            if artifact is None:
+                entry = {'project': self.guid, 'query': options['query']}
+                if options.get('type') is not None:
+                    entry['type'] = options['type']
+                if options['tags'] is not None:
+                    entry['tags'] = options['tags']
+                create.append(entry)
+                continue
+            entry = {}
+            if options['tags'] is not None and sorted(set(artifact.get('user_tags') or [])) != options['tags']:
+                entry['tags'] = options['tags']
+            if options.get('monitor') is not None and bool(artifact.get('monitor')) != options['monitor']:
+                entry['monitor'] = options['monitor']
+            if entry:
+                entry['artifact'] = artifact['guid']
+                update.append(entry)
+        if delete_missing:
+            delete = [ artifact['guid'] for key, artifact in current.items() if key not in desired ]
+        return ArtifactChanges(create, update, delete)
+
+    def reconcile_artifacts(self, desired, delete_missing=False, chunk_size=ARTIFACT_BULK_SIZE,
+                            concurrency=None, dry_run=False):
+        """Make this project's artifacts match a desired set with as few API queries as possible.
+
+        The current artifact list is fetched once and compared with `desired`. New
+        artifacts are created and existing ones updated with the bulk create and
+        update endpoints, in chunks sent concurrently. Artifacts not in `desired`
+        are left alone unless `delete_missing` is True, in which case they are
+        deleted concurrently.
+
+        `desired` may be a list of indicator values, or a dictionary that maps each
+        value to a dictionary with optional `tags` (list or comma-separated string),
+        `monitor` (bool) and `type` keys. Tags and monitoring are only changed when
+        given for a value.
+
+        :param desired: Indicator values, or a dictionary of values to options
+        :param delete_missing: Whether to delete artifacts that are not in `desired` (optional, defaults to False)
+        :param chunk_size: Maximum number of artifacts per bulk query (optional)
+        :param concurrency: Number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+        :param dry_run: Only compute the changes without applying them (optional, defaults to False)
+        :return: :class:`ArtifactChanges` with the artifacts created, updated and deleted
+        """
+        desired = self._normalize_desired(desired)
+        changes = self._plan_artifacts(desired, delete_missing)
+        if dry_run:
+            return changes
+        api = get_api('Artifacts')
+        chunks = lambda items: [ items[i:i + chunk_size] for i in range(0, len(items), chunk_size) ]
+        tasks = [ partial(api.create_artifact_bulk, chunk) for chunk in chunks(changes.create) ]
+        tasks.extend([ partial(api.update_artifact_bulk, chunk) for chunk in chunks(changes.update) ])
+        tasks.extend([ partial(api.delete_artifact, guid) for guid in changes.delete ])
+        run_concurrently(lambda task: task(), tasks, concurrency)
+        monitored = { key: desired[key] for key in [ entry['query'].lower() for entry in changes.create ]
+                      if desired[key].get('monitor') }
+        if monitored: # the bulk create endpoint cannot set monitoring
+            follow_up = self._plan_artifacts(monitored, delete_missing=False).update
+            run_concurrently(api.update_artifact_bulk, chunks(follow_up), concurrency)
+            changes.update.extend(follow_up)
+        self._artifacts = None
+        return changes
+
     @staticmethod
     def find(name_or_guid, visibility='analyst', owner=None, creator=None, org=None):
         """Find one project that matches the other criteria.
@@ -117,7 +383,7 @@ class Project(Record, ForPandas):
         project = Project._instances.get(name_or_guid)
         if project is not None:
             return project
-        results = get_api('Projects').find_projects(name_or_guid, visibility, owner, creator, org)
+        results = _find_projects(name_or_guid, visibility, owner, creator, org)
         if len(results) == 0:
             return None
         if len(results) > 1:
@@ -142,6 +408,14 @@ class Project(Record, ForPandas):
         cols.insert(0, 'query')
         return pd.DataFrame([as_d], columns=cols)
 
+    def alert_poller(self, state_path=None, **kwargs):
+        """Build a poller that fetches only new monitoring alerts for this project.
+
+        :param state_path: JSON file that keeps the watermark between runs (optional)
+        :rtype: :class:`passivetotal.analyzer.projects.ProjectAlertPoller`
+        """
+        return ProjectAlertPoller(self, state_path, **kwargs)
+
     @property
     def artifacts(self):
         """List of artifacts in this project.
@@ -706,14 +980,180 @@ class ArtifactAlert(Record, ForPandas):
 
 
 
+class ProjectAlertPoller:
+
+    """Incremental poller for the monitoring alerts of every artifact in a project.
+
+    Keeps a watermark (the newest alert time seen) per project, optionally persisted
+    to a JSON file shared by several projects. Each poll queries the Monitor API from
+    the watermark less a small overlap, loads pages concurrently and returns only
+    alerts that were not returned before.
+
+    Updates to the state file are serialized with a lock file next to it, so pollers
+    in several processes can share one file. File locks are not available on Windows;
+    there, give each poller its own state file.
+    """
+
+    def __init__(self, project, state_path=None, start=None, overlap=ALERT_POLL_OVERLAP,
+                 pagesize=ALERT_PAGE_SIZE, concurrency=None):
+        """Initialize the poller.
+
+        :param project: :class:`Project` to poll
+        :param state_path: JSON file that keeps watermarks between runs (optional)
+        :param start: Date/time of the earliest alert to return on the first poll (optional, defaults to date set by `analyzer.set_date_range()`)
+        :param overlap: Seconds before the watermark to query again, to catch late alerts (optional, defaults to one hour)
+        :param pagesize: Size of pages to retrieve from the API (optional)
+        :param concurrency: Number of concurrent page queries (optional, defaults to `analyzer.set_concurrency()` value)
+        """
+        self._project = project
+        self._state_path = os.path.expanduser(state_path) if state_path else None
+        self._start = start
+        self._overlap = overlap
+        self._pagesize = pagesize
+        self._concurrency = concurrency
+        self._artifacts = None
+        self._lock = threading.Lock()
+        state = self._read_state().get(project.guid, {})
+        self._watermark = state.get('watermark')
+        self._seen = state.get('seen', {})
+
+    def __repr__(self):
+        return '<ProjectAlertPoller {0} watermark={1}>'.format(self._project.guid, self._watermark)
+
+    @staticmethod
+    def _normalize_date(date):
+        if date is None:
+            return None
+        return str(date).replace('T', ' ')[:19]
+
+    @staticmethod
+    def _alert_key(artifact_guid, alert):
+        data = json.dumps([artifact_guid, alert.get('type'), alert.get('change'), alert.get('query'),
+                           alert.get('result'), alert.get('datetime')], default=str)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
+    def _read_state(self):
+        if self._state_path is None or not os.path.exists(self._state_path):
+            return {}
+        with open(self._state_path) as stream:
+            return json.load(stream)
+
+    @contextmanager
+    def _state_lock(self):
+        """Hold an exclusive lock on the state file while it is read and rewritten."""
+        directory = os.path.dirname(self._state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self._state_path + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write_state(self):
+        if self._state_path is None:
+            return
+        with self._state_lock():
+            state = self._read_state()
+            state[self._project.guid] = {'watermark': self._watermark, 'seen': self._seen}
+            handle, temp = tempfile.mkstemp(dir=os.path.dirname(self._state_path) or None, prefix='.alerts.')
+            try:
+                with os.fdopen(handle, 'w') as stream:
+                    json.dump(state, stream)
+                os.replace(temp, self._state_path)
+            except BaseException:
+                os.unlink(temp)
+                raise
+
+    @property
+    def watermark(self):
+        """Date and time of the newest alert seen, or None if nothing was polled yet."""
+        return self._watermark
+
+    def _get_artifact(self, guid):
+        if self._artifacts is None:
+            self._artifacts = { artifact.guid: artifact for artifact in self._project._api_get_artifacts() or [] }
+        return self._artifacts.get(guid)
+
+    def poll(self):
+        """Fetch alerts raised since the last poll.
+
+        :return: List of new :class:`ArtifactAlert` objects, oldest first
+        """
+        with self._lock:
+            if self._watermark is None:
+                start = self._normalize_date(self._start or get_config('start_date'))
+            else:
+                since = datetime.fromisoformat(self._watermark) - timedelta(seconds=self._overlap)
+                start = since.strftime('%Y-%m-%d %H:%M:%S')
+            fetch = partial(get_api('Monitor').get_alerts, project=self._project.guid,
+                            start=start, size=self._pagesize)
+            first = fetch(page=0)
+            pages = math.ceil((first.get('totalRecords') or 0) / self._pagesize)
+            responses = [first] + run_concurrently(lambda page: fetch(page=page), range(1, pages), self._concurrency)
+            new = []
+            for response in responses:
+                for artifact_guid, alerts in (response.get('results') or {}).items():
+                    for alert in alerts:
+                        key = self._alert_key(artifact_guid, alert)
+                        if key in self._seen:
+                            continue
+                        self._seen[key] = self._normalize_date(alert.get('datetime'))
+                        new.append((artifact_guid, alert))
+            new.sort(key=lambda item: item[1].get('datetime') or '')
+            dates = [ self._seen[self._alert_key(*item)] for item in new ]
+            dates = [ date for date in dates if date is not None ]
+            if dates:
+                self._watermark = max(self._watermark or '', max(dates))
+            # alerts without a datetime are remembered from the watermark, or the query start
+            self._seen = { key: date or self._watermark or start for key, date in self._seen.items() }
+            if self._watermark is not None:
+                cutoff = (datetime.fromisoformat(self._watermark) - timedelta(seconds=self._overlap)).strftime('%Y-%m-%d %H:%M:%S')
+                self._seen = { key: date for key, date in self._seen.items() if date >= cutoff }
+            self._write_state()
+        return [ ArtifactAlert(self._get_artifact(guid), alert) for guid, alert in new ]
+
+    def stream(self, interval=60):
+        """Poll forever, yielding each new alert as it arrives.
+
+        :param interval: Seconds to wait between polls (optional, defaults to 60)
+        :return: Generator of :class:`ArtifactAlert` objects
+        """
+        while True:
+            for alert in self.poll():
+                yield alert
+            time.sleep(interval)
+
+    def watch(self, callback, interval=60):
+        """Poll forever, calling a function with each new alert.
+
+        :param callback: Callable that accepts one :class:`ArtifactAlert`
+        :param interval: Seconds to wait between polls (optional, defaults to 60)
+        """
+        for alert in self.stream(interval):
+            callback(alert)
+
+
+
 class IsArtifact:
     """An object that can be an artifact in an Illuminate project."""
 
     def _api_get_projects(self):
-        """Query the artifacts and projects API for projects that include this object."""
-        projects = []
-        for artifact in self.artifacts:
-            projects.extend(get_api('Projects').find_projects(artifact.project_guid))
+        """Query the artifacts API and look up the projects that include this object.
+
+        Projects are resolved through the shared project catalog when it is enabled,
+        so only GUIDs the catalog has not seen cost an API query.
+        """
+        catalog = ProjectCatalog.shared()
+        guids = list(OrderedDict.fromkeys(artifact.project_guid for artifact in self.artifacts))
+        if catalog is None:
+            projects = [ p for guid in guids for p in get_api('Projects').find_projects(guid) ]
+        else:
+            projects = [ p for p in map(catalog.get, guids) if p is not None ]
         self._projects = ProjectList(projects, query=self.get_host_identifier())
         return self._projects
         
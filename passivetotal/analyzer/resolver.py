@@ -0,0 +1,221 @@
+"""Live DNS resolution with timeouts and a shared TTL cache."""
+
+import itertools
+import queue
+import socket
+import threading
+import time
+
+from passivetotal.analyzer._common import AnalyzerError
+
+
+
+DNS_TIMEOUT = 5
+DNS_CACHE_TTL = 300
+DNS_FAILURE_TTL = 30
+DNS_CACHE_SIZE = 100000
+DNS_CONCURRENCY = 32
+
+FAMILIES = {
+    'A': socket.AF_INET,
+    'AAAA': socket.AF_INET6,
+    'ANY': socket.AF_UNSPEC,
+}
+
+
+
+def getaddrinfo_lookup(hostname, family):
+    """Resolve a hostname with the system resolver.
+
+    :param hostname: Hostname to resolve
+    :param family: 'A' for IPv4, 'AAAA' for IPv6 or 'ANY' for both
+    :return: List of addresses as strings, in the order the resolver returned them
+    """
+    infos = socket.getaddrinfo(hostname, None, FAMILIES[family], socket.SOCK_STREAM)
+    return [ info[4][0] for info in infos ]
+
+
+
+class Resolver:
+
+    """Resolves hostnames to their current addresses on a thread pool.
+
+    Each lookup is abandoned after `timeout` seconds. Answers are cached for `ttl`
+    seconds and failures, including timeouts, for `failure_ttl` seconds, so
+    `Hostname.ip` and repeated bulk lookups reuse earlier results. The system resolver
+    does not expose record TTLs, so one cache lifetime applies to every answer.
+    """
+
+    def __init__(self, timeout=DNS_TIMEOUT, ttl=DNS_CACHE_TTL, family='A', lookup=None,
+                 concurrency=DNS_CONCURRENCY, failure_ttl=DNS_FAILURE_TTL, max_entries=DNS_CACHE_SIZE):
+        """Initialize the resolver.
+
+        :param timeout: Seconds to wait for each lookup (optional, defaults to 5)
+        :param ttl: Seconds to cache answers (optional, defaults to five minutes)
+        :param family: Default address family, 'A', 'AAAA' or 'ANY' for both (optional, defaults to 'A')
+        :param lookup: Callable that accepts a hostname and family and returns a list of addresses (optional, defaults to the system resolver)
+        :param concurrency: Number of lookups to run at once (optional, defaults to 32)
+        :param failure_ttl: Seconds to cache failed lookups (optional, defaults to 30)
+        :param max_entries: Maximum number of cached answers (optional)
+        """
+        if family not in FAMILIES:
+            raise AnalyzerError('family must be A, AAAA or ANY')
+        self.timeout = timeout
+        self.ttl = ttl
+        self.family = family
+        self.lookup = lookup or getaddrinfo_lookup
+        self.concurrency = concurrency
+        self.failure_ttl = failure_ttl
+        self.max_entries = max_entries
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __repr__(self):
+        return '<Resolver {} cached>'.format(len(self))
+
+    @staticmethod
+    def shared():
+        """Resolver shared by the analyzer, configured with `analyzer.set_resolver()`."""
+        from passivetotal.analyzer import get_config
+        resolver = get_config('resolver')
+        if resolver is None:
+            from passivetotal.analyzer import set_resolver
+            resolver = set_resolver()
+        return resolver
+
+    def clear(self):
+        """Drop every cached answer."""
+        with self._lock:
+            self._cache.clear()
+
+    def cached(self, hostname, family=None):
+        """Cached addresses for a hostname.
+
+        :param hostname: Hostname as a string
+        :param family: Address family (optional, defaults to the resolver's family)
+        :return: List of addresses, an empty list for a cached failure, or None if not cached or expired
+        """
+        entry = self._cache.get((hostname, family or self.family))
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def _store(self, key, addresses):
+        expires = time.monotonic() + (self.ttl if addresses else self.failure_ttl)
+        with self._lock:
+            self._cache.pop(key, None)
+            if len(self._cache) >= self.max_entries:
+                self._prune()
+            self._cache[key] = (expires, addresses)
+        return addresses
+
+    def _prune(self):
+        """Drop expired answers, then the oldest quarter of the cache if it is still full."""
+        now = time.monotonic()
+        for key in [ key for key, (expires, _) in self._cache.items() if expires <= now ]:
+            del self._cache[key]
+        if len(self._cache) >= self.max_entries:
+            for key in list(self._cache)[:len(self._cache) - self.max_entries * 3 // 4]:
+                del self._cache[key]
+
+    def resolve(self, hostname, family=None):
+        """Resolve one hostname.
+
+        :param hostname: Hostname as a string or :class:`analyzer.Hostname`
+        :param family: Address family (optional, defaults to the resolver's family)
+        :return: List of addresses as strings
+        :raises AnalyzerError: If the lookup fails or times out
+        """
+        addresses = self.resolve_many([hostname], family)[str(hostname)]
+        if not addresses:
+            raise AnalyzerError('Cannot resolve IP for hostname {}'.format(hostname))
+        return addresses
+
+    def resolve_many(self, hostnames, family=None, concurrency=None, progress=None):
+        """Resolve many hostnames concurrently.
+
+        Failed and timed out lookups resolve to an empty list instead of raising.
+
+        :param hostnames: Iterable of hostnames as strings or :class:`analyzer.Hostname` objects
+        :param family: Address family (optional, defaults to the resolver's family)
+        :param concurrency: Number of lookups to run at once (optional, defaults to the resolver's concurrency)
+        :param progress: Callable that accepts the number of completed lookups and the total (optional)
+        :return: Dict of address lists keyed by hostname, in input order
+        """
+        family = family or self.family
+        if family not in FAMILIES:
+            raise AnalyzerError('family must be A, AAAA or ANY')
+        results = {}
+        pending = []
+        for hostname in map(str, hostnames):
+            if hostname in results:
+                continue
+            results[hostname] = self.cached(hostname, family)
+            if results[hostname] is None:
+                pending.append(hostname)
+        if pending:
+            self._resolve_pending(pending, family, concurrency or self.concurrency, results, progress)
+        return results
+
+    def _resolve_pending(self, pending, family, concurrency, results, progress):
+        """Run lookups on daemon worker threads, abandoning any that run longer than the timeout.
+
+        A worker stuck in an abandoned lookup is replaced, so slow names do not hold up the
+        rest of the batch. It exits once the system resolver returns.
+        """
+        work = queue.Queue()
+        answers = queue.Queue()
+        running = {}
+        lock = threading.Lock()
+        tokens = itertools.count()
+
+        def worker(token):
+            while True:
+                hostname = work.get()
+                if hostname is None:
+                    return
+                with lock:
+                    running[token] = (hostname, time.monotonic())
+                try:
+                    addresses = list(dict.fromkeys(self.lookup(hostname, family) or []))
+                except Exception:
+                    addresses = []
+                with lock:
+                    if running.pop(token, None) is None:
+                        return
+                answers.put((hostname, addresses))
+
+        def start_worker():
+            threading.Thread(target=worker, args=(next(tokens),), daemon=True).start()
+
+        for hostname in pending:
+            work.put(hostname)
+        workers = min(concurrency, len(pending))
+        for _ in range(workers):
+            start_worker()
+        completed = 0
+        while completed < len(pending):
+            now = time.monotonic()
+            with lock:
+                abandoned = [ (token, hostname) for token, (hostname, started) in running.items()
+                              if now - started >= self.timeout ]
+                for token, _ in abandoned:
+                    del running[token]
+                due = min([ started + self.timeout for _, started in running.values() ], default=now + self.timeout)
+            finished = [ (hostname, []) for _, hostname in abandoned ]
+            for _ in abandoned:
+                start_worker()
+            try:
+                finished.append(answers.get(timeout=max(0, due - now) if not finished else 0))
+            except queue.Empty:
+                pass
+            for hostname, addresses in finished:
+                results[hostname] = self._store((hostname, family), addresses)
+                completed += 1
+                if progress is not None:
+                    progress(completed, len(pending))
+        for _ in range(workers):
+            work.put(None)
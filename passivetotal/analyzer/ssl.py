@@ -1,16 +1,30 @@
 from datetime import datetime
 import pprint
-from passivetotal.analyzer._common import RecordList, Record, FirstLastSeen, AnalyzerError, ForPandas
+from passivetotal.analyzer._common import (
+    RecordList, Record, FirstLastSeen, AnalyzerError, ForPandas, run_concurrently
+)
 from passivetotal.analyzer import get_api, get_config, get_object
 
 
+PIVOT_FIELDS = ['subjectCommonName', 'subjectAlternativeNames']
+PIVOT_FIELD_ALIASES = {
+    'issuer': 'issuerCommonName',
+    'subject': 'subjectCommonName',
+    'sans': 'subjectAlternativeNames',
+    'serial': 'serialNumber',
+}
+
+
 
 class Certificates(RecordList, ForPandas):
     
     """List of historical SSL certificates."""
 
+    _provenance = None
+    _pivot_errors = None
+
     def _get_shallow_copy_fields(self):
-        return []
+        return ['_provenance', '_pivot_errors']
 
     def _get_sortable_fields(self):
         return ['firstseen','lastseen', 'duration']
@@ -27,6 +41,175 @@ class Certificates(RecordList, ForPandas):
     def totalrecords(self):
         return len(self._records)
 
+    @property
+    def as_dict(self):
+        """Return the recordlist as a list of dictionary objects.
+
+        Loads any missing certificate details first with `hydrate()`.
+        """
+        self.hydrate()
+        return super().as_dict
+
+    def to_dataframe(self, include_ips=False, max_ips=None):
+        """Render this list as a Pandas DataFrame.
+
+        Loads any missing certificate details first with `hydrate()`, and IP
+        history with `load_ip_history()` when `include_ips` is set.
+
+        :param include_ips: Whether to include historical IP data in the dataframe (optional, defaults to False)
+        :param max_ips: Maximum number of IPs per certificate (optional, defaults to all)
+        :rtype: :class:`pandas.DataFrame`
+        """
+        self.hydrate()
+        if include_ips:
+            self.load_ip_history()
+        return super().to_dataframe(include_ips=include_ips, max_ips=max_ips)
+
+    def load_ip_history(self, concurrency=None, progress=None):
+        """Load IP history for every certificate in this list concurrently.
+
+        Certificates are deduplicated by SHA-1 and certificates whose history is
+        already loaded are skipped. A certificate whose query fails is left with
+        no IPs, so one failure does not stop the rest of the list from loading.
+
+        :param concurrency: Number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+        :param progress: Callable that accepts the number of completed queries and the total (optional)
+        :return: Number of certificates loaded
+        """
+        missing = {}
+        for record in self._records:
+            if getattr(record, '_ip_history', None) is None:
+                missing.setdefault(record.sha1, record)
+        def load(record):
+            try:
+                record._api_get_ip_history()
+            except AnalyzerError:
+                record._ip_history_records = [{'sha1': record.sha1, 'ipAddresses': []}]
+                record._ip_history = record._ip_history_records[0]
+        run_concurrently(load, missing.values(), concurrency, progress)
+        return len(missing)
+
+    def ip_history_dataframe(self, max_ips=None, concurrency=None, progress=None):
+        """Render the IP history of every certificate as a long-format Pandas DataFrame.
+
+        Has one row per certificate and IP address with `sha1`, `ip`, `firstseen` and
+        `lastseen` columns, where the dates are those of the history record that lists
+        the IP. History is loaded first with `load_ip_history()`.
+
+        :param max_ips: Maximum number of IPs per certificate (optional, defaults to all)
+        :param concurrency: Number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+        :param progress: Callable that accepts the number of completed queries and the total (optional)
+        :rtype: :class:`pandas.DataFrame`
+        """
+        pd = self._get_pandas()
+        self.load_ip_history(concurrency, progress)
+        seen = set()
+        rows = []
+        for record in self._records:
+            if record.sha1 in seen:
+                continue
+            seen.add(record.sha1)
+            remaining = max_ips
+            for history in getattr(record, '_ip_history_records', [record._ip_history]):
+                ips = history.get('ipAddresses')
+                ips = ips[:remaining] if isinstance(ips, list) else []
+                if remaining is not None:
+                    remaining -= len(ips)
+                rows.append((record.sha1, ips, history.get('firstSeen'), history.get('lastSeen')))
+        df = pd.DataFrame(rows, columns=['sha1', 'ip', 'firstseen', 'lastseen'])
+        df = df.explode('ip').dropna(subset=['ip']).reset_index(drop=True)
+        for column in ['firstseen', 'lastseen']:
+            df[column] = pd.to_datetime(df[column], errors='coerce')
+        return df
+
+    def hydrate(self, concurrency=None, progress=None):
+        """Load missing details for every certificate in this list concurrently.
+
+        Historical records often lack certificate details, which are otherwise fetched
+        one query at a time the first time a field is read. Certificates are
+        deduplicated by SHA-1, so each one is queried at most once. Certificates with
+        no available details are remembered and not queried again; they still raise
+        when their fields are read.
+
+        :param concurrency: Number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+        :param progress: Callable that accepts the number of completed queries and the total (optional)
+        :return: Number of certificates loaded
+        """
+        missing = {}
+        for record in self._records:
+            record = CertificateRecord._instances.get(record.sha1, record)
+            if record._has_details or getattr(record, '_details_unavailable', False):
+                continue
+            if hasattr(record, '_api_get_details'):
+                missing.setdefault(record.sha1, record)
+        def load(record):
+            try:
+                record._api_get_details()
+            except AnalyzerError:
+                return False
+            return True
+        return sum(run_concurrently(load, missing.values(), concurrency, progress))
+
+    def pivot(self, fields=None, concurrency=None, progress=None):
+        """Find other certificates that share field values with the certificates in this list.
+
+        Collects every distinct value of the chosen fields, expanding subject alternative
+        names into one search per name, and searches them concurrently. Fields already
+        searched through :class:`CertificateField` are not searched again. Certificates
+        without available details are skipped. A search that fails does not stop the
+        others; it is listed in `pivot_errors` and the results of the rest are returned.
+
+        :param fields: Certificate field names, or the aliases 'issuer', 'subject', 'sans'
+            and 'serial' (optional, defaults to subject common name and alternative names)
+        :param concurrency: Number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+        :param progress: Callable that accepts the number of completed searches and the total (optional)
+        :return: Deduplicated union of the matching certificates, with `provenance` set
+        :rtype: :class:`Certificates`
+        """
+        self.hydrate(concurrency)
+        searches = {}
+        for record in self._records:
+            if not record._has_details:
+                continue
+            for name in fields or PIVOT_FIELDS:
+                field = record._get_field(PIVOT_FIELD_ALIASES.get(name, name))
+                is_sans = field.name == 'subjectAlternativeNames' and isinstance(field._value, list)
+                for candidate in field.value if is_sans else [field]:
+                    if candidate._value and not isinstance(candidate._value, list):
+                        searches[id(candidate)] = candidate
+        pending = [ field for field in searches.values() if field._certificates is None ]
+        def search(field):
+            try:
+                field._api_search()
+            except AnalyzerError as e:
+                return e
+        errors = run_concurrently(search, pending, concurrency, progress)
+        results = Certificates()
+        results._provenance = {}
+        results._pivot_errors = [ (field, error) for field, error in zip(pending, errors) if error is not None ]
+        failed = { id(field) for field, _ in results._pivot_errors }
+        records = {}
+        for field in searches.values():
+            if id(field) in failed:
+                continue
+            for cert in field.certificates:
+                records.setdefault(cert.sha1, cert)
+                results._provenance.setdefault(cert.sha1, []).append(field)
+        results._records = list(records.values())
+        return results
+
+    @property
+    def pivot_errors(self):
+        """List of (:class:`CertificateField`, exception) tuples for the searches that failed
+        in `pivot()`."""
+        return self._pivot_errors or []
+
+    @property
+    def provenance(self):
+        """Dictionary of certificate SHA-1 hashes to the list of :class:`CertificateField` searches
+        that found each certificate, for lists returned by `pivot()`."""
+        return self._provenance or {}
+
     @property
     def newest(self):
         """Most recently seen :class:`CertificateRecord`."""
@@ -170,7 +353,8 @@ class CertificateRecord(Record, FirstLastSeen, ForPandas):
             response = get_api('SSL').get_ssl_certificate_history(query=self.hash)
         except Exception as e:
             raise AnalyzerError
-        self._ip_history = response['results'][0]
+        self._ip_history_records = response.get('results') or [{'sha1': self.hash, 'ipAddresses': []}]
+        self._ip_history = self._ip_history_records[0]
         return self._ip_history
     
     def _get_dict_fields(self):
@@ -178,16 +362,20 @@ class CertificateRecord(Record, FirstLastSeen, ForPandas):
         fields.extend(['days_valid','expired','sha1','str:firstseen','str:lastseen'])
         return fields
     
-    def to_dataframe(self, include_ips=False):
+    def to_dataframe(self, include_ips=False, max_ips=None):
         """Render this object as a Pandas DataFrame.
 
-        :param include_ips: Whether to include historical IP data in  the dataframe (optional, defaults to False, will likely trigger new API query for each record.)
+        To include IPs for many certificates, call `to_dataframe` on the
+        :class:`Certificates` list, which loads IP history concurrently.
+
+        :param include_ips: Whether to include historical IP data in the dataframe (optional, defaults to False, triggers an API query if the history is not loaded)
+        :param max_ips: Maximum number of IPs to include (optional, defaults to all)
         :rtype: :class:`pandas.DataFrame`
         """
         pd = self._get_pandas()
         as_d = self.as_dict
         if include_ips:
-            as_d['ips'] = self.ips
+            as_d['ips'] = self.ips[:max_ips]
         return pd.DataFrame([as_d])
 
     @property
@@ -552,6 +740,7 @@ class CertHistoryRecord(CertificateRecord):
         try:
             self._cert_details = response['results'][0] # API oddly returns an array
         except IndexError:
+            self._details_unavailable = True
             raise SSLAnalyzerError('No details available for this certificate')
         self._has_details = True
         return self._cert_details
@@ -563,6 +752,8 @@ class CertHistoryRecord(CertificateRecord):
         """
         if self._has_details:
             return
+        if getattr(self, '_details_unavailable', False):
+            raise SSLAnalyzerError('No details available for this certificate')
         self._api_get_details()
 
 
@@ -0,0 +1,124 @@
+"""Offline public suffix handling and cached registered-domain extraction."""
+
+from collections import namedtuple
+from functools import lru_cache
+import os
+import tempfile
+import threading
+
+from passivetotal.analyzer._common import AnalyzerError
+from passivetotal.config import CONFIG_PATH
+
+
+
+SUFFIX_LIST_URL = 'https://publicsuffix.org/list/public_suffix_list.dat'
+SUFFIX_LIST_FILE = os.path.join(CONFIG_PATH, 'public_suffix_list.dat')
+SUFFIX_LIST_MARKER = '===BEGIN ICANN DOMAINS==='
+EXTRACT_CACHE_SIZE = 65536
+
+DomainParts = namedtuple('DomainParts', ['subdomain', 'domain', 'suffix', 'registered_domain'])
+
+_state = {'extractor': None}
+_lock = threading.Lock()
+
+
+
+def suffix_list_path():
+    """Path of the suffix list file in use, or None when using the snapshot bundled with `tldextract`."""
+    from passivetotal.analyzer import config
+    path = config.get('suffix_list') or SUFFIX_LIST_FILE
+    return path if os.path.exists(path) else None
+
+def _extractor():
+    """Build the shared `tldextract` extractor once, without network access.
+
+    Reads the suffix list saved by `refresh_suffix_list()` (or set with
+    `analyzer.set_suffix_list()`) when it exists, and otherwise the snapshot bundled
+    with `tldextract`. Nothing is fetched or cached on disk.
+    """
+    if _state['extractor'] is not None:
+        return _state['extractor']
+    import tldextract
+    with _lock:
+        if _state['extractor'] is None:
+            path = suffix_list_path()
+            urls = ('file://' + os.path.abspath(path),) if path else ()
+            _state['extractor'] = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=urls,
+                                                        fallback_to_snapshot=True)
+    return _state['extractor']
+
+def _split(hostname):
+    parts = _extractor()(hostname)
+    registered = '{}.{}'.format(parts.domain, parts.suffix) if parts.domain and parts.suffix else ''
+    return DomainParts(parts.subdomain, parts.domain, parts.suffix, registered)
+
+@lru_cache(maxsize=EXTRACT_CACHE_SIZE)
+def extract(hostname):
+    """Split a hostname into subdomain, domain, suffix and registered domain.
+
+    Results are held in a bounded cache shared by every `analyzer.Hostname`.
+
+    :param hostname: Hostname as a string
+    :rtype: :class:`DomainParts`
+    """
+    return _split(hostname)
+
+def extract_many(hostnames):
+    """Split many hostnames without creating `analyzer.Hostname` objects.
+
+    Repeated hostnames are split once. The batch bypasses the shared `extract` cache,
+    so it does not evict hostnames cached by other callers.
+
+    :param hostnames: Iterable of hostnames as strings
+    :return: List of :class:`DomainParts` in the same order as `hostnames`
+    """
+    seen = {}
+    results = []
+    for hostname in hostnames:
+        parts = seen.get(hostname)
+        if parts is None:
+            parts = seen[hostname] = _split(hostname)
+        results.append(parts)
+    return results
+
+def reset():
+    """Drop the shared extractor and clear the extraction cache, so the next extraction
+    reloads the suffix list."""
+    with _lock:
+        _state['extractor'] = None
+    extract.cache_clear()
+
+def refresh_suffix_list(path=None, url=SUFFIX_LIST_URL, timeout=30):
+    """Download the current public suffix list and use it for all later extractions.
+
+    The file is replaced atomically. Run this from a machine with network access and
+    copy the file to air-gapped hosts, or point them at it with `analyzer.set_suffix_list()`.
+
+    :param path: Where to save the list (optional, defaults to `~/.config/passivetotal/public_suffix_list.dat`)
+    :param url: URL of the list (optional, defaults to the Mozilla public suffix list)
+    :param timeout: Seconds to wait for the download (optional, defaults to 30)
+    :return: Path of the saved file
+    """
+    import requests
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    if SUFFIX_LIST_MARKER not in response.text:
+        raise AnalyzerError('Download from {} is not a public suffix list'.format(url))
+    path = os.path.expanduser(path or SUFFIX_LIST_FILE)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handle, temp = tempfile.mkstemp(dir=directory or None, prefix='.suffixes.')
+    try:
+        with os.fdopen(handle, 'w', encoding='utf-8') as stream:
+            stream.write(response.text)
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+    if path == SUFFIX_LIST_FILE:
+        reset()
+    else:
+        from passivetotal.analyzer import set_suffix_list
+        set_suffix_list(path)
+    return path
@@ -1,12 +1,60 @@
 from functools import partial
+import math
 from passivetotal.analyzer._common import (
     RecordList, Record, FirstLastSeen, PagedRecordList, ForPandas, AnalyzerError, AnalyzerAPIError,
-    FilterDomains
+    FilterDomains, run_concurrently
 )
 from passivetotal.analyzer import get_api, get_config, get_object
 
 
 
+def load_search_pages(searches, concurrency=None):
+    """Load every page of many :class:`TrackerSearchResults` concurrently.
+
+    The first page of every search is fetched in one batch. Once their totals are
+    known, the remaining pages of every search are fetched together in a second
+    batch, so no search waits on another search's pagination. Pages are parsed in
+    order, and searches that return a 404 are treated as empty. A search whose query
+    fails stops paging without interrupting the others.
+
+    :param searches: List of :class:`TrackerSearchResults`
+    :param concurrency: Number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+    :return: List of (search, exception) tuples for the searches that failed
+    """
+    def fetch(task):
+        results, page = task
+        try:
+            return results._pagination_get_api_results(page)
+        except AnalyzerAPIError as e:
+            if e.status_code == 404:
+                return {'totalRecords': 0, 'results': []}
+            return e
+        except Exception as e:
+            return e
+    failed = {}
+    pending = [ results for results in {id(r): r for r in searches}.values() if results.has_more_records ]
+    tasks = [ (results, results._pagination_get_current_page()) for results in pending ]
+    while tasks:
+        for (results, page), response in zip(tasks, run_concurrently(fetch, tasks, concurrency)):
+            if id(results) in failed:
+                continue
+            if isinstance(response, Exception):
+                failed[id(results)] = (results, response)
+                continue
+            before = len(results)
+            results._pagination_parse_page(response)
+            results._pagination_increment_page()
+            results._pagination_has_more = before < len(results) < (results.totalrecords or 0)
+        pending = [ results for results in pending if id(results) not in failed and results.has_more_records ]
+        tasks = []
+        for results in pending:
+            remaining = math.ceil((results.totalrecords - len(results)) / results._pagination_get_page_size())
+            first = results._pagination_get_current_page()
+            tasks.extend((results, page) for page in range(first, first + remaining))
+    return list(failed.values())
+
+
+
 class TrackerHistory(RecordList, PagedRecordList, ForPandas):
 
     """Historical web component data."""
@@ -54,6 +102,11 @@ class TrackerHistory(RecordList, PagedRecordList, ForPandas):
         """List of unique tracker values in the tracker record list."""
         return set([record.value for record in self if record.value is not None])
 
+    @property
+    def trackers(self):
+        """List of unique :class:`Tracker` objects in the tracker record list, in order of first appearance."""
+        return list(dict.fromkeys(record.tracker for record in self if record.value is not None))
+
 
 
 class TrackerRecord(Record, FirstLastSeen, ForPandas):
@@ -128,6 +181,9 @@ class TrackerSearchResults(RecordList, PagedRecordList, ForPandas, FilterDomains
 
     """Search results from a tracker query."""
 
+    _by_tracker = None
+    _provenance = None
+
     def __init__(self, query=None, tracker_type=None, search_type=None):
         self._query = query
         self._tracker_type = tracker_type
@@ -146,7 +202,7 @@ class TrackerSearchResults(RecordList, PagedRecordList, ForPandas, FilterDomains
 
     def _get_shallow_copy_fields(self):
         return ['_totalrecords','_query', '_pagination_current_page','_pagination_page_size',
-                '_pagination_callable','_pagination_has_more']
+                '_pagination_callable','_pagination_has_more','_by_tracker','_provenance']
     
     def _get_sortable_fields(self):
         return ['firstseen','lastseen','searchtype','trackertype','query','host']
@@ -176,6 +232,18 @@ class TrackerSearchResults(RecordList, PagedRecordList, ForPandas, FilterDomains
         """Total number of available records; may be greater than the number of results returned by the API."""
         return self._totalrecords
 
+    @property
+    def by_tracker(self):
+        """Dictionary of :class:`Tracker` objects to their own search results, for lists
+        returned by `Tracker.search_many()`."""
+        return self._by_tracker or {}
+
+    @property
+    def provenance(self):
+        """Dictionary of entities to the list of :class:`Tracker` objects observed on each, for
+        lists returned by `Tracker.search_many()`."""
+        return self._provenance or {}
+
 
 
 class TrackerSearchRecord(Record, FirstLastSeen, ForPandas):
@@ -293,15 +361,81 @@ class Tracker:
     def __repr__(self):
         return '<Tracker {}>'.format(str(self))
     
+    _SEARCH_ATTRS = {
+        'hosts': '_hostnames',
+        'addresses': '_ips'
+    }
+
     def _api_search(self, searchtype):
-        attrs = {
-            'hosts': '_hostnames',
-            'addresses': '_ips'
-        }
         results = TrackerSearchResults(self._value, self._type, searchtype)
         results.load_all_pages()
-        setattr(self, attrs[searchtype], results)
-    
+        setattr(self, self._SEARCH_ATTRS[searchtype], results)
+
+    def _get_search(self, searchtype):
+        """Cached search results for a searchtype, or None if not loaded."""
+        return getattr(self, self._SEARCH_ATTRS[searchtype])
+
+    @staticmethod
+    def _load_searches(searches, concurrency=None):
+        """Load and cache results for many (tracker, searchtype) pairs concurrently.
+
+        Pairs whose results are already cached are skipped. If any search fails, the
+        searches that completed are cached before the first error is raised, so a
+        retry only queries the failed ones.
+        """
+        pending = {}
+        for tracker, searchtype in searches:
+            if tracker._get_search(searchtype) is None:
+                pending[(tracker, searchtype)] = TrackerSearchResults(tracker._value, tracker._type, searchtype)
+        failures = load_search_pages(pending.values(), concurrency)
+        failed = { id(results) for results, _ in failures }
+        for (tracker, searchtype), results in pending.items():
+            if id(results) not in failed:
+                setattr(tracker, Tracker._SEARCH_ATTRS[searchtype], results)
+        if failures:
+            raise failures[0][1]
+
+    @staticmethod
+    def search_many(trackers, searchtype='hosts', concurrency=None):
+        """Find the hosts or IP addresses where any of many trackers was observed.
+
+        Runs the searches for every tracker concurrently, loading every page, and caches
+        each tracker's results as if `observations_by_hostname` or `observations_by_ip`
+        had been read. Hosts found by more than one tracker appear once in the combined
+        list; `provenance` lists the trackers seen on each and `by_tracker` holds each
+        tracker's own results.
+
+        :param trackers: List of :class:`Tracker` objects, :class:`TrackerRecord` objects
+            or (trackertype, value) tuples, such as `TrackerHistory.trackers`
+        :param searchtype: Type of results to return, 'hosts' or 'addresses' (optional, defaults to 'hosts')
+        :param concurrency: Number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+        :rtype: :class:`TrackerSearchResults`
+        """
+        if searchtype not in Tracker._SEARCH_ATTRS:
+            raise AnalyzerError('searchtype must be "hosts" or "addresses"')
+        unique = {}
+        for tracker in trackers:
+            if isinstance(tracker, TrackerRecord):
+                tracker = tracker.tracker
+            elif not isinstance(tracker, Tracker):
+                tracker = Tracker(*tracker)
+            unique.setdefault(tracker)
+        Tracker._load_searches([ (tracker, searchtype) for tracker in unique ], concurrency)
+        combined = TrackerSearchResults(search_type=searchtype)
+        combined._by_tracker = {}
+        combined._provenance = {}
+        for tracker in unique:
+            results = combined._by_tracker[tracker] = tracker._get_search(searchtype)
+            for record in results:
+                found = combined._provenance.setdefault(record.entity, [])
+                if not found:
+                    combined._records.append(record)
+                if tracker not in found:
+                    found.append(tracker)
+        combined._totalrecords = len(combined._records)
+        combined._pagination_has_more = False
+        return combined
+
     @property
     def trackertype(self):
         """Type of tracker as defined by RiskIQ analysts."""
@@ -359,23 +493,34 @@ class HasTrackers:
         self._trackers = TrackerHistory(response, query)
         return self._trackers
     
-    def _api_get_tracker_references(self):
-        """Query the host attributes API and search trackers for multiple trackertypes and searchtypes."""
-        self._tracker_references = TrackerSearchResults(query=self.get_host_identifier())
+    def _tracker_reference_searches(self):
+        """Searches for trackers of every reference type whose value is this host.
+
+        :return: List of (:class:`Tracker`, searchtype) tuples
+        """
+        query = self.get_host_identifier()
         tracker_types = self._REFERENCE_TRACKER_TYPES.get('Hostname' if self.is_hostname else 'IPAddress')
-        for trackertype in tracker_types:
-            for searchtype in ['addresses','hosts']:
-                try:
-                    result = get_api('HostAttributes').search_trackers_by_type(
-                        query=self.get_host_identifier(),
-                        type=trackertype,
-                        searchType=searchtype
-                    )
-                    self._tracker_references.parse(result, trackertype, searchtype)
-                except AnalyzerAPIError as e:
-                    if e.status_code == 404:
-                        continue
-                    raise e
+        return [ (Tracker(trackertype, query), searchtype)
+                 for trackertype in tracker_types for searchtype in ['addresses','hosts'] ]
+
+    def _api_get_tracker_references(self, concurrency=None):
+        """Search trackers for multiple trackertypes and searchtypes concurrently.
+
+        Every page of every search is loaded and the results are cached on each
+        :class:`Tracker`, then merged into one deduplicated list.
+        """
+        searches = self._tracker_reference_searches()
+        Tracker._load_searches(searches, concurrency)
+        self._tracker_references = TrackerSearchResults(query=self.get_host_identifier())
+        seen = set()
+        for tracker, searchtype in searches:
+            for record in tracker._get_search(searchtype):
+                key = (record.trackertype, record.searchtype, record.entity)
+                if key not in seen:
+                    seen.add(key)
+                    self._tracker_references._records.append(record)
+        self._tracker_references._totalrecords = len(self._tracker_references._records)
+        self._tracker_references._pagination_has_more = False
         return self._tracker_references
 
     @property
@@ -400,11 +545,31 @@ class HasTrackers:
     def tracker_references(self):
         """Hosts with trackers that have this host as the value.
         
-        Performs several API queries to create a composite result; create an instance of
-        :class:`passivetotal.analyzer.Tracker` if you need more granular control.
+        Searches every reference tracker type for both hosts and IP addresses concurrently
+        and merges the results; create an instance of :class:`passivetotal.analyzer.Tracker`
+        if you need more granular control. To sweep many hosts, call
+        :func:`passivetotal.analyzer.trackers.load_tracker_references` first.
 
         :rtype: :class:`passivetotal.analyzer.trackers.TrackerSearchResults`
         """
         if getattr(self, '_tracker_references', None) is not None:
             return self._tracker_references
-        return self._api_get_tracker_references()
\ No newline at end of file
+        return self._api_get_tracker_references()
+
+
+
+def load_tracker_references(hosts, concurrency=None):
+    """Load `tracker_references` for many hosts in one concurrent batch.
+
+    Every search for every host shares one pool of API queries; afterwards the
+    `tracker_references` property of each host returns without further queries.
+
+    :param hosts: List of hostnames or IP addresses, as strings or Analyzer objects
+    :param concurrency: Number of concurrent API queries (optional, defaults to `analyzer.set_concurrency()` value)
+    :return: Dictionary of host identifiers to :class:`TrackerSearchResults`
+    """
+    hosts = [ get_object(host) for host in hosts ]
+    searches = [ search for host in hosts if getattr(host, '_tracker_references', None) is None
+                 for search in host._tracker_reference_searches() ]
+    Tracker._load_searches(searches, concurrency)
+    return { host.get_host_identifier(): host.tracker_references for host in hosts }
@@ -41,10 +41,11 @@ class Client(object):
         """
         self.logger = logging.getLogger('pt-base-request')
         self.logger.setLevel('INFO')
-        shandler = logging.StreamHandler(sys.stdout)
-        fmtr = logging.Formatter('\033[1;32m%(levelname)-5s %(module)s:%(funcName)s():%(lineno)d %(asctime)s\033[0m| %(message)s')
-        shandler.setFormatter(fmtr)
-        self.logger.addHandler(shandler)
+        if not self.logger.handlers: # loggers are global; add the handler only once
+            shandler = logging.StreamHandler(sys.stdout)
+            fmtr = logging.Formatter('\033[1;32m%(levelname)-5s %(module)s:%(funcName)s():%(lineno)d %(asctime)s\033[0m| %(message)s')
+            shandler.setFormatter(fmtr)
+            self.logger.addHandler(shandler)
 
         self.api_base = 'https://%s/%s' % (server, version)
         self.username = username
@@ -71,10 +72,11 @@ class Client(object):
         """Method to return back a loaded instance.
         
         kwargs override configuration file variables if provided and are passed to the object constructor.
+        The configuration is read once per process and shared by every client.
         """
         arg_keys = ['username','api_key','server','version','http_proxy','https_proxy']
         args = { k: kwargs.pop(k) if k in kwargs else None for k in arg_keys }
-        config = Config()
+        config = Config.shared()
         client = cls(
             username    = args.get('username') or config.get('username'),
             api_key     = args.get('api_key') or config.get('api_key'),
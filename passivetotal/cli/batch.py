@@ -0,0 +1,141 @@
+"""Batch execution helpers for the pt-client command line script."""
+
+import csv
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from io import StringIO
+
+DEFAULT_CONCURRENCY = 8
+BATCH_FORMATS = ['jsonl', 'csv']
+
+
+def read_queries(source):
+    """Read queries from a file, one per line.
+
+    Blank lines and lines starting with '#' are skipped.
+
+    :param str source: Path to a file, or '-' to read from stdin
+    :return: Generator of query strings
+    """
+    stream = sys.stdin if source == '-' else open(source)
+    try:
+        for line in stream:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def pooled_session(size):
+    """Build a requests session with a connection pool large enough for `size` threads.
+
+    :param int size: Number of concurrent requests the session should serve
+    :return: requests.Session
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class BatchWriter(object):
+
+    """Stream batch results as JSON lines or CSV rows as they complete."""
+
+    def __init__(self, format='jsonl', output=None, errors=None):
+        """Initialize the writer.
+
+        :param str format: Output format, 'jsonl' or 'csv'
+        :param output: Stream for results, defaults to stdout
+        :param errors: Stream for error records in CSV mode, defaults to stderr
+        """
+        if format not in BATCH_FORMATS:
+            raise ValueError('Batch format must be one of {}'.format(', '.join(BATCH_FORMATS)))
+        self.format = format
+        self.output = output or sys.stdout
+        self.errors = errors or sys.stderr
+        self.error_count = 0
+        self.result_count = 0
+        self._csv = csv.writer(self.output)
+        self._csv_header = None
+
+    def write(self, query, data=None, error=None):
+        """Write one result or error record.
+
+        :param str query: Query that produced the result
+        :param data: `passivetotal.response.Response` instance (on success)
+        :param error: Exception raised while running the query (on failure)
+        """
+        if error is not None:
+            self.error_count += 1
+            record = {'query': query, 'error': str(error), 'error_type': type(error).__name__}
+            stream = self.errors if self.format == 'csv' else self.output
+            stream.write(json.dumps(record) + '\n')
+            stream.flush()
+            return
+        if self.format == 'csv':
+            self._write_csv(query, data)
+        else:
+            self.output.write(json.dumps({'query': query, 'results': data._results}) + '\n')
+        self.result_count += 1
+        self.output.flush()
+
+    def _write_csv(self, query, data):
+        """Write CSV rows for a result, emitting the header row only once."""
+        rows = list(csv.reader(StringIO(data.csv)))
+        if not rows:
+            return
+        if self._csv_header is None:
+            self._csv_header = ['query'] + rows[0]
+            self._csv.writerow(self._csv_header)
+        for row in rows[1:]:
+            self._csv.writerow([query] + row)
+
+
+def run_batch(call, queries, writer, concurrency=DEFAULT_CONCURRENCY):
+    """Run a call for every query on a thread pool and stream results to a writer.
+
+    Results are written in completion order. Exceptions raised for one query
+    are written as error records and do not stop the batch, and so are
+    responses that cannot be written. At most
+    2 * `concurrency` queries are in flight, so input streams of any size
+    run in bounded memory.
+
+    :param call: Callable that accepts one query and returns a Response
+    :param queries: Iterable of query strings
+    :param writer: :class:`BatchWriter` instance
+    :param int concurrency: Number of worker threads
+    :return: Number of queries that raised an error
+    """
+    def run_one(query):
+        try:
+            return query, call(query), None
+        except Exception as e:
+            return query, None, e
+
+    def emit(future):
+        query, data, error = future.result()
+        try:
+            writer.write(query, data, error)
+        except Exception as e: # a response that cannot be rendered is this query's error
+            writer.write(query, error=e)
+
+    pending = set()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for query in queries:
+            pending.add(executor.submit(run_one, query))
+            if len(pending) >= concurrency * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    emit(future)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                emit(future)
+    return writer.error_count
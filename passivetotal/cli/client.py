@@ -1,24 +1,18 @@
 #!/usr/bin/env python
+import importlib
+import json
+import os
 import sys
+import threading
 from argparse import ArgumentParser
+from copy import copy
 from datetime import datetime, timezone, timedelta
 from passivetotal.common.utilities import prune_args
 from passivetotal.common.utilities import to_bool
 from passivetotal.common.utilities import valid_date
-from passivetotal.libs.attributes import AttributeRequest, AttributeResponse
-from passivetotal.libs.actions import ActionsClient, ActionsResponse
-from passivetotal.libs.artifacts import ArtifactsRequest, ArtifactsResponse
-from passivetotal.libs.dns import DnsRequest, DnsResponse
-from passivetotal.libs.ssl import SslRequest, SSLResponse, SSLHistoryResponse
-from passivetotal.libs.whois import WhoisRequest, WhoisResponse
-from passivetotal.libs.articles import ArticlesRequest, ArticlesResponse, ArticlesIndicatorResponse
-from passivetotal.libs.enrichment import EnrichmentRequest, EnrichmentResponse
-from passivetotal.libs.cards import CardsRequest, CardsResponse
-from passivetotal.libs.cookies import CookiesRequest, CookiesResponse
-from passivetotal.libs.services import ServicesRequest, ServicesResponse
-from passivetotal.libs.projects import ProjectsRequest, ProjectsResponse
-from passivetotal.libs.illuminate import IlluminateRequest, IlluminateReputationResponse
-from passivetotal.response import Response
+from passivetotal.cli.batch import (
+    BatchWriter, BATCH_FORMATS, DEFAULT_CONCURRENCY, pooled_session, read_queries, run_batch
+)
 
 __author__ = 'Brandon Dixon (PassiveTotal)'
 __version__ = '1.0.0'
@@ -26,9 +20,10 @@ __version__ = '1.0.0'
 DEFAULT_ARTICLE_DAYS_BACK = 7
 
 
-def call_dns(args):
+def call_dns(args, client=None):
     """Abstract call to DNS-based queries."""
-    client = DnsRequest.from_config()
+    from passivetotal.libs.dns import DnsRequest, DnsResponse
+    client = client or DnsRequest.from_config()
     pruned = prune_args(
         query=args.query,
         end=args.end,
@@ -45,9 +40,10 @@ def call_dns(args):
     return data
 
 
-def call_attribute(args):
+def call_attribute(args, client=None):
     """Abstract call to attribute-based queries."""
-    client = AttributeRequest.from_config()
+    from passivetotal.libs.attributes import AttributeRequest, AttributeResponse
+    client = client or AttributeRequest.from_config()
     pruned = prune_args(
         query=args.query,
     )
@@ -68,9 +64,10 @@ def call_attribute(args):
     return data
 
 
-def call_whois(args):
+def call_whois(args, client=None):
     """Abstract call to WHOIS-based queries."""
-    client = WhoisRequest.from_config()
+    from passivetotal.libs.whois import WhoisRequest, WhoisResponse
+    client = client or WhoisRequest.from_config()
     pruned = prune_args(
         query=args.query,
         compact_record=args.compact,
@@ -89,9 +86,10 @@ def call_whois(args):
     return data
 
 
-def call_ssl(args):
+def call_ssl(args, client=None):
     """Abstract call to SSL-based queries."""
-    client = SslRequest.from_config()
+    from passivetotal.libs.ssl import SslRequest, SSLResponse, SSLHistoryResponse
+    client = client or SslRequest.from_config()
     pruned = prune_args(
         query=args.query,
         compact_record=args.compact,
@@ -120,16 +118,18 @@ def call_ssl(args):
     return data
 
 
-def call_osint(args):
-    client = EnrichmentRequest.from_config()
+def call_osint(args, client=None):
+    from passivetotal.libs.enrichment import EnrichmentRequest, EnrichmentResponse
+    client = client or EnrichmentRequest.from_config()
     return EnrichmentResponse.process(
         client.get_osint(query=args.query)
     )
 
 
-def call_actions(args):
+def call_actions(args, client=None):
     """Abstract call to actions-based queries."""
-    client = ActionsClient.from_config()
+    from passivetotal.libs.actions import ActionsClient, ActionsResponse
+    client = client or ActionsClient.from_config()
     pruned = prune_args(
         query=args.query,
         tags=args.tags,
@@ -180,8 +180,9 @@ def call_actions(args):
 
     return ActionsResponse.process(data)
 
-def call_articles(args):
-    client = ArticlesRequest.from_config()
+def call_articles(args, client=None):
+    from passivetotal.libs.articles import ArticlesRequest, ArticlesResponse, ArticlesIndicatorResponse
+    client = client or ArticlesRequest.from_config()
     if args.query == 'indicators':
         pruned = prune_args(
             articleGuid = args.guid,
@@ -203,8 +204,9 @@ def call_articles(args):
             client.get_articles(**pruned)
         )
 
-def call_artifacts(args):
-    client = ArtifactsRequest.from_config()
+def call_artifacts(args, client=None):
+    from passivetotal.libs.artifacts import ArtifactsRequest, ArtifactsResponse
+    client = client or ArtifactsRequest.from_config()
     pruned = prune_args(
         artifact = args.id,
         project = args.project,
@@ -218,15 +220,17 @@ def call_artifacts(args):
         client.get_artifacts(**pruned)
     )
 
-def call_summary(args):
-    client = CardsRequest.from_config()
+def call_summary(args, client=None):
+    from passivetotal.libs.cards import CardsRequest, CardsResponse
+    client = client or CardsRequest.from_config()
     data = CardsResponse.process(
         client.get_summary(query=args.query)
     )
     return data
 
-def call_cookies(args):
-    client = CookiesRequest.from_config()
+def call_cookies(args, client=None):
+    from passivetotal.libs.cookies import CookiesRequest, CookiesResponse
+    client = client or CookiesRequest.from_config()
     meth = 'get_{0.object}_{0.search}'.format(args)
     pruned = prune_args(
         page = args.page,
@@ -238,15 +242,17 @@ def call_cookies(args):
     )
     return data
 
-def call_services(args):
-    client = ServicesRequest.from_config()
+def call_services(args, client=None):
+    from passivetotal.libs.services import ServicesRequest, ServicesResponse
+    client = client or ServicesRequest.from_config()
     data = ServicesResponse.process(
         client.get_services(query=args.ip)
     )
     return data
 
-def call_projects(args):
-    client = ProjectsRequest.from_config()
+def call_projects(args, client=None):
+    from passivetotal.libs.projects import ProjectsRequest, ProjectsResponse
+    client = client or ProjectsRequest.from_config()
     pruned = prune_args(
         project = args.id,
         owner = args.owner,
@@ -281,14 +287,17 @@ def call_projects(args):
     data = ProjectsResponse.process(response)
     return data
 
-def call_illuminate(args):
-    client = IlluminateRequest.from_config()
+def call_illuminate(args, client=None):
+    from passivetotal.libs.illuminate import IlluminateRequest, IlluminateReputationResponse
+    client = client or IlluminateRequest.from_config()
     if args.illuminate_cmd == 'reputation':
         results = []
         for host in args.hosts:
             try:
                 response = client.get_reputation(query=host)
             except Exception as e:
+                if args.batch: # report the failure as this query's error record
+                    raise
                 response = {}
             response.update({'host': host})
             if args.brief:
@@ -297,6 +306,70 @@ def call_illuminate(args):
         data = IlluminateReputationResponse.process(results)
     return data
 
+COMMANDS = {
+    'pdns': ('passivetotal.libs.dns.DnsRequest', call_dns),
+    'whois': ('passivetotal.libs.whois.WhoisRequest', call_whois),
+    'ssl': ('passivetotal.libs.ssl.SslRequest', call_ssl),
+    'action': ('passivetotal.libs.actions.ActionsClient', call_actions),
+    'attribute': ('passivetotal.libs.attributes.AttributeRequest', call_attribute),
+    'osint': ('passivetotal.libs.enrichment.EnrichmentRequest', call_osint),
+    'articles': ('passivetotal.libs.articles.ArticlesRequest', call_articles),
+    'artifacts': ('passivetotal.libs.artifacts.ArtifactsRequest', call_artifacts),
+    'summary': ('passivetotal.libs.cards.CardsRequest', call_summary),
+    'cookies': ('passivetotal.libs.cookies.CookiesRequest', call_cookies),
+    'services': ('passivetotal.libs.services.ServicesRequest', call_services),
+    'projects': ('passivetotal.libs.projects.ProjectsRequest', call_projects),
+    'illuminate': ('passivetotal.libs.illuminate.IlluminateRequest', call_illuminate),
+}
+BATCH_CALLS = {
+    cmd: COMMANDS[cmd] for cmd in ['pdns', 'whois', 'ssl', 'attribute', 'osint', 'illuminate']
+}
+WRITE_COMMANDS = ['action', 'projects']
+CACHEABLE_COMMANDS = [
+    'pdns', 'whois', 'ssl', 'attribute', 'osint', 'articles', 'artifacts',
+    'summary', 'cookies', 'services', 'illuminate'
+]
+
+def request_class(cmd):
+    """Import and return the request class for a subcommand.
+
+    Request classes are imported on first use, so starting `pt-client` only loads
+    the wrapper for the command being run.
+    """
+    module, name = COMMANDS[cmd][0].rsplit('.', 1)
+    return getattr(importlib.import_module(module), name)
+
+def call_batch(args):
+    """Run one subcommand for every query in a batch file and stream the results."""
+    call = BATCH_CALLS[args.cmd][1]
+    if args.concurrency < 1:
+        raise ValueError("Concurrency must be at least 1")
+    if args.format in [None, 'json']:
+        args.format = 'jsonl'
+    if args.format not in BATCH_FORMATS:
+        raise ValueError("Batch mode supports {} output".format(' or '.join(BATCH_FORMATS)))
+    client = request_class(args.cmd).from_config(session=pooled_session(args.concurrency))
+
+    def call_one(query):
+        scoped = copy(args)
+        if args.cmd == 'illuminate':
+            scoped.hosts = [query]
+        else:
+            scoped.query = query
+        return call(scoped, client)
+
+    writer = BatchWriter(args.format)
+    return run_batch(call_one, read_queries(args.batch), writer, args.concurrency)
+
+def add_query_arguments(parser, help):
+    """Add mutually exclusive --query and --batch arguments to a subcommand parser."""
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--query', '-q', help=help)
+    group.add_argument('--batch', '-b', metavar='FILE',
+                       help="Read queries from a file, one per line ('-' for stdin)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="Number of concurrent API queries in batch mode")
+
 def write_output(results, arguments):
     """Format data based on the type.
 
@@ -306,6 +379,8 @@ def write_output(results, arguments):
     """
     if not arguments.format:
         arguments.format = 'json'
+    if arguments.format == 'jsonl':
+        return [json.dumps(results._results)]
     data = [getattr(results, arguments.format)]
 
     return data
@@ -320,15 +395,19 @@ def days_back(days):
     return past.date().isoformat() + ' 00:00:00'
 
 
-def main():
+def build_parser():
+    """Build the argument parser for all pt-client subcommands."""
     parser = ArgumentParser(
         description="PassiveTotal Command Line Client",
         prog='passivetotal')
+    parser.add_argument('--server', default=os.environ.get('PT_CLIENT_SERVER'),
+                        help="Forward the query to a running 'pt-client serve' process at this "
+                             "Unix socket path or http://127.0.0.1:PORT address "
+                             "(defaults to $PT_CLIENT_SERVER)")
     subs = parser.add_subparsers(dest='cmd')
 
     pdns = subs.add_parser('pdns', help="Query passive DNS data")
-    pdns.add_argument('--query', '-q', required=True,
-                      help="Query for a domain, IP address or wildcard")
+    add_query_arguments(pdns, "Query for a domain, IP address or wildcard")
     pdns.add_argument('--sources', type=str, default=None,
                       help="CSV string of passive DNS sources", nargs='+')
     pdns.add_argument('--end', '-e', default=None, type=valid_date,
@@ -339,38 +418,35 @@ def main():
                       help="Timeout to use for passive DNS source queries")
     pdns.add_argument('--unique', action="store_true",
                       help="Use this to only get back unique resolutons")
-    pdns.add_argument('--format', choices=['json', 'csv'],
+    pdns.add_argument('--format', choices=['json', 'csv', 'jsonl'],
                       help="Format of the output from the query")
 
     whois = subs.add_parser('whois', help="Query WHOIS data")
-    whois.add_argument('--query', '-q', required=True,
-                       help="Query for a domain or IP address")
+    add_query_arguments(whois, "Query for a domain or IP address")
     whois.add_argument('--field', '-f', type=str, default=None,
                        help="Run a specific query against a WHOIS field")
     whois.add_argument('--compact', action="store_true",
                        help="Show WHOIS record in a compact way")
-    whois.add_argument('--format', choices=['json'],
+    whois.add_argument('--format', choices=['json', 'jsonl'],
                        help="Format of the output from the query")
 
     ssl = subs.add_parser('ssl', help="Query SSL certificate data")
-    ssl.add_argument('--query', '-q', required=True,
-                     help="Query for an IP address or SHA-1")
+    add_query_arguments(ssl, "Query for an IP address or SHA-1")
     ssl.add_argument('--field', '-f', type=str, default=None,
                      help="Run a specific query against a certificate field")
     ssl.add_argument('--type', '-t', choices=['search', 'history'],
                      help="Perform a plain search or get history")
     ssl.add_argument('--compact', action="store_true",
                      help="Show SSL record in a compact way")
-    ssl.add_argument('--format', choices=['json', 'csv'],
+    ssl.add_argument('--format', choices=['json', 'csv', 'jsonl'],
                      help="Format of the output from the query")
 
     attribute = subs.add_parser('attribute', help="Query host attribute data")
-    attribute.add_argument('--query', '-q', required=True,
-                           help="Query for a domain or IP address")
+    add_query_arguments(attribute, "Query for a domain or IP address")
     attribute.add_argument('--type', '-t', choices=['tracker', 'component', 'cookie'],
                            help="Query tracker data or component data",
                            required=True)
-    attribute.add_argument('--format', choices=['json', 'csv'],
+    attribute.add_argument('--format', choices=['json', 'csv', 'jsonl'],
                            help="Format of the output from the query")
 
     action = subs.add_parser('action', help="Query and input feedback")
@@ -405,9 +481,8 @@ def main():
                         help="Format of the output from the query")
 
     osint = subs.add_parser('osint', help="Query OSINT data")
-    osint.add_argument('--query', '-q', required=True,
-                       help="Query for a domain or IP address")
-    osint.add_argument('--format', choices=['json'],
+    add_query_arguments(osint, "Query for a domain or IP address")
+    osint.add_argument('--format', choices=['json', 'jsonl'],
                        help="Format of the output from the query")
 
     articles = subs.add_parser('articles', help="Query Articles data")
@@ -525,52 +600,131 @@ def main():
     illuminate = subs.add_parser('illuminate', help="Query RiskIQ Illuminate API")
     illuminate.add_argument('--reputation', dest='illuminate_cmd', action='store_const', const='reputation',
                         help="Get hostname or IP reputation from RiskIQ Illuminate.")
-    illuminate.add_argument('--format', choices=['json','csv','text'], default='json',
+    illuminate.add_argument('--format', choices=['json','csv','text','jsonl'], default='json',
                         help="Format of the output from the query")
     illuminate.add_argument('--brief', action='store_true',
                         help="Create a brief output; for reputation, prints score and classification only")
-    illuminate.add_argument('hosts', metavar='query', nargs='+',
+    illuminate.add_argument('--batch', '-b', metavar='FILE', default=None,
+                        help="Read hostnames or IPs from a file, one per line ('-' for stdin)")
+    illuminate.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="Number of concurrent API queries in batch mode")
+    illuminate.add_argument('hosts', metavar='query', nargs='*',
                         help="One or more hostnames or IPs")
-    args, unknown = parser.parse_known_args()
-    data = None
-
+    serve = subs.add_parser('serve', help="Run a long-lived server that keeps clients and results warm")
+    serve.add_argument('--socket', default=None,
+                       help="Unix socket path to listen on (defaults to pt-client.sock in "
+                            "$XDG_RUNTIME_DIR or ~/.config/passivetotal)")
+    serve.add_argument('--http', type=int, default=None, metavar='PORT',
+                       help="Listen on 127.0.0.1:PORT over HTTP instead of a Unix socket")
+    serve.add_argument('--cache-ttl', type=int, default=None,
+                       help="Seconds to keep query results in memory, 0 to disable (defaults to 300)")
+    serve.add_argument('--cache-size', type=int, default=None,
+                       help="Maximum number of query results to keep in memory (defaults to 10000)")
+    serve.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                       help="Size of the shared HTTP connection pool")
+    return parser
+
+def run_command(args, client=None):
+    """Run a parsed subcommand and return its formatted output."""
+    if args.cmd not in COMMANDS:
+        raise ValueError("Unknown command")
+    if args.cmd == 'illuminate' and not args.hosts:
+        raise ValueError("One or more queries or --batch is required")
+    call = COMMANDS[args.cmd][1]
+    return write_output(call(args, client), args)
+
+def call_serve(args):
+    """Serve pt-client commands from one process with shared clients and a response cache."""
+    from passivetotal.cli.server import (
+        Dispatcher, ResponseCache, DEFAULT_CACHE_SIZE, DEFAULT_CACHE_TTL, serve
+    )
+    parser = build_parser()
+    session = pooled_session(args.concurrency)
+    clients = {}
+    lock = threading.Lock()
+
+    def get_client(cmd):
+        with lock:
+            if cmd not in clients:
+                clients[cmd] = request_class(cmd).from_config(session=session)
+            return clients[cmd]
+
+    def run(scoped):
+        return run_command(scoped, get_client(scoped.cmd))
+
+    cache = ResponseCache(DEFAULT_CACHE_TTL if args.cache_ttl is None else args.cache_ttl,
+                          DEFAULT_CACHE_SIZE if args.cache_size is None else args.cache_size)
+    dispatcher = Dispatcher(lambda argv: parser.parse_known_args(argv)[0], run,
+                            CACHEABLE_COMMANDS, cache, refused=WRITE_COMMANDS)
+    serve(dispatcher, args.socket, args.http)
+
+def explicit_server(argv):
+    """Return True if --server was passed on the command line rather than set by $PT_CLIENT_SERVER."""
+    return any(arg == '--server' or arg.startswith('--server=') for arg in argv)
+
+def runs_locally(args):
+    """Return True for commands that are never forwarded to a server: batches and writes."""
+    return bool(getattr(args, 'batch', None)) or args.cmd in WRITE_COMMANDS
+
+def call_remote(args, argv):
+    """Forward a command to a running server and return its output."""
+    from passivetotal.cli.server import forward
+    if getattr(args, 'batch', None):
+        raise ValueError("--batch runs locally and cannot be combined with --server")
+    if args.cmd in WRITE_COMMANDS:
+        raise ValueError("'{}' writes data, runs locally and cannot be combined with --server".format(args.cmd))
+    argv = list(argv)
+    for i, arg in enumerate(argv):
+        if arg == '--server':
+            del argv[i:i + 2]
+            break
+        if arg.startswith('--server='):
+            del argv[i]
+            break
     try:
-        if args.cmd == 'pdns':
-            data = call_dns(args)
-        elif args.cmd == 'whois':
-            data = call_whois(args)
-        elif args.cmd == 'ssl':
-            data = call_ssl(args)
-        elif args.cmd == 'action':
-            data = call_actions(args)
-        elif args.cmd == 'attribute':
-            data = call_attribute(args)
-        elif args.cmd == 'osint':
-            data = call_osint(args)
-        elif args.cmd == 'articles':
-            data = call_articles(args)
-        elif args.cmd == 'artifacts':
-            data = call_artifacts(args)
-        elif args.cmd == 'summary':
-            data = call_summary(args)
-        elif args.cmd == 'cookies':
-            data = call_cookies(args)
-        elif args.cmd == 'services':
-            data = call_services(args)
-        elif args.cmd == 'projects':
-            data = call_projects(args)
-        elif args.cmd == 'illuminate':
-            data = call_illuminate(args)
-        else:
+        response = forward(args.server, {'argv': argv})
+    except (OSError, ValueError) as e:
+        raise ValueError("Could not reach server at {}: {}".format(args.server, e))
+    if not response.get('ok'):
+        raise ValueError(response.get('error'))
+    return response['output']
+
+def main():
+    parser = build_parser()
+    argv = sys.argv[1:]
+    args, unknown = parser.parse_known_args(argv)
+
+    if args.cmd == 'serve':
+        try:
+            call_serve(args)
+        except (OSError, ValueError) as e:
+            sys.stderr.write('{}\n'.format(str(e)))
+            sys.exit(1)
+        return
+    if args.cmd is None:
+        parser.print_usage()
+        sys.exit(1)
+    if args.server and runs_locally(args) and not explicit_server(argv):
+        args.server = None
+    if getattr(args, 'batch', None) and not args.server:
+        try:
+            errors = call_batch(args)
+        except ValueError as e:
             parser.print_usage()
+            sys.stderr.write('{}\n'.format(str(e)))
             sys.exit(1)
+        sys.exit(1 if errors else 0)
 
+    try:
+        if args.server:
+            output = call_remote(args, argv)
+        else:
+            output = run_command(args)
     except ValueError as e:
         parser.print_usage()
         sys.stderr.write('{}\n'.format(str(e)))
         sys.exit(1)
 
-    output = write_output(data, args)
     for item in output:
         print(item + "\n")
 
@@ -44,6 +44,13 @@ def main():
         help='Show current PassiveTotal API configuration.')
     show_parser.add_argument('--plaintext', action='store_true', default=False,
         help='Show API secrets in plaintext.')
+
+    suffix_parser = subs.add_parser('refresh-suffixes',
+        help='Download the public suffix list used offline to extract registered domains.')
+    suffix_parser.add_argument('--path', default=None,
+        help='Where to save the list; defaults to the PassiveTotal config directory')
+    suffix_parser.add_argument('--url', default=None,
+        help='URL of the public suffix list')
     
     args = parser.parse_args()
 
@@ -61,6 +68,10 @@ def main():
         config_options['https_proxy'] = args.https_proxy
         config = Config(**config_options)
         show_config(config)
+    elif args.cmd == 'refresh-suffixes':
+        from passivetotal.analyzer.suffixes import refresh_suffix_list, SUFFIX_LIST_URL
+        path = refresh_suffix_list(args.path, args.url or SUFFIX_LIST_URL)
+        print("Saved public suffix list to {}".format(path))
     else:
         parser.print_usage()
 
@@ -0,0 +1,344 @@
+"""Long-running pt-client server and the thin client that forwards to it.
+
+The server keeps API clients, their pooled session and a response cache in
+memory between invocations. Requests are JSON documents carrying the same
+command line arguments `pt-client` accepts, sent over a Unix socket as one
+line per request, or POSTed to a localhost HTTP endpoint.
+
+The Unix socket lives in a directory private to the user running the server,
+and the client only connects to a socket that user owns. HTTP
+requests must carry the per-server token written to a file only that user
+can read, and are refused if they come from a browser.
+"""
+
+import hmac
+import json
+import os
+import secrets
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from passivetotal.config import CONFIG_PATH
+
+SOCKET_DIR = os.environ.get('XDG_RUNTIME_DIR') or CONFIG_PATH
+DEFAULT_SOCKET = os.path.join(SOCKET_DIR, 'pt-client.sock')
+TOKEN_DIR = CONFIG_PATH
+DEFAULT_CACHE_TTL = 300
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_TIMEOUT = 60
+
+
+class ResponseCache(object):
+
+    """Thread-safe least-recently-used cache with a time-to-live per entry."""
+
+    def __init__(self, ttl=DEFAULT_CACHE_TTL, maxsize=DEFAULT_CACHE_SIZE):
+        """Initialize the cache.
+
+        :param int ttl: Seconds an entry stays valid, 0 disables caching
+        :param int maxsize: Maximum number of entries to keep
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return a cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry when full."""
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Dispatcher(object):
+
+    """Execute forwarded pt-client commands against warm clients and a response cache."""
+
+    def __init__(self, parse, run, cacheable, cache=None, refused=()):
+        """Initialize the dispatcher.
+
+        :param parse: Callable that turns an argument list into a Namespace
+        :param run: Callable that executes a Namespace and returns a list of output strings
+        :param cacheable: Commands whose output may be served from the cache
+        :param cache: :class:`ResponseCache` instance (optional)
+        :param refused: Commands that must run locally, such as those that write data (optional)
+        """
+        self.parse = parse
+        self.run = run
+        self.cacheable = set(cacheable)
+        self.refused = set(refused)
+        self.cache = cache if cache is not None else ResponseCache()
+        self.started = time.time()
+        self.requests = 0
+
+    def stats(self):
+        """Return server statistics."""
+        return {
+            'uptime': round(time.time() - self.started, 3),
+            'requests': self.requests,
+            'cache_entries': len(self.cache),
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+        }
+
+    def handle(self, request):
+        """Handle one decoded request and return a response dictionary.
+
+        Requests are either `{"argv": [...]}` to run a command or
+        `{"op": "stats"}` to read server statistics.
+        """
+        self.requests += 1
+        if request.get('op') == 'stats':
+            return {'ok': True, 'stats': self.stats()}
+        argv = request.get('argv')
+        if not isinstance(argv, list):
+            return {'ok': False, 'error': 'Request must contain an argv list', 'error_type': 'ValueError'}
+        try:
+            args = self.parse([str(arg) for arg in argv])
+        except SystemExit:
+            return {'ok': False, 'error': 'Invalid arguments: {}'.format(' '.join(argv)),
+                    'error_type': 'ValueError'}
+        if args.cmd in self.refused or args.cmd in (None, 'serve') or getattr(args, 'batch', None):
+            return {'ok': False, 'error': 'Command cannot be run by the server', 'error_type': 'ValueError'}
+        key = None
+        if args.cmd in self.cacheable:
+            key = json.dumps(vars(args), sort_keys=True, default=str)
+            output = self.cache.get(key)
+            if output is not None:
+                return {'ok': True, 'output': output, 'cached': True}
+        try:
+            output = self.run(args)
+        except Exception as e:
+            return {'ok': False, 'error': str(e), 'error_type': type(e).__name__}
+        if key is not None:
+            self.cache.set(key, output)
+        return {'ok': True, 'output': output, 'cached': False}
+
+    def handle_raw(self, raw):
+        """Decode a JSON request, handle it and encode the response."""
+        try:
+            request = json.loads(raw)
+        except ValueError as e:
+            response = {'ok': False, 'error': 'Invalid JSON: {}'.format(e), 'error_type': 'ValueError'}
+        else:
+            response = self.handle(request)
+        return json.dumps(response).encode('utf-8')
+
+
+class _UnixHandler(socketserver.StreamRequestHandler):
+
+    """Serve newline-delimited JSON requests on a Unix socket connection."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            self.wfile.write(self.server.dispatcher.handle_raw(line) + b'\n')
+            self.wfile.flush()
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+
+    """Serve JSON requests POSTed to a localhost HTTP endpoint.
+
+    Requests need the server token in an `Authorization: Bearer` header and an
+    `application/json` body. Any request with an `Origin` header is refused, so
+    web pages cannot reach the server through the browser.
+    """
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        supplied = self.headers.get('Authorization', '')
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if self.headers.get('Origin') is not None:
+            return self._refuse(403, 'Cross-origin requests are not allowed')
+        if not hmac.compare_digest(supplied.encode('utf-8'), 'Bearer {}'.format(self.server.token).encode('utf-8')):
+            return self._refuse(401, 'Missing or invalid server token')
+        if content_type != 'application/json':
+            return self._refuse(415, 'Requests must be application/json')
+        self._respond(200, self.server.dispatcher.handle_raw(body))
+
+    def _refuse(self, status, error):
+        self._respond(status, json.dumps({'ok': False, 'error': error, 'error_type': 'PermissionError'}).encode('utf-8'))
+
+    def _respond(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def token_path(port):
+    """Path of the token file for an HTTP server on a localhost port."""
+    return os.path.join(TOKEN_DIR, 'server-{}.token'.format(port))
+
+def write_token(port):
+    """Generate a token for an HTTP server and save it readable only by the current user.
+
+    :param int port: Localhost port of the server
+    :return: The token
+    """
+    token = secrets.token_urlsafe(32)
+    os.makedirs(TOKEN_DIR, mode=0o700, exist_ok=True)
+    path = token_path(port)
+    if os.path.exists(path):
+        os.unlink(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w') as stream:
+        stream.write(token)
+    return token
+
+def read_token(address):
+    """Token for the HTTP server at an http://127.0.0.1:PORT address.
+
+    Uses `$PT_CLIENT_TOKEN` when set, and otherwise the token file the server wrote.
+    """
+    if os.environ.get('PT_CLIENT_TOKEN'):
+        return os.environ['PT_CLIENT_TOKEN']
+    port = address.rstrip('/').rsplit(':', 1)[-1]
+    try:
+        with open(token_path(port)) as stream:
+            return stream.read().strip()
+    except OSError:
+        return ''
+
+def make_server(dispatcher, socket_path=None, http_port=None, token=None):
+    """Build a threaded server for a dispatcher.
+
+    Listens on a Unix socket by default, or on 127.0.0.1 when `http_port` is set.
+    The default socket is in `XDG_RUNTIME_DIR`, or in the 0700 configuration
+    directory when that is not set. A stale socket file left by a previous server is removed; a socket with a
+    live server behind it raises `ValueError`. The socket is created with a
+    0077 umask, so no other user can connect to it.
+
+    :param dispatcher: :class:`Dispatcher` instance
+    :param str socket_path: Path of the Unix socket (optional)
+    :param int http_port: Localhost port for HTTP mode (optional)
+    :param str token: Token HTTP requests must carry (optional, defaults to a new token saved with `write_token`)
+    :return: socketserver server instance
+    """
+    if http_port is not None:
+        server = ThreadingHTTPServer(('127.0.0.1', http_port), _HTTPHandler)
+        server.token = token or write_token(server.server_address[1])
+    else:
+        socket_path = socket_path or DEFAULT_SOCKET
+        if os.path.dirname(socket_path):
+            os.makedirs(os.path.dirname(socket_path), mode=0o700, exist_ok=True)
+        if os.path.exists(socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(socket_path)
+            except OSError:
+                os.unlink(socket_path)
+            else:
+                raise ValueError('A server is already listening on {}'.format(socket_path))
+            finally:
+                probe.close()
+        umask = os.umask(0o077)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(socket_path, _UnixHandler)
+        finally:
+            os.umask(umask)
+    server.daemon_threads = True
+    server.dispatcher = dispatcher
+    return server
+
+
+def serve(dispatcher, socket_path=None, http_port=None):
+    """Run a server until interrupted or terminated."""
+    server = make_server(dispatcher, socket_path, http_port)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    if http_port is not None:
+        address = 'http://127.0.0.1:{}'.format(server.server_address[1])
+        sys.stderr.write('pt-client server token saved to {}\n'.format(token_path(server.server_address[1])))
+    else:
+        address = server.server_address
+    sys.stderr.write('pt-client server listening on {}\n'.format(address))
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        if http_port is None and os.path.exists(server.server_address):
+            os.unlink(server.server_address)
+        elif http_port is not None and os.path.exists(token_path(server.server_address[1])):
+            os.unlink(token_path(server.server_address[1]))
+
+
+def check_owner(path):
+    """Raise `ValueError` unless a Unix socket belongs to the current user.
+
+    Stops queries from being sent to a socket another local user created first.
+    """
+    if os.stat(path).st_uid != os.getuid():
+        raise ValueError('{} is not owned by the current user'.format(path))
+
+
+def forward(address, request, timeout=DEFAULT_TIMEOUT, token=None):
+    """Send one request to a running server and return the decoded response.
+
+    Unix sockets are only used when they belong to the current user.
+
+    :param str address: Unix socket path, or an http://127.0.0.1:PORT URL
+    :param dict request: Request document
+    :param int timeout: Seconds to wait for the response
+    :param str token: Token for an HTTP server (optional, defaults to `read_token(address)`)
+    :return: Response dictionary
+    """
+    payload = json.dumps(request).encode('utf-8')
+    if address.startswith('http://') or address.startswith('https://'):
+        headers = {
+            'Content-Type': 'application/json',
+            'Authorization': 'Bearer {}'.format(token or read_token(address)),
+        }
+        try:
+            with urlopen(Request(address, data=payload, headers=headers), timeout=timeout) as response:
+                return json.loads(response.read())
+        except HTTPError as e:
+            return json.loads(e.read())
+    check_owner(address)
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(timeout)
+    try:
+        conn.connect(address)
+        conn.sendall(payload + b'\n')
+        with conn.makefile('rb') as stream:
+            return json.loads(stream.readline())
+    finally:
+        conn.close()
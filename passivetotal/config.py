@@ -5,6 +5,8 @@ __version__ = '1.0.0'
 import json
 import os
 import sys
+import tempfile
+import threading
 
 CONFIG_PATH = os.path.expanduser('~/.config/passivetotal')
 CONFIG_FILE = os.path.join(CONFIG_PATH, 'api_config.json')
@@ -14,56 +16,116 @@ CONFIG_DEFAULTS = {
     'api_key': '',
     'username': ''
 }
+CONFIG_FILE_ENV = 'PT_CONFIG_FILE'
+CONFIG_ENV = {
+    'username': 'PT_USERNAME',
+    'api_key': 'PT_API_KEY',
+    'api_server': 'PT_API_SERVER',
+    'api_version': 'PT_API_VERSION',
+    'http_proxy': 'PT_HTTP_PROXY',
+    'https_proxy': 'PT_HTTPS_PROXY',
+}
 
 
 class Config(object):
 
-    """Manage configuration to ease library use."""
+    """Manage configuration to ease library use.
+
+    Values come from the defaults, then the configuration file, then
+    environment variables (see `CONFIG_ENV`). Keyword arguments are
+    saved to the configuration file; loading never writes to disk.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
 
     def __init__(self, **kwargs):
         """Initialize the class."""
-        self.config = CONFIG_DEFAULTS
+        self.config = dict(CONFIG_DEFAULTS)
         try:
             self.load_config(**kwargs)
         except ValueError as e:
-            sys.stderr.write('Error: {}\n'.format(e.message))
+            sys.stderr.write('Error: {}\n'.format(e))
             sys.exit(1)
 
+    @classmethod
+    def shared(cls):
+        """Return the process-wide configuration, reading it from disk on first use.
+
+        The instance is shared by every client created with `from_config` and is
+        inherited as-is by forked worker processes.
+
+        :return: Config instance
+        """
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    def reset_shared(cls):
+        """Discard the process-wide configuration so the next call to `shared` reloads it."""
+        cls._shared = None
+
+    @classmethod
+    def _after_fork(cls):
+        """Replace the lock in a forked child in case the parent held it while forking."""
+        cls._shared_lock = threading.Lock()
+
+    @property
+    def config_file(self):
+        """Path of the configuration file, overridable with $PT_CONFIG_FILE."""
+        return os.environ.get(CONFIG_FILE_ENV) or CONFIG_FILE
+
     def write_config(self):
         """Write the configuration to a local file.
 
+        The file is replaced atomically and is only readable by the owner,
+        so concurrent readers never see a partial file.
+
         :return: Boolean if successful
         """
-        json.dump(
-            self.config,
-            open(CONFIG_FILE, 'w'),
-            indent=4,
-            separators=(',', ': ')
-        )
+        path = os.path.dirname(self.config_file)
+        if path:
+            os.makedirs(path, exist_ok=True)
+        handle, temp = tempfile.mkstemp(dir=path or None, prefix='.api_config.')
+        try:
+            with os.fdopen(handle, 'w') as stream:
+                json.dump(self.config, stream, indent=4, separators=(',', ': '))
+            os.chmod(temp, 0o600)
+            os.replace(temp, self.config_file)
+        except BaseException:
+            os.unlink(temp)
+            raise
+        Config.reset_shared()
         return True
 
     def load_config(self, **kwargs):
-        """Load the configuration for the user or seed it with defaults.
+        """Load the configuration for the user or fall back to defaults.
+
+        Keyword arguments are merged in and written to the configuration file.
 
         :return: Boolean if successful
         """
-        virgin_config = False
-        if not os.path.exists(CONFIG_PATH):
-            virgin_config = True
-            os.makedirs(CONFIG_PATH)
-        if not os.path.exists(CONFIG_FILE):
-            virgin_config = True
-        if not virgin_config:
-            self.config = json.load(open(CONFIG_FILE))
+        stored = {}
+        if os.path.exists(self.config_file):
+            with open(self.config_file) as stream:
+                stored = json.load(stream)
+            self.config.update(stored)
         if kwargs:
             self.config.update(kwargs)
-        if virgin_config or kwargs:
             self.write_config()
-        if 'api_key' not in self.config:
+        for key, var in CONFIG_ENV.items():
+            if os.environ.get(var):
+                self.config[key] = os.environ[var]
+        missing = [key for key in ['api_key', 'username']
+                   if stored and key not in stored and not os.environ.get(CONFIG_ENV[key])]
+        if 'api_key' in missing:
             sys.stderr.write('configuration missing API key\n')
-        if 'username' not in self.config:
+        if 'username' in missing:
             sys.stderr.write('configuration missing username\n')
-        if not ('api_key' in self.config and 'username' in self.config):
+        if missing:
             sys.stderr.write('Errors have been reported. Run pt-config '
                              'to fix these warnings.\n')
         return True
@@ -84,3 +146,7 @@ class Config(object):
         :return: Configuration value
         """
         return self.config.get(item, default)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=Config._after_fork)
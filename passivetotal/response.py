@@ -22,10 +22,11 @@ class Response(object):
         """
         self.logger = logging.getLogger('pt-base-response')
         self.logger.setLevel('INFO')
-        shandler = logging.StreamHandler(sys.stdout)
-        fmtr = logging.Formatter('\033[1;32m%(levelname)-5s %(module)s:%(funcName)s():%(lineno)d %(asctime)s\033[0m| %(message)s')
-        shandler.setFormatter(fmtr)
-        self.logger.addHandler(shandler)
+        if not self.logger.handlers: # loggers are global; add the handler only once
+            shandler = logging.StreamHandler(sys.stdout)
+            fmtr = logging.Formatter('\033[1;32m%(levelname)-5s %(module)s:%(funcName)s():%(lineno)d %(asctime)s\033[0m| %(message)s')
+            shandler.setFormatter(fmtr)
+            self.logger.addHandler(shandler)
         if 'debug' in kwargs:
             self.logger.setLevel('DEBUG')
         self.logger.debug("Results: %s" % str(response))
@@ -21,7 +21,7 @@ setup(
     author="RiskIQ",
     author_email="admin@passivetotal.org",
     license="GPLv2",
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     install_requires=['requests', 'python-dateutil', 'future', 'tldextract'],
     long_description=read('README.md'),
     long_description_content_type="text/markdown",
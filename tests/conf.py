@@ -1,5 +1,7 @@
 import json
 import os.path
+import threading
+import time
 
 current_version = 'v2'
 
@@ -21,3 +23,47 @@ def fake_request(*args, **kwargs):
         raw_data = response.read().decode('utf-8')
     return json.loads(raw_data)
 
+def fake_asi_request(calls, fail=()):
+    """Route attack surface API paths to small synthetic responses."""
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def request(client, endpoint, action, *args, **params):
+        with lock:
+            calls.append('/'.join([action] + list(args)))
+            active[0] += 1
+            active[1] = max(active)
+        time.sleep(0.005)
+        with lock:
+            active[0] -= 1
+        path = '/'.join([action] + list(args))
+        if path == 'third-party':
+            return {'totalCount': 2, 'vendors': [
+                {'id': 10, 'name': 'Vendor A', 'priorities': {}},
+                {'id': 11, 'name': 'Vendor B', 'priorities': {}},
+            ]}
+        if path in ['third-party/10', 'third-party/11']:
+            return {'id': int(args[0]), 'name': 'Vendor', 'priorities': {
+                level: {'observationCount': count} for level, count in [('high', 2), ('medium', 1), ('low', 0)]}}
+        if path in fail:
+            from passivetotal.analyzer import AnalyzerError
+            raise AnalyzerError('Server error')
+        if '/priority/' in path:
+            vendor, level = path.split('/')[1], path.split('/')[-1]
+            return {'activeInsightCount': 1, 'totalInsightCount': 2, 'totalObservations': 1, 'insights': [
+                {'name': 'Active {}'.format(level), 'observationCount': 1,
+                 'link': 'https://api/attack-surface/third-party/{}/insight/{}?groupBy=x&segmentBy=y'.format(vendor, level)},
+                {'name': 'Quiet {}'.format(level), 'observationCount': 0,
+                 'link': 'https://api/attack-surface/third-party/{}/insight/q{}?groupBy=x&segmentBy=y'.format(vendor, level)},
+            ]}
+        if '/insight/' in path:
+            return {'totalCount': 1, 'assets': [{'type': 'HOST', 'name': 'www.example.com'}]}
+        if path.endswith('/cves'):
+            return {'totalCount': 1, 'cves': [{'cveId': 'CVE-2021-0001', 'observationCount': 1, 'priorityScore': 90}]}
+        if path.endswith('/observations'):
+            return {'totalCount': 1, 'assets': [{'type': 'IP_ADDRESS', 'name': '10.0.0.1'}]}
+        if path.endswith('/components'):
+            return {'totalCount': 1, 'vulnerableComponents': [{'type': 'Server', 'name': 'nginx', 'count': 1}]}
+        raise AssertionError('Unexpected request {}'.format(path))
+    request.max_active = active
+    return request
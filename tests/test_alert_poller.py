@@ -0,0 +1,67 @@
+from unittest.mock import patch
+import os
+import tempfile
+import unittest
+
+from passivetotal import analyzer
+from passivetotal.analyzer.projects import Project, ProjectAlertPoller
+
+
+class ProjectAlertPollerTestCase(unittest.TestCase):
+
+    """Test case for incremental project alert polling."""
+
+    def setUp(self):
+        self.calls = []
+        self.alerts = [
+            {'artifact': 'a{}'.format(i % 2), 'query': 'q', 'type': 'DNS', 'change': 'added',
+             'result': '10.0.0.{}'.format(i), 'datetime': '2026-10-01T00:{:02d}:00'.format(i)}
+            for i in range(5)
+        ]
+        def request(client, endpoint, action, *args, **params):
+            self.calls.append(params)
+            if endpoint == 'artifact':
+                return {'artifacts': [{'guid': 'a0', 'query': 'q'}, {'guid': 'a1', 'query': 'q'}]}
+            matching = [ a for a in self.alerts if (a['datetime'] or params['start']).replace('T', ' ') >= params['start'] ]
+            page = matching[params['page'] * params['size']:(params['page'] + 1) * params['size']]
+            results = {}
+            for alert in page:
+                results.setdefault(alert['artifact'], []).append(alert)
+            return {'totalRecords': len(matching), 'results': results}
+        self.patcher = patch('passivetotal.api.Client._get', request)
+        self.patcher.start()
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+        response = {key: None for key in [
+            'active', 'name', 'description', 'visibility', 'featured', 'tags', 'owner', 'creator', 'created',
+            'organization', 'collaborators', 'link', 'links', 'subscribers', 'can_edit']}
+        response['guid'] = 'p1'
+        self.project = Project(response)
+        self.path = os.path.join(tempfile.mkdtemp(), 'alerts.json')
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_poll(self):
+        """Test polls page concurrently, return only new alerts and persist the watermark."""
+        poller = self.project.alert_poller(self.path, start='2026-09-01', pagesize=2, concurrency=4)
+        alerts = poller.poll()
+        assert [a.result for a in alerts] == ['10.0.0.{}'.format(i) for i in range(5)]
+        assert alerts[1].artifact.guid == 'a1'
+        assert len([c for c in self.calls if 'page' in c]) == 3
+        assert poller.watermark == '2026-10-01 00:04:00'
+        assert poller.poll() == []
+        self.alerts.append(dict(self.alerts[0], result='10.0.0.9', datetime='2026-10-01T00:05:00'))
+        resumed = ProjectAlertPoller(self.project, self.path)
+        assert resumed.watermark == '2026-10-01 00:04:00'
+        assert [a.result for a in resumed.poll()] == ['10.0.0.9']
+        assert [c['start'] for c in self.calls if 'start' in c][-1] == '2026-09-30 23:04:00'
+
+    def test_poll_undated(self):
+        """Test alerts without a datetime are returned once and do not move the watermark."""
+        self.alerts.append(dict(self.alerts[0], result='10.0.0.8', datetime=None))
+        poller = self.project.alert_poller(self.path, start='2026-09-01')
+        assert len(poller.poll()) == 6
+        assert poller.watermark == '2026-10-01 00:04:00'
+        assert poller.poll() == []
+        resumed = ProjectAlertPoller(self.project, self.path)
+        assert resumed.poll() == []
@@ -0,0 +1,44 @@
+from unittest.mock import patch
+import threading
+import unittest
+
+from passivetotal import analyzer
+from passivetotal.analyzer.articles import ArticlesList
+
+
+class ArticleDetailsTestCase(unittest.TestCase):
+
+    """Test case for loading article details across a whole list."""
+
+    def setUp(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.articles = [
+            {'guid': 'a{}'.format(i), 'title': 'Article {}'.format(i), 'type': 'public',
+             'createdDate': '2026-10-0{}T01:00:00.000+0000'.format(i + 1)}
+            for i in range(3)
+        ]
+        self.patcher = patch('passivetotal.api.Client._get', self.fake_request)
+        self.patcher.start()
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+        analyzer.set_concurrency(4)
+
+    def tearDown(self):
+        self.patcher.stop()
+        analyzer.set_concurrency(analyzer.DEFAULT_CONCURRENCY)
+
+    def fake_request(self, endpoint, action, *args, **params):
+        with self.lock:
+            self.calls.append(action)
+        return {'summary': 'Summary', 'publishedDate': '2026-10-01T00:00:00',
+                'createdDate': '2026-10-01T00:00:00',
+                'tags': ['spam'] if action == 'a1' else ['other'], 'categories': [], 'indicators': []}
+
+    def test_load_details(self):
+        """Test list-level operations fetch missing details once per article, concurrently."""
+        articles = ArticlesList({'articles': self.articles + self.articles[:1], 'totalRecords': 4})
+        filtered = articles.filter_tags('spam')
+        assert sorted(self.calls) == ['a0', 'a1', 'a2']
+        assert [a.guid for a in filtered] == ['a1']
+        assert len(articles.as_dict['records']) == 4
+        assert len(self.calls) == 3
@@ -0,0 +1,83 @@
+from unittest.mock import patch
+import os
+import tempfile
+import unittest
+
+from passivetotal import analyzer
+
+
+class ArticleStoreTestCase(unittest.TestCase):
+
+    """Test case for the local article store."""
+
+    def setUp(self):
+        self.calls = []
+        self.articles = [
+            {'guid': 'a{}'.format(i), 'title': 'Article {}'.format(i), 'type': 'public',
+             'createdDate': '2026-10-0{}T01:00:00.000+0000'.format(i + 1)}
+            for i in range(3)
+        ]
+        self.patcher = patch('passivetotal.api.Client._get', self.fake_request())
+        self.patcher.start()
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+        self.path = os.path.join(tempfile.mkdtemp(), 'articles.db')
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def fake_request(self):
+        def request(client, endpoint, action, *args, **params):
+            self.calls.append(action)
+            if action == '':
+                return {'articles': [a for a in self.articles
+                                     if a['createdDate'].replace('T', ' ') >= params['createdAfter']]}
+            return {'summary': 'Summary', 'publishedDate': '2026-10-01T00:00:00',
+                    'createdDate': '2026-10-01T00:00:00',
+                    'tags': ['spam'] if action == 'a1' else ['other'], 'categories': [], 'indicators': []}
+        return request
+
+    def test_incremental_sync(self):
+        """Test only new articles are fetched after the first sync."""
+        store = analyzer.ArticleStore(self.path)
+        assert store.sync('2026-09-01 00:00:00') == 3
+        assert sorted(self.calls) == ['', 'a0', 'a1', 'a2']
+        assert store.watermark == '2026-10-03 01:00:00'
+        self.calls.clear()
+        self.articles.append({'guid': 'a9', 'title': 'New', 'type': 'public',
+                              'createdDate': '2026-10-09T00:00:00.000+0000'})
+        assert store.sync('2026-09-01 00:00:00') == 1
+        assert self.calls == ['', 'a9']
+
+    def test_connections_closed(self):
+        """Test every connection the store opens is closed after use."""
+        import sqlite3
+        connections = []
+        def connect(*args, **kwargs):
+            connections.append(sqlite3_connect(*args, **kwargs))
+            return connections[-1]
+        sqlite3_connect = sqlite3.connect
+        with patch('sqlite3.connect', connect):
+            store = analyzer.ArticleStore(self.path)
+            store.sync('2026-09-01 00:00:00')
+            assert len(store.index) == 3
+        assert connections
+        for db in connections:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                db.execute('SELECT 1')
+
+    def test_all_articles_from_store(self):
+        """Test AllArticles loads from the store and filters without API queries."""
+        articles = analyzer.AllArticles(created_after='2026-09-01 00:00:00', store=self.path)
+        assert len(articles) == 3
+        self.calls.clear()
+        assert [a.guid for a in articles.filter_tags('spam')] == ['a1']
+        assert self.calls == []
+
+    def test_index_scoped_to_list(self):
+        """Test a list loaded from the store indexes only its own articles."""
+        analyzer.ArticleStore(self.path).sync('2026-09-01 00:00:00')
+        articles = analyzer.AllArticles(created_after='2026-10-02 00:00:00', store=self.path)
+        assert sorted(a.guid for a in articles) == ['a1', 'a2']
+        assert len(articles.index) == 2
+        assert articles.index.facets() == {'spam': 1, 'other': 1}
+
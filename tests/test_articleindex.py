@@ -0,0 +1,70 @@
+import unittest
+
+from passivetotal.analyzer.articleindex import ArticleIndex, tokenize
+from passivetotal.analyzer.articles import Article, ArticlesList
+
+
+def make_article(guid, title, summary='', tags=(), indicators=()):
+    return Article({
+        'guid': guid, 'title': title, 'summary': summary, 'type': 'public',
+        'publishedDate': '2026-10-01T00:00:00', 'createdDate': '2026-10-01T00:00:00',
+        'tags': list(tags), 'categories': [],
+        'indicators': [{'type': 'domain', 'count': len(indicators), 'values': list(indicators)}],
+    })
+
+
+class ArticleIndexTestCase(unittest.TestCase):
+
+    """Test case for the article full-text index."""
+
+    def setUp(self):
+        self.articles = [
+            make_article('a0', 'Phishing kit targets banks', 'A phishing campaign.', ['Phishing', 'Banking'],
+                         ['evil.example.com']),
+            make_article('a1', 'Ransomware update', 'New ransomware loader with phishing lures.', ['Ransomware']),
+            make_article('a2', 'Quarterly report', 'Nothing to see.', ['Report']),
+        ]
+        self.index = ArticleIndex(self.articles)
+
+    def test_tokenize(self):
+        """Test hostnames and IPs stay whole when tokenized."""
+        assert tokenize('Seen on evil.example.com and 10.0.0.1.') == ['seen', 'on', 'evil.example.com', 'and', '10.0.0.1']
+
+    def test_match_text_agrees_with_article(self):
+        """Test index substring matches give the same results as Article.match_text."""
+        for text in ['phish', 'SOM', 'an', 'rt', 'x', 'banking', 'missing']:
+            for fields in [['tags', 'title', 'summary'], ['title'], ['tags']]:
+                expected = { a.guid for a in self.articles if a.match_text(text, fields) }
+                assert self.index.match_text(text, fields) == expected, (text, fields)
+
+    def test_search(self):
+        """Test ranked AND/OR searches."""
+        assert [r.article.guid for r in self.index.search('phishing')] == ['a0', 'a1']
+        assert [r.article.guid for r in self.index.search('phishing ransomware')] == ['a1']
+        assert {r.article.guid for r in self.index.search('phishing report', operator='or')} == {'a0', 'a1', 'a2'}
+        assert [r.article.guid for r in self.index.search('evil.example.com')] == ['a0']
+        assert [r.article.guid for r in self.index.search('phishing', tags='Ransomware')] == ['a1']
+        assert len(self.index.search('phishing', limit=1)) == 1
+
+    def test_incremental_update(self):
+        """Test replacing and removing articles updates postings and facets."""
+        self.index.add(make_article('a2', 'Quarterly phishing report', tags=['Phishing']))
+        assert {r.article.guid for r in self.index.search('phishing')} == {'a0', 'a1', 'a2'}
+        assert self.index.facets()['Phishing'] == 2
+        assert 'Report' not in self.index.facets()
+        self.index.remove('a0')
+        assert self.index.match_tags('Phishing') == {'a2'}
+        assert 'evil.example.com' not in [t for t in self.index._postings]
+        assert len(self.index) == 2
+
+    def test_list_filters(self):
+        """Test ArticlesList filters are routed through the index."""
+        articles = ArticlesList({'articles': [], 'totalRecords': 3})
+        articles._records = list(self.articles)
+        assert [a.guid for a in articles.filter_text('PHISH')] == ['a0', 'a1']
+        assert [a.guid for a in articles.filter_tags('Report,Banking')] == ['a0', 'a2']
+        index = articles.index
+        articles._records.append(make_article('a3', 'Phishing again'))
+        assert articles.index is index
+        assert [a.guid for a in articles.filter_text('phish', ['title'])] == ['a0', 'a3']
+        assert [r.article for r in articles.search('again')] == [articles[3]]
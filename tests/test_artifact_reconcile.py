@@ -0,0 +1,90 @@
+from itertools import count
+from unittest.mock import patch
+import unittest
+
+from passivetotal import analyzer
+from passivetotal.analyzer.projects import Project
+
+
+class ArtifactReconcileTestCase(unittest.TestCase):
+
+    """Test case for reconciling project artifacts with bulk requests."""
+
+    def setUp(self):
+        self.sent = []
+        self.ids = count()
+        self.artifacts = {
+            'g1': {'guid': 'g1', 'query': 'keep.example.com', 'monitor': False, 'user_tags': ['a']},
+            'g2': {'guid': 'g2', 'query': 'Retag.example.com', 'monitor': True, 'user_tags': ['old']},
+            'g3': {'guid': 'g3', 'query': 'stale.example.com', 'monitor': False, 'user_tags': []},
+        }
+        self.patchers = [
+            patch('passivetotal.api.Client._get', lambda client, *args, **kwargs: self.fake_get(*args, **kwargs)),
+            patch('passivetotal.api.Client._send_data', lambda client, *args, **kwargs: self.fake_send(*args, **kwargs)),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+        response = {key: None for key in [
+            'active', 'name', 'description', 'visibility', 'featured', 'tags', 'owner', 'creator', 'created',
+            'organization', 'collaborators', 'link', 'links', 'subscribers', 'can_edit']}
+        response['guid'] = 'p1'
+        self.project = Project(response)
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def fake_get(self, endpoint, action, *args, **params):
+        return {'artifacts': list(self.artifacts.values())}
+
+    def fake_send(self, method, endpoint, action, data, *args, **params):
+        self.sent.append((method, action, data))
+        if method == 'PUT':
+            for artifact in data['artifacts']:
+                guid = 'new{}'.format(next(self.ids))
+                self.artifacts[guid] = {'guid': guid, 'query': artifact['query'], 'monitor': False,
+                                        'user_tags': artifact.get('tags', [])}
+        elif method == 'POST':
+            for update in data['artifacts']:
+                self.artifacts[update['artifact']].update(update)
+        else:
+            del self.artifacts[data['artifact']]
+        return {}
+
+    def test_plan(self):
+        """Test the minimal diff between desired and current artifacts."""
+        desired = {
+            'keep.example.com': {'tags': 'a'},
+            'retag.example.com': {'tags': ['new'], 'monitor': True},
+            'new.example.com': {'tags': ['x'], 'type': 'domain'},
+        }
+        changes = self.project.plan_artifacts(desired)
+        assert changes.create == [{'project': 'p1', 'query': 'new.example.com', 'type': 'domain', 'tags': ['x']}]
+        assert changes.update == [{'tags': ['new'], 'artifact': 'g2'}]
+        assert changes.delete == []
+        assert self.project.plan_artifacts(desired, delete_missing=True).delete == ['g3']
+        assert self.sent == []
+
+    def test_reconcile(self):
+        """Test changes are applied in chunked bulk requests."""
+        desired = { 'host{}.example.com'.format(i): {'monitor': True} for i in range(5) }
+        desired['keep.example.com'] = {}
+        changes = self.project.reconcile_artifacts(desired, chunk_size=2, concurrency=4, delete_missing=True)
+        assert len(changes.create) == 5
+        assert len(changes.delete) == 2
+        methods = sorted((method, action) for method, action, data in self.sent)
+        assert methods == [('DELETE', '')] * 2 + [('POST', 'bulk')] * 3 + [('PUT', 'bulk')] * 3
+        assert sorted(a['query'] for a in self.artifacts.values()) == sorted(desired)
+        assert all(a['monitor'] for a in self.artifacts.values() if a['query'] != 'keep.example.com')
+        self.sent.clear()
+        assert self.project.reconcile_artifacts(desired, delete_missing=True) == ([], [], [])
+        assert self.sent == []
+
+    def test_reconcile_keeps_missing(self):
+        """Test artifacts missing from the desired set are kept unless deletion is requested."""
+        changes = self.project.reconcile_artifacts(['new.example.com'])
+        assert len(changes.create) == 1
+        assert changes.delete == []
+        assert all(method != 'DELETE' for method, action, data in self.sent)
+        assert len(self.artifacts) == 4
@@ -0,0 +1,81 @@
+from unittest.mock import patch
+import unittest
+
+from .conf import fake_asi_request
+from passivetotal import analyzer
+from passivetotal.analyzer.illuminate import AttackSurface, AttackSurfaces
+
+
+class AttackSurfaceBulkTestCase(unittest.TestCase):
+
+    """Test case for concurrent attack surface loading."""
+
+    def setUp(self):
+        self.calls = []
+        self.request = fake_asi_request(self.calls)
+        self.patcher = patch('passivetotal.api.Client._get', self.request)
+        self.patcher.start()
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+        AttackSurface._instances.clear()
+        AttackSurfaces.load.cache_clear()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_load_details(self):
+        """Test every list and observation set loads under one concurrency cap."""
+        progress = []
+        vendors = AttackSurfaces.load()
+        self.calls.clear()
+        vendors.load_details(cve_observations=True, concurrency=3,
+                             progress=lambda stage, done, total: progress.append((stage, done, total)))
+        assert len(self.calls) == 2 * (3 + 2) + 2 * (3 + 1)
+        assert self.request.max_active[1] <= 3
+        assert progress[-1] == ('observations', 8, 8)
+        assert ('lists', 10, 10) in progress
+        self.calls.clear()
+        vendor = vendors[0]
+        assert len(vendor.all_insights) == 6
+        assert len(vendor.all_active_insights) == 3
+        assert [o.name for o in vendor.high_priority_insights[0].observations] == ['www.example.com']
+        assert [o.name for o in vendor.cves[0].observations] == ['10.0.0.1']
+        assert len(vendor.components) == 1
+        assert self.calls == []
+
+    def test_portfolio(self):
+        """Test the vendor portfolio DataFrame tolerates failed queries."""
+        self.patcher.stop()
+        self.patcher = patch('passivetotal.api.Client._get',
+                             fake_asi_request(self.calls, fail=['vuln-intel/third-party/11/cves']))
+        self.patcher.start()
+        vendors = AttackSurfaces.load()
+        df = vendors.portfolio(rate_limit=1000)
+        assert list(df['asi_id']) == [10, 11]
+        assert list(df['high_observations']) == [2, 2]
+        assert list(df['medium_active_insights']) == [1, 1]
+        assert df.loc[0, 'cve_count'] == 1
+        assert df.loc[0, 'cve_max_score'] == 90
+        assert df['errors'].isna()[0]
+        assert df.loc[1, 'errors'] == 'cves: Server error'
+        assert df['cve_count'].isna()[1]
+        only_cves = vendors.portfolio(queries=['cves'])
+        assert list(only_cves.columns) == ['asi_id', 'name', 'cve_count', 'cve_observations', 'cve_max_score', 'errors']
+
+    def test_portfolio_rate_limit(self):
+        """Test the portfolio rate limit applies to every request, including each page."""
+        def request(client, endpoint, action, *args, **params):
+            if action.endswith('/cves'):
+                self.calls.append(action)
+                page = params.get('page', 0)
+                return {'totalCount': 2, 'cves': [{'cveId': 'CVE-2021-000{}'.format(page), 'priorityScore': 10 + page}]}
+            return self.request(client, endpoint, action, *args, **params)
+        self.patcher.stop()
+        self.patcher = patch('passivetotal.api.Client._get', request)
+        self.patcher.start()
+        vendors = AttackSurfaces.load()
+        self.calls.clear()
+        with patch('passivetotal.analyzer._common.RateLimiter.wait') as wait:
+            df = vendors.portfolio(rate_limit=1000)
+        assert list(df['cve_count']) == [2, 2]
+        assert len(self.calls) == 2 * (1 + 3 + 2)
+        assert wait.call_count == len(self.calls)
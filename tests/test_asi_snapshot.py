@@ -0,0 +1,59 @@
+from unittest.mock import patch
+import os
+import tempfile
+import unittest
+
+from .conf import fake_asi_request
+from passivetotal import analyzer
+from passivetotal.analyzer.illuminate import AttackSurface, AttackSurfaceSnapshot
+
+
+class AttackSurfaceSnapshotTestCase(unittest.TestCase):
+
+    """Test case for attack surface snapshots and diffs."""
+
+    def setUp(self):
+        self.calls = []
+        self.changes = {}
+        base = fake_asi_request(self.calls)
+        def request(client, endpoint, action, *args, **params):
+            response = base(client, endpoint, action, *args, **params)
+            path = '/'.join([action] + list(args))
+            for suffix, update in self.changes.items():
+                if path.endswith(suffix):
+                    response = update(response)
+            return response
+        self.patcher = patch('passivetotal.api.Client._get', request)
+        self.patcher.start()
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+        AttackSurface._instances.clear()
+        self.path = os.path.join(tempfile.mkdtemp(), 'vendor.snapshot')
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_diff(self):
+        """Test snapshots round-trip through disk and report only changed records."""
+        vendor = AttackSurface(api_response={'id': 10, 'name': 'Vendor A', 'own': False, 'priorities': {}})
+        assert AttackSurfaceSnapshot.load(self.path) is None
+        first = vendor.snapshot()
+        assert len(first.diff(None).added) == len(first) == 6 + 3 + 1 + 1 + 1
+        first.save(self.path)
+        self.changes = {
+            '/components': lambda r: {'totalCount': 1, 'vulnerableComponents': [{'type': 'Server', 'name': 'nginx', 'count': 2}]},
+            '/observations': lambda r: {'totalCount': 1, 'assets': [{'type': 'IP_ADDRESS', 'name': '10.0.0.2'}]},
+        }
+        second = vendor.snapshot()
+        diff = second.diff(AttackSurfaceSnapshot.load(self.path))
+        assert diff.added == [('cve_observation', 'CVE-2021-0001', 'IP_ADDRESS', '10.0.0.2')]
+        assert diff.removed == [('cve_observation', 'CVE-2021-0001', 'IP_ADDRESS', '10.0.0.1')]
+        assert diff.changed == [('component', 'Server', 'nginx')]
+        assert ('cve', 'CVE-2021-0001') in second
+
+    def test_cve_snapshot(self):
+        """Test snapshots of a CVE list alone."""
+        vendor = AttackSurface(api_response={'id': 10, 'name': 'Vendor A', 'own': False, 'priorities': {}})
+        snapshot = vendor.get_cves().snapshot()
+        assert sorted(snapshot) == [('cve', 'CVE-2021-0001'),
+                                    ('cve_observation', 'CVE-2021-0001', 'IP_ADDRESS', '10.0.0.1')]
+        assert snapshot.attack_surface_id == 10
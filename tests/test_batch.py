@@ -0,0 +1,98 @@
+from io import StringIO
+from unittest.mock import patch
+import argparse
+import json
+import unittest
+
+from .conf import fake_request
+from passivetotal.cli.batch import BatchWriter, run_batch
+from passivetotal.cli.client import call_dns, call_illuminate, main, write_output
+from passivetotal.libs.dns import DnsRequest
+
+
+class BatchTestCase(unittest.TestCase):
+
+    """Test case for pt-client batch execution."""
+
+    def setUp(self):
+        self.patcher = patch('passivetotal.api.Client._get', fake_request)
+        self.patcher.start()
+        self.client = DnsRequest('--No-User--', '--No-Key--')
+        self.args = argparse.Namespace(query=None, end=None, start=None, timeout=3,
+                                       sources=None, unique=False)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def _call(self, query):
+        if query == 'fail.example':
+            raise ValueError('simulated failure')
+        if query == 'empty.example':
+            return None
+        args = argparse.Namespace(**vars(self.args))
+        args.query = query
+        return call_dns(args, self.client)
+
+    def test_batch_jsonl(self):
+        """Test streaming JSON lines with per-query error records."""
+        output = StringIO()
+        writer = BatchWriter('jsonl', output)
+        queries = ['passivetotal.org', 'fail.example', 'passivetotal.org']
+        errors = run_batch(self._call, queries, writer, concurrency=2)
+        assert errors == 1
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert len(records) == 3
+        failed = [r for r in records if 'error' in r]
+        assert failed[0]['query'] == 'fail.example'
+        assert failed[0]['error_type'] == 'ValueError'
+        ok = [r for r in records if 'results' in r]
+        assert ok[0]['results']['queryValue'] == 'passivetotal.org'
+
+    def test_batch_csv(self):
+        """Test CSV output writes one header row for the whole batch."""
+        output, errors = StringIO(), StringIO()
+        writer = BatchWriter('csv', output, errors)
+        run_batch(self._call, ['passivetotal.org', 'passivetotal.org', 'fail.example'], writer)
+        lines = output.getvalue().splitlines()
+        assert lines[0].startswith('query,')
+        assert sum(1 for line in lines if line.startswith('query,')) == 1
+        assert json.loads(errors.getvalue())['query'] == 'fail.example'
+
+    def test_batch_exit_status(self):
+        """Test pt-client exits non-zero when any batch query fails."""
+        for errors, status in [(0, 0), (2, 1)]:
+            with patch('sys.argv', ['pt-client', 'pdns', '--batch', 'queries.txt']), \
+                 patch('passivetotal.cli.client.call_batch', return_value=errors):
+                with self.assertRaises(SystemExit) as exit:
+                    main()
+            assert exit.exception.code == status
+
+    def test_batch_unwritable_result(self):
+        """Test a response that cannot be written becomes an error record for its query."""
+        output = StringIO()
+        writer = BatchWriter('jsonl', output)
+        errors = run_batch(self._call, ['empty.example', 'passivetotal.org'], writer)
+        assert errors == 1
+        records = {r['query']: r for r in map(json.loads, output.getvalue().splitlines())}
+        assert records['empty.example']['error_type'] == 'AttributeError'
+        assert 'results' in records['passivetotal.org']
+        assert writer.result_count == 1
+
+    def test_single_jsonl(self):
+        """Test a single query renders as one JSON line."""
+        args = argparse.Namespace(**vars(self.args))
+        args.query, args.format = 'passivetotal.org', 'jsonl'
+        output = write_output(call_dns(args, self.client), args)
+        assert len(output) == 1 and '\n' not in output[0]
+        assert json.loads(output[0])['queryValue'] == 'passivetotal.org'
+
+    def test_illuminate_batch_error(self):
+        """Test a failed reputation lookup is an error in batch mode only."""
+        class FailingClient:
+            def get_reputation(self, query):
+                raise ValueError('simulated failure')
+        args = argparse.Namespace(illuminate_cmd='reputation', hosts=['fail.example'], brief=False, batch='-')
+        with self.assertRaises(ValueError):
+            call_illuminate(args, FailingClient())
+        args.batch = None
+        assert call_illuminate(args, FailingClient())._results[0]['host'] == 'fail.example'
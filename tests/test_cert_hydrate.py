@@ -0,0 +1,60 @@
+from unittest.mock import patch
+import threading
+import time
+import unittest
+
+from passivetotal import analyzer
+from passivetotal.analyzer.ssl import Certificates, CertificateRecord
+
+
+class CertificateHydrateTestCase(unittest.TestCase):
+
+    """Test case for concurrent certificate detail loading."""
+
+    def setUp(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        def request(client, endpoint, action, *args, **params):
+            with self.lock:
+                self.calls.append(params['query'])
+            time.sleep(0.005)
+            if params['query'] == 'missing':
+                return {'results': []}
+            return {'results': [{'sha1': params['query'], 'fingerprint': 'f',
+                                 'issueDate': 'Jan 01 00:00:00 2020 GMT',
+                                 'expirationDate': 'Jan 01 00:00:00 2030 GMT',
+                                 'subjectCommonName': 'cn-{}'.format(params['query'])}]}
+        self.patcher = patch('passivetotal.api.Client._get', request)
+        self.patcher.start()
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+        CertificateRecord._instances.clear()
+        self.certs = Certificates({'results': [
+            {'sha1': sha1, 'firstSeen': 1600000000000, 'lastSeen': 1610000000000, 'ipAddresses': []}
+            for sha1 in ['a', 'b', 'c', 'a', 'missing']
+        ]})
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_hydrate(self):
+        """Test details load once per distinct certificate."""
+        progress = []
+        assert self.certs.hydrate(concurrency=4, progress=lambda done, total: progress.append(total)) == 3
+        assert sorted(self.calls) == ['a', 'b', 'c', 'missing']
+        assert progress == [4] * 4
+        assert str(self.certs[1].subjectCommonName) == 'cn-b'
+        assert self.certs.hydrate() == 0
+        assert len(self.calls) == 4
+        with self.assertRaises(analyzer.AnalyzerError):
+            self.certs[4].subjectCommonName
+        assert len(self.calls) == 4
+
+    def test_list_accessors(self):
+        """Test list-level accessors hydrate before reading fields, and filters do not."""
+        certs = self.certs.filter_fn(lambda r: r.sha1 != 'missing')
+        assert self.calls == []
+        df = certs.to_dataframe()
+        assert sorted(self.calls) == ['a', 'b', 'c']
+        assert list(df['subjectCommonName']) == ['cn-a', 'cn-b', 'cn-c', 'cn-a']
+        assert len(certs.as_dict['records']) == 4
+        assert len(self.calls) == 3
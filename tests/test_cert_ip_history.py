@@ -0,0 +1,65 @@
+from unittest.mock import patch
+import threading
+import time
+import unittest
+
+from passivetotal import analyzer
+from passivetotal.analyzer.ssl import Certificates, CertificateRecord
+
+
+class CertificateIPHistoryTestCase(unittest.TestCase):
+
+    """Test case for concurrent certificate IP history loading."""
+
+    def setUp(self):
+        self.calls = []
+        self.fail_query = None
+        self.lock = threading.Lock()
+        def request(client, endpoint, action, *args, **params):
+            with self.lock:
+                self.calls.append((action, params['query']))
+            time.sleep(0.005)
+            if params['query'] == self.fail_query:
+                raise analyzer.AnalyzerError('Server error')
+            if params['query'] == 'c':
+                return {'results': []}
+            ips = ['10.0.0.{}'.format(i) for i in range(3)] if params['query'] == 'a' else 'N/A'
+            return {'results': [{'sha1': params['query'], 'ipAddresses': ips,
+                                 'firstSeen': '2021-01-01', 'lastSeen': '2021-06-01'}]}
+        self.patcher = patch('passivetotal.api.Client._get', request)
+        self.patcher.start()
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+        CertificateRecord._instances.clear()
+        self.certs = Certificates({'results': [
+            {'sha1': sha1, 'firstSeen': 1600000000000, 'lastSeen': 1610000000000, 'fingerprint': sha1}
+            for sha1 in ['a', 'b', 'c', 'a']
+        ]})
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_ip_history_dataframe(self):
+        """Test IP history loads once per certificate and expands to one row per IP."""
+        df = self.certs.ip_history_dataframe(max_ips=2, concurrency=4)
+        assert sorted(self.calls) == [('history', 'a'), ('history', 'b'), ('history', 'c')]
+        assert list(df.columns) == ['sha1', 'ip', 'firstseen', 'lastseen']
+        assert list(df['ip']) == ['10.0.0.0', '10.0.0.1']
+        assert set(df['sha1']) == {'a'}
+        assert str(df.loc[0, 'lastseen'].date()) == '2021-06-01'
+        assert len(self.certs.ip_history_dataframe()) == 3
+        assert len(self.calls) == 3
+
+    def test_include_ips(self):
+        """Test the list DataFrame loads IP history before rendering records."""
+        df = self.certs.to_dataframe(include_ips=True, max_ips=1)
+        assert len(self.calls) == 3
+        assert [len(ips) for ips in df['ips']] == [1, 0, 0, 1]
+
+    def test_failed_history(self):
+        """Test a failed history query leaves that certificate without IPs."""
+        self.fail_query = 'b'
+        df = self.certs.ip_history_dataframe()
+        assert sorted(self.calls) == [('history', 'a'), ('history', 'b'), ('history', 'c')]
+        assert set(df['sha1']) == {'a'}
+        assert self.certs[1].iphistory['ipAddresses'] == []
+        assert len(self.calls) == 3
@@ -0,0 +1,65 @@
+from unittest.mock import patch
+import threading
+import unittest
+
+from passivetotal import analyzer
+from passivetotal.analyzer.ssl import Certificates, CertificateField, CertificateRecord
+
+
+class CertificatePivotTestCase(unittest.TestCase):
+
+    """Test case for pivoting on certificate fields."""
+
+    def setUp(self):
+        self.calls = []
+        self.fail_query = None
+        self.lock = threading.Lock()
+        def request(client, endpoint, action, *args, **params):
+            with self.lock:
+                self.calls.append((params['field'], params['query']))
+            if params['query'] == self.fail_query:
+                raise analyzer.AnalyzerError('Server error')
+            matches = {'www.example.com': ['a', 'b'], 'example.com': ['b', 'c'], 'Example CA': ['a', 'c', 'd']}
+            return {'results': [{'sha1': sha1, 'fingerprint': sha1}
+                                for sha1 in matches.get(params['query'], [])]}
+        self.patcher = patch('passivetotal.api.Client._get', request)
+        self.patcher.start()
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+        CertificateRecord._instances.clear()
+        CertificateField._instances.clear()
+        self.certs = Certificates({'results': [
+            {'sha1': 'a', 'fingerprint': 'a', 'subjectCommonName': 'www.example.com', 'issuerCommonName': 'Example CA',
+             'subjectAlternativeNames': ['www.example.com', 'example.com']},
+            {'sha1': 'b', 'fingerprint': 'b', 'subjectCommonName': 'example.com', 'issuerCommonName': 'Example CA',
+             'subjectAlternativeNames': ['example.com']},
+        ]})
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_pivot(self):
+        """Test distinct field values are searched once and results are merged."""
+        pivot = self.certs.pivot(concurrency=4)
+        assert sorted(self.calls) == [
+            ('subjectAlternativeName', 'example.com'), ('subjectAlternativeName', 'www.example.com'),
+            ('subjectCommonName', 'example.com'), ('subjectCommonName', 'www.example.com'),
+        ]
+        assert sorted(c.sha1 for c in pivot) == ['a', 'b', 'c']
+        assert sorted((f.name, f.value) for f in pivot.provenance['c']) == [
+            ('subjectAlternativeName', 'example.com'), ('subjectCommonName', 'example.com')]
+        assert pivot.filter_fn(lambda r: r.sha1 == 'c').provenance == pivot.provenance
+        self.calls.clear()
+        issuers = self.certs.pivot(fields=['issuer', 'sans'])
+        assert self.calls == [('issuerCommonName', 'Example CA')]
+        assert sorted(c.sha1 for c in issuers) == ['a', 'b', 'c', 'd']
+        assert issuers.pivot_errors == []
+
+    def test_pivot_failure(self):
+        """Test a failed search is reported and the other searches are still returned."""
+        self.fail_query = 'example.com'
+        pivot = self.certs.pivot(concurrency=4)
+        assert len(self.calls) == 4
+        assert sorted((f.name, f.value) for f, e in pivot.pivot_errors) == [
+            ('subjectAlternativeName', 'example.com'), ('subjectCommonName', 'example.com')]
+        assert sorted(c.sha1 for c in pivot) == ['a', 'b']
+        assert pivot.filter_fn(lambda r: True).pivot_errors == pivot.pivot_errors
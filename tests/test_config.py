@@ -0,0 +1,55 @@
+from unittest.mock import patch
+import json
+import os
+import tempfile
+import unittest
+
+from passivetotal.config import Config, CONFIG_DEFAULTS
+from passivetotal.libs.dns import DnsRequest
+
+
+class ConfigTestCase(unittest.TestCase):
+
+    """Test case for configuration loading."""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'passivetotal', 'api_config.json')
+        self.env = patch.dict(os.environ, {'PT_CONFIG_FILE': self.path})
+        self.env.start()
+        for var in ['PT_USERNAME', 'PT_API_KEY', 'PT_API_SERVER']:
+            os.environ.pop(var, None)
+        Config.reset_shared()
+
+    def tearDown(self):
+        self.env.stop()
+        Config.reset_shared()
+
+    def test_load_does_not_write(self):
+        """Test loading without a configuration file does not create one."""
+        config = Config()
+        assert config.get('api_server') == CONFIG_DEFAULTS['api_server']
+        assert not os.path.exists(self.path)
+
+    def test_defaults_not_mutated(self):
+        """Test saved values do not leak into the module defaults."""
+        Config(username='user@example.com', api_key='secret')
+        assert CONFIG_DEFAULTS['username'] == ''
+        with open(self.path) as stream:
+            assert json.load(stream)['username'] == 'user@example.com'
+
+    def test_environment_overrides(self):
+        """Test environment variables take precedence over the file and are never saved."""
+        Config(username='file@example.com', api_key='secret')
+        os.environ['PT_USERNAME'] = 'env@example.com'
+        assert Config().get('username') == 'env@example.com'
+        assert Config().get('api_key') == 'secret'
+        with open(self.path) as stream:
+            assert json.load(stream)['username'] == 'file@example.com'
+
+    def test_shared_read_once(self):
+        """Test clients created from config share one configuration load."""
+        Config(username='user@example.com', api_key='secret')
+        with patch('passivetotal.config.json.load', wraps=json.load) as load:
+            clients = [DnsRequest.from_config() for i in range(3)]
+        assert load.call_count == 1
+        assert all(client.username == 'user@example.com' for client in clients)
@@ -0,0 +1,51 @@
+import unittest
+
+from passivetotal.analyzer import DomainFilter
+from passivetotal.analyzer.hostpairs import HostpairHistory
+
+
+class DomainFilterTestCase(unittest.TestCase):
+
+    """Test case for compiled domain filters."""
+
+    def setUp(self):
+        self.pairs = HostpairHistory({'totalRecords': 5, 'results': [
+            {'parent': 'www.example.com', 'child': child, 'cause': 'redirect'}
+            for child in ['cdn.example.com', 'Static.Example.co.uk', 'example.org', '10.0.0.1', 'badexample.com']
+        ]}, direction='children')
+
+    def children(self, pairs):
+        return [ str(record.host) for record in pairs ]
+
+    def test_match(self):
+        """Test each criterion and the reversed-label subdomain trie."""
+        domain_filter = DomainFilter(hosts='10.0.0.1', domains=['www.example.org'], tlds='.co.uk',
+                                     subdomains_of=['example.com'])
+        assert domain_filter.match('example.com')
+        assert 'a.b.EXAMPLE.com' in domain_filter
+        assert 'badexample.com' not in domain_filter
+        assert 'mail.example.org' in domain_filter
+        assert 'example.co.uk' in domain_filter
+        assert '10.0.0.1' in domain_filter
+        assert '10.0.0.2' not in domain_filter
+        assert not domain_filter.match(None)
+
+    def test_lists(self):
+        """Test include and exclude variants on a record list."""
+        assert self.children(self.pairs.exclude_hosts_in('cdn.example.com,example.org')) == [
+            'Static.Example.co.uk', '10.0.0.1', 'badexample.com']
+        assert self.children(self.pairs.include_hosts_in(['10.0.0.1'])) == ['10.0.0.1']
+        assert self.children(self.pairs.exclude_domains_in(['example.com'])) == [
+            'Static.Example.co.uk', 'example.org', 'badexample.com']
+        assert self.children(self.pairs.include_domains_in(['a.example.co.uk'])) == ['Static.Example.co.uk']
+        assert self.children(self.pairs.exclude_tlds_in('com,org')) == ['Static.Example.co.uk']
+        assert self.children(self.pairs.include_tlds_in('co.uk')) == ['Static.Example.co.uk']
+        assert self.children(self.pairs.include_subdomains_of('example.com')) == ['cdn.example.com']
+        assert self.children(self.pairs.exclude_subdomains_of('example.com,example.co.uk')) == [
+            'example.org', '10.0.0.1', 'badexample.com']
+        assert self.children(self.pairs.exclude_hosts_in('cdn[.]example[.]com, example.org ')) == [
+            'Static.Example.co.uk', '10.0.0.1', 'badexample.com']
+        assert self.children(self.pairs.include_subdomains_of(['example[.]com'])) == ['cdn.example.com']
+        reusable = DomainFilter(hosts='10.0.0.1', subdomains_of='example.org')
+        assert self.children(self.pairs.filter_domains(reusable)) == ['example.org', '10.0.0.1']
+        assert len(self.pairs.filter_domains(reusable, exclude=True)) == 3
@@ -0,0 +1,50 @@
+import unittest
+
+from passivetotal import analyzer
+from passivetotal.analyzer import AnalyzerError
+from passivetotal.analyzer._common import classify, is_ip, refang
+
+
+class GetObjectsTestCase(unittest.TestCase):
+
+    """Test case for bulk indicator classification."""
+
+    def test_classify(self):
+        """Test each indicator type is detected with one pattern match."""
+        assert classify('10.0.0.1') == 'IPAddress'
+        assert classify('10(.)0(.)0(.)1') == 'IPAddress'
+        assert classify('www.example.co.uk') == 'Hostname'
+        assert classify('_dmarc.example.com') == 'Hostname'
+        assert classify('d41d8cd98f00b204e9800998ecf8427e') == 'Hash'
+        assert classify('da39a3ee5e6b4b0d3255bfef95601890afd80709') == 'Hash'
+        assert classify('analyst@example.com') == 'Email'
+        assert classify('2001:db8::1') == 'IPv6'
+        assert classify('localhost') is None
+        assert classify('not a host.com') is None
+        assert is_ip('10[.]0[.]0[.]1') and not is_ip('example.com')
+        assert refang('www[.]example[.]com') == 'www.example.com'
+
+    def test_get_objects(self):
+        """Test inputs are refanged, deduplicated and returned in input order."""
+        host = analyzer.Hostname('www.example.com')
+        objects = analyzer.get_objects([
+            '10.0.0.1\n', ' www[.]example[.]com', host, '10[.]0[.]0[.]1', 'analyst@example.com',
+            'd41d8cd98f00b204e9800998ecf8427e', '', 'api.example.com',
+        ])
+        assert objects == [analyzer.IPAddress('10.0.0.1'), host, analyzer.Hostname('api.example.com')]
+        assert objects[0] is analyzer.get_object('10.0.0.1')
+
+    def test_grouped(self):
+        """Test grouped results hold every type, including those without Analyzer objects."""
+        groups = analyzer.get_objects([
+            'D41D8CD98F00B204E9800998ECF8427E', 'd41d8cd98f00b204e9800998ecf8427e', '2001:DB8:0::1', ' 2001:db8::1',
+            'analyst@example.com', 'localhost', 'www.example.com', '10.0.0.1',
+        ], grouped=True)
+        assert groups['Hash'] == ['d41d8cd98f00b204e9800998ecf8427e']
+        assert groups['IPv6'] == ['2001:db8::1']
+        assert groups['Email'] == ['analyst@example.com']
+        assert groups['Unknown'] == ['localhost']
+        assert groups['Hostname'] == [analyzer.Hostname('www.example.com')]
+        assert groups['IPAddress'] == [analyzer.IPAddress('10.0.0.1')]
+        with self.assertRaises(AnalyzerError):
+            analyzer.get_objects([None])
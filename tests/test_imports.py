@@ -0,0 +1,41 @@
+import json
+import subprocess
+import sys
+import unittest
+
+HEAVY_MODULES = ['pandas', 'tldextract', 'sqlite3', 'passivetotal.analyzer']
+
+
+def import_report(module):
+    """Import a module in a fresh interpreter and return the set of loaded modules."""
+    code = 'import json, sys, {0}; print(json.dumps(sorted(sys.modules)))'.format(module)
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return set(json.loads(proc.stdout))
+
+
+class ImportTestCase(unittest.TestCase):
+
+    """Test case for package import cost."""
+
+    def test_package_is_lazy(self):
+        """Test importing the package does not load the request wrappers."""
+        modules = import_report('passivetotal')
+        assert 'passivetotal.libs.dns' not in modules
+        assert 'requests' not in modules
+        assert not modules.intersection(HEAVY_MODULES)
+
+    def test_analyzer_is_lazy(self):
+        """Test importing the analyzer does not load optional dependencies."""
+        modules = import_report('passivetotal.analyzer')
+        assert 'pandas' not in modules
+        assert 'tldextract' not in modules
+        assert 'passivetotal.analyzer.hostname' not in modules
+        assert 'passivetotal.libs.dns' not in modules
+
+    def test_cli_is_lazy(self):
+        """Test the command line client loads no request wrappers, server or HTTP library up front."""
+        modules = import_report('passivetotal.cli.client')
+        assert not modules.intersection(HEAVY_MODULES)
+        assert not [ name for name in modules if name.startswith('passivetotal.libs') ]
+        assert 'passivetotal.cli.server' not in modules
+        assert 'requests' not in modules
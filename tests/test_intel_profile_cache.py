@@ -0,0 +1,90 @@
+from unittest.mock import patch
+import unittest
+
+from passivetotal import analyzer
+from passivetotal.analyzer.illuminate.cti import IntelProfiles, IntelProfileIndicatorCache
+
+
+class IntelProfileCacheTestCase(unittest.TestCase):
+
+    """Test case for the local intel profile indicator cache."""
+
+    def setUp(self):
+        self.calls = []
+        self.indicators = {
+            'apt1': [('evil.example.com', 'domain', 'C2', True), ('10.0.0.1', 'ip', 'C2', False)],
+            'apt2': [('Evil.Example.com', 'domain', 'Phishing', False)],
+        }
+        self.patcher = patch('passivetotal.api.Client._get', self.fake_request())
+        self.patcher.start()
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+        analyzer.set_intel_profile_cache()
+
+    def tearDown(self):
+        analyzer.set_intel_profile_cache(False)
+        self.patcher.stop()
+
+    def fake_request(self):
+        def request(client, endpoint, action, *args, **params):
+            self.calls.append((action,) + args)
+            if action == '':
+                return {'totalCount': len(self.indicators), 'results': [
+                    {'id': id, 'title': id.upper(), 'osintIndicatorsCount': len(iocs), 'riskIqIndicatorsCount': 0}
+                    for id, iocs in self.indicators.items()]}
+            if action == 'indicator':
+                return {'totalCount': 1, 'results': [{'id': 'apt1', 'title': 'APT1'}]}
+            iocs = self.indicators[action]
+            return {'totalCount': len(iocs), 'types': [], 'results': [
+                {'id': value, 'profileId': action, 'value': value, 'type': type, 'category': category, 'osint': osint}
+                for value, type, category, osint in iocs]}
+        return request
+
+    def test_detect_type(self):
+        """Test indicator type detection."""
+        detect = IntelProfileIndicatorCache.detect_type
+        assert detect('10.0.0.1') == 'ip'
+        assert detect('a.example.com') == 'domain'
+        assert detect('d41d8cd98f00b204e9800998ecf8427e') == 'hash_md5'
+        assert detect('user@example.com') == 'email'
+        assert detect('not an indicator') is None
+
+    def test_local_lookups(self):
+        """Test lookups are answered locally after one sync."""
+        assert [p.id for p in IntelProfiles.find_by_indicator('evil.example.com')] == ['apt1', 'apt2']
+        self.calls.clear()
+        assert [p.id for p in IntelProfiles.find_by_indicator('10.0.0.1')] == ['apt1']
+        assert len(IntelProfiles.find_by_indicator('clean.example.com')) == 0
+        assert [p.id for p in IntelProfiles.find_by_indicator('evil.example.com', sources='riskiq')] == ['apt2']
+        assert [p.id for p in IntelProfiles.find_by_indicator('evil.example.com', categories=['C2'])] == ['apt1']
+        assert self.calls == []
+
+    def test_unknown_type_falls_back(self):
+        """Test types missing from the cache are queried from the API."""
+        profiles = IntelProfiles.find_by_indicator('d41d8cd98f00b204e9800998ecf8427e')
+        assert [p.id for p in profiles] == ['apt1']
+        assert self.calls[-1] == ('indicator',)
+
+    def test_incremental_refresh(self):
+        """Test only changed profiles are reloaded and removed profiles are dropped."""
+        cache = analyzer.get_config('intel_profile_cache')
+        assert cache.sync(full=True) == 2
+        assert cache.sync() == 0
+        self.indicators['apt2'].append(('new.example.com', 'domain', 'C2', True))
+        del self.indicators['apt1']
+        self.calls.clear()
+        assert cache.sync() == 1
+        assert self.calls == [('',), ('apt2', 'indicators')]
+        assert cache.lookup('new.example.com') == ['apt2']
+        assert cache.lookup('evil.example.com') == ['apt2']
+        assert cache.lookup('10.0.0.1') == []
+
+    def test_swapped_indicator(self):
+        """Test a full sync after max_age picks up indicators swapped without a count change."""
+        cache = analyzer.get_config('intel_profile_cache')
+        assert cache.lookup('10.0.0.1') == ['apt1']
+        self.indicators['apt1'][1] = ('10.0.0.2', 'ip', 'C2', False)
+        assert cache.sync() == 0
+        assert cache.lookup('10.0.0.2') == []
+        cache.max_age = 0
+        assert cache.lookup('10.0.0.2') == ['apt1']
+        assert cache.lookup('10.0.0.1') == []
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import unittest
+
+from passivetotal.analyzer.matcher import IndicatorMatcher, IndicatorSource
+
+
+class MatcherTestCase(unittest.TestCase):
+
+    """Test case for offline indicator matching."""
+
+    def setUp(self):
+        self.matcher = IndicatorMatcher()
+        with open('tests/resources/v2/articles/indicators.json') as stream:
+            self.matcher.add_article_indicators(json.load(stream))
+        self.matcher.add('evil[.]com', 'domain', 'profile', 'apt-1')
+        self.matcher.add('login.evil.com', 'domain', 'article', 'a1')
+        self.matcher.add('203.0.113.7', 'ip', 'profile', 'apt-1')
+
+    def check(self, matcher):
+        hits = {m.value: m for m in matcher.match(
+            ['www.Evil.com.', 'login.evil.com', 'notevil.com', '203.0.113.7',
+             '9466C865DEAD7A35E4E1A8F48EF1DFFD', 'example.org']
+        )}
+        assert sorted(hits) == ['203.0.113.7', '9466C865DEAD7A35E4E1A8F48EF1DFFD',
+                                'login.evil.com', 'www.Evil.com.']
+        assert hits['www.Evil.com.'].indicator == 'evil.com'
+        assert hits['www.Evil.com.'].sources == [IndicatorSource('profile', 'apt-1', 'domain')]
+        assert hits['login.evil.com'].indicator == 'login.evil.com'
+        assert len(hits['login.evil.com'].sources) == 2
+        assert hits['9466C865DEAD7A35E4E1A8F48EF1DFFD'].sources[0].id == '04a9234e'
+
+    def test_match(self):
+        """Test exact and subdomain matching in memory."""
+        self.check(self.matcher)
+
+    def test_match_lines(self):
+        """Test tokens are extracted from log lines."""
+        lines = ['10:01 query www.evil.com from 10.0.0.1', '10:02 query example.org']
+        hits = list(self.matcher.match_lines(lines))
+        assert len(hits) == 1
+        assert hits[0][1].indicator == 'evil.com'
+
+    def test_match_proxy_and_firewall_lines(self):
+        """Test hosts are found inside URLs and host:port tokens."""
+        lines = [
+            '1633046400.123 200 10.0.0.5 TCP_MISS/200 512 GET http://www.evil.com/payload.bin - DIRECT/198.51.100.1',
+            '1633046401.456 200 10.0.0.5 TCP_TUNNEL/200 0 CONNECT login.evil.com:443 - DIRECT/198.51.100.2',
+            'Oct 1 00:00:02 fw01 DROP TCP 10.0.0.5:51514 -> 203.0.113.7:443',
+            'Oct 1 00:00:03 fw01 ACCEPT TCP 10.0.0.5:51515 -> 198.51.100.3:443',
+        ]
+        hits = [ (line[:10], match.value, match.indicator) for line, match in self.matcher.match_lines(lines) ]
+        assert hits == [
+            (lines[0][:10], 'www.evil.com', 'evil.com'),
+            (lines[1][:10], 'login.evil.com', 'login.evil.com'),
+            (lines[2][:10], '203.0.113.7', '203.0.113.7'),
+        ]
+
+    def test_save_and_load(self):
+        """Test a saved matcher gives the same results when memory-mapped."""
+        for bloom in [0, 10]:
+            path = os.path.join(tempfile.mkdtemp(), 'iocs.bin')
+            self.matcher.save(path, bloom_bits_per_key=bloom)
+            with IndicatorMatcher.load(path) as mapped:
+                assert len(mapped) == len(self.matcher)
+                self.check(mapped)
@@ -0,0 +1,105 @@
+from unittest.mock import patch
+import unittest
+
+from passivetotal import analyzer
+from passivetotal.analyzer.projects import IsArtifact, Project, ProjectCatalog, ProjectList
+
+
+def fake_guid(i):
+    return '00000000-0000-0000-0000-{:012x}'.format(i)
+
+
+def fake_project(guid, name, visibility='analyst'):
+    project = {key: None for key in [
+        'active', 'description', 'featured', 'tags', 'owner', 'creator', 'created',
+        'organization', 'collaborators', 'link', 'links', 'subscribers', 'can_edit']}
+    project.update(guid=guid, name=name, visibility=visibility)
+    return project
+
+
+class Indicator(IsArtifact):
+
+    def get_host_identifier(self):
+        return 'www.example.com'
+
+
+class ProjectCatalogTestCase(unittest.TestCase):
+
+    """Test case for the shared project catalog."""
+
+    def setUp(self):
+        self.calls = []
+        self.projects = [
+            fake_project(fake_guid(i), 'Project {}'.format(i % 20), 'analyst' if i % 2 else 'private')
+            for i in range(30)
+        ]
+        self.patchers = [
+            patch('passivetotal.api.Client._get', lambda client, *args, **kwargs: self.fake_get(*args, **kwargs)),
+            patch('passivetotal.api.Client._send_data', lambda client, *args, **kwargs: self.fake_send(*args, **kwargs)),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+        Project._instances.clear()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def fake_get(self, endpoint, action, *args, **params):
+        self.calls.append((endpoint, params))
+        if endpoint == 'artifact':
+            return {'artifacts': [{'guid': 'a{}'.format(i), 'project': p['guid'], 'query': 'www.example.com'}
+                                  for i, p in enumerate(self.projects)]}
+        matches = [ p for p in self.projects if params.get('guid') in (None, p['guid'])
+                    and params.get('visibility') in (None, p['visibility']) ]
+        return matches[0] if len(matches) == 1 else {'results': matches}
+
+    def fake_send(self, method, endpoint, action, data, *args, **params):
+        project = fake_project(fake_guid(100 + len(self.projects)), data['name'], data['visibility'])
+        self.projects.append(project)
+        return project
+
+    def test_artifact_projects(self):
+        """Test projects for every artifact are resolved with one catalog load."""
+        projects = Indicator().projects
+        assert len(projects) == 30
+        assert [endpoint for endpoint, params in self.calls] == ['artifact', 'project']
+        assert projects[0].name == 'Project 0'
+
+    def test_find(self):
+        """Test name lookups load each visibility filtered by the API, and unknown GUIDs are merged."""
+        assert len(ProjectList.find('Project 1')) == 2
+        assert len(ProjectList.find('Project 12')) == 1
+        assert len(self.calls) == 1
+        assert len(ProjectList.find('Project 1', visibility='analyst')) == 2
+        assert len(ProjectList.find('Project 12', visibility='analyst')) == 0
+        assert Project.find('Project 12', visibility='private').guid == fake_guid(12)
+        assert [params for endpoint, params in self.calls] == [{}, {'visibility': 'analyst'}, {'visibility': 'private'}]
+        self.projects.append(fake_project(fake_guid(255), 'Late'))
+        assert Project.find(fake_guid(255)).name == 'Late'
+        assert self.calls[-1][1]['guid'] == fake_guid(255)
+        assert fake_guid(255) in ProjectCatalog.shared()
+        ProjectList.find('Project 1', owner='me')
+        assert len(self.calls) == 5
+
+    def test_set_project(self):
+        """Test set_project loads only analyst projects and adds a created project to the catalog."""
+        analyzer.set_project('Project 13')
+        assert analyzer.get_config('project_guid') == fake_guid(13)
+        analyzer.set_project('Brand New')
+        guid = analyzer.get_config('project_guid')
+        assert ProjectCatalog.shared().find('Brand New', visibility='analyst') == [self.projects[-1]]
+        assert [c[1] for c in self.calls if c[0] == 'project'] == [{'visibility': 'analyst'}]
+        assert ProjectCatalog.shared().find(guid)[0]['name'] == 'Brand New'
+
+    def test_disabled(self):
+        """Test lookups go to the API when the catalog is disabled."""
+        analyzer.set_project_catalog(enabled=False)
+        try:
+            Project.find('Project 14')
+            Project._instances.clear()
+            Project.find('Project 14')
+            assert len(self.calls) == 2
+        finally:
+            analyzer.set_project_catalog()
@@ -0,0 +1,85 @@
+from unittest.mock import patch
+import socket
+import threading
+import time
+import unittest
+
+from passivetotal import analyzer
+from passivetotal.analyzer import AnalyzerError
+from passivetotal.analyzer.resolver import Resolver, getaddrinfo_lookup
+
+
+class ResolverTestCase(unittest.TestCase):
+
+    """Test case for concurrent cached DNS resolution."""
+
+    def setUp(self):
+        self.calls = []
+        self.finished = []
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        analyzer.set_resolver(timeout=0.2, ttl=60, lookup=self.lookup, concurrency=4)
+
+    def tearDown(self):
+        self.release.set()
+        analyzer.config['resolver'] = None
+
+    def lookup(self, hostname, family):
+        with self.lock:
+            self.calls.append((hostname, family))
+        if hostname.startswith('slow'):
+            self.release.wait(5)
+            self.finished.append(hostname)
+        if hostname.startswith('bad'):
+            raise socket.gaierror('Name or service not known')
+        return ['10.0.0.{}'.format(len(hostname)), '10.0.0.{}'.format(len(hostname))]
+
+    def test_resolve_many(self):
+        """Test lookups run concurrently, failures and timeouts degrade to empty lists."""
+        progress = []
+        hosts = ['slow1.example.com', 'bad.example.com', 'a.example.com', 'slow2.example.com',
+                 analyzer.Hostname('a.example.com'), 'slow3.example.com', 'slow4.example.com', 'bb.example.com']
+        results = analyzer.resolve_many(hosts, progress=lambda done, total: progress.append(total))
+        assert self.finished == []
+        assert list(results) == ['slow1.example.com', 'bad.example.com', 'a.example.com', 'slow2.example.com',
+                                 'slow3.example.com', 'slow4.example.com', 'bb.example.com']
+        assert results['a.example.com'] == ['10.0.0.13']
+        assert results['bb.example.com'] == ['10.0.0.14']
+        assert results['bad.example.com'] == results['slow1.example.com'] == []
+        assert progress == [7] * 7
+        assert len(self.calls) == 7
+        assert analyzer.resolve_many(['a.example.com', 'bad.example.com'])['a.example.com'] == ['10.0.0.13']
+        assert len(self.calls) == 7
+
+    def test_hostname_ip(self):
+        """Test Hostname.ip reads the resolver cache and raises when resolution fails."""
+        analyzer.resolve_many(['www.example.com'])
+        assert analyzer.Hostname('www.example.com').ip is analyzer.IPAddress('10.0.0.15')
+        assert self.calls == [('www.example.com', 'A')]
+        with self.assertRaises(AnalyzerError):
+            analyzer.Hostname('bad.example.com').ip
+        analyzer.resolve_many(['www.example.com'], family='AAAA')
+        assert self.calls[-1] == ('www.example.com', 'AAAA')
+
+    def test_ttl(self):
+        """Test expired answers are looked up again and the cache stays bounded."""
+        resolver = Resolver(ttl=0.05, lookup=self.lookup, max_entries=4)
+        resolver.resolve('www.example.com')
+        resolver.resolve('www.example.com')
+        assert len(self.calls) == 1
+        time.sleep(0.06)
+        assert resolver.cached('www.example.com') is None
+        resolver.resolve('www.example.com')
+        assert len(self.calls) == 2
+        resolver.resolve_many(['h{}.example.com'.format(i) for i in range(10)])
+        assert len(resolver) <= 4
+
+    def test_getaddrinfo(self):
+        """Test the default lookup asks for the requested family and duplicates are removed."""
+        infos = [(socket.AF_INET6, socket.SOCK_STREAM, 6, '', ('2001:db8::1', 0, 0, 0)),
+                 (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', 0)),
+                 (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', 0))]
+        with patch('socket.getaddrinfo', return_value=infos) as getaddrinfo:
+            assert getaddrinfo_lookup('www.example.com', 'ANY') == ['2001:db8::1', '10.0.0.1', '10.0.0.1']
+            getaddrinfo.assert_called_with('www.example.com', None, socket.AF_UNSPEC, socket.SOCK_STREAM)
+            assert Resolver().resolve('www.example.com') == ['2001:db8::1', '10.0.0.1']
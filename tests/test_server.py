@@ -0,0 +1,135 @@
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+import json
+import os
+import stat
+import tempfile
+import threading
+import unittest
+
+from .conf import fake_request
+from passivetotal.cli import client as cli
+from passivetotal.cli.client import CACHEABLE_COMMANDS, WRITE_COMMANDS, build_parser, run_command
+from passivetotal.cli.server import Dispatcher, ResponseCache, forward, make_server, read_token
+from passivetotal.libs.dns import DnsRequest
+
+
+class ServerTestCase(unittest.TestCase):
+
+    """Test case for the pt-client server and thin client."""
+
+    def setUp(self):
+        self.calls = 0
+
+        def counting_request(*args, **kwargs):
+            self.calls += 1
+            return fake_request(*args, **kwargs)
+
+        self.patcher = patch('passivetotal.api.Client._get', counting_request)
+        self.patcher.start()
+        client = DnsRequest('--No-User--', '--No-Key--')
+        parser = build_parser()
+        self.dispatcher = Dispatcher(lambda argv: parser.parse_known_args(argv)[0],
+                                     lambda args: run_command(args, client),
+                                     CACHEABLE_COMMANDS, refused=WRITE_COMMANDS)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_cached_lookup(self):
+        """Test repeated lookups are answered from the response cache."""
+        request = {'argv': ['pdns', '--query', 'passivetotal.org']}
+        first = self.dispatcher.handle(request)
+        second = self.dispatcher.handle(request)
+        assert first['ok'] and not first['cached']
+        assert second['cached']
+        assert second['output'] == first['output']
+        assert self.calls == 1
+        stats = self.dispatcher.handle({'op': 'stats'})['stats']
+        assert stats['cache_hits'] == 1
+
+    def test_invalid_request(self):
+        """Test bad arguments produce an error response rather than stopping the server."""
+        response = self.dispatcher.handle({'argv': ['pdns', '--no-such-flag']})
+        assert not response['ok']
+        response = self.dispatcher.handle({'argv': ['serve']})
+        assert not response['ok']
+        response = self.dispatcher.handle({'argv': ['projects', 'create', '--name', 'x']})
+        assert not response['ok']
+        assert self.calls == 0
+
+    def test_cache_expiry(self):
+        """Test entries expire and the cache stays within its size limit."""
+        cache = ResponseCache(ttl=0)
+        cache.set('a', 1)
+        assert cache.get('a') is None
+        cache = ResponseCache(ttl=60, maxsize=2)
+        for key in 'abc':
+            cache.set(key, key)
+        assert cache.get('a') is None
+        assert cache.get('c') == 'c'
+
+    def test_unix_socket_round_trip(self):
+        """Test the thin client forwards a command over a Unix socket."""
+        path = os.path.join(tempfile.mkdtemp(), 'run', 'pt.sock')
+        server = make_server(self.dispatcher, socket_path=path)
+        assert stat.S_IMODE(os.stat(path).st_mode) & 0o077 == 0
+        assert stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode) == 0o700
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            response = forward(path, {'argv': ['pdns', '-q', 'passivetotal.org']})
+            assert response['ok']
+            assert 'passivetotal.org' in response['output'][0]
+            with patch('os.getuid', return_value=os.getuid() + 1):
+                with self.assertRaises(ValueError):
+                    forward(path, {'argv': ['pdns', '-q', 'passivetotal.org']})
+        finally:
+            server.shutdown()
+            server.server_close()
+            os.unlink(path)
+
+    def test_http_requires_token(self):
+        """Test the HTTP listener refuses requests without the token, JSON body or with an Origin."""
+        token_dir = tempfile.mkdtemp()
+        with patch('passivetotal.cli.server.TOKEN_DIR', token_dir):
+            server = make_server(self.dispatcher, http_port=0)
+            address = 'http://127.0.0.1:{}'.format(server.server_address[1])
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                assert read_token(address) == server.token
+                token_file = os.path.join(token_dir, 'server-{}.token'.format(server.server_address[1]))
+                assert stat.S_IMODE(os.stat(token_file).st_mode) == 0o600
+                request = {'argv': ['pdns', '-q', 'passivetotal.org']}
+                assert forward(address, request)['ok']
+                assert forward(address, request, token='wrong')['error'] == 'Missing or invalid server token'
+                payload = json.dumps(request).encode('utf-8')
+                for headers, status in [
+                    ({'Content-Type': 'text/plain'}, 415),
+                    ({'Content-Type': 'application/json', 'Origin': 'https://example.com'}, 403),
+                ]:
+                    headers['Authorization'] = 'Bearer {}'.format(server.token)
+                    with self.assertRaises(HTTPError) as error:
+                        urlopen(Request(address, data=payload, headers=headers))
+                    assert error.exception.code == status
+                assert self.calls == 1
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def test_environment_server_runs_locally(self):
+        """Test batches and writes run locally when the server only comes from $PT_CLIENT_SERVER."""
+        with patch.dict(os.environ, {'PT_CLIENT_SERVER': '/nonexistent.sock'}), \
+             patch('sys.argv', ['pt-client', 'pdns', '--batch', 'queries.txt']), \
+             patch('passivetotal.cli.client.call_batch', return_value=0) as call_batch:
+            with self.assertRaises(SystemExit) as exit:
+                cli.main()
+        assert exit.exception.code == 0
+        assert call_batch.called
+        with patch('sys.argv', ['pt-client', '--server', '/nonexistent.sock', 'pdns', '--batch', 'queries.txt']), \
+             patch('sys.stderr'):
+            with self.assertRaises(SystemExit) as exit:
+                cli.main()
+        assert exit.exception.code == 1
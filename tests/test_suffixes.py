@@ -0,0 +1,62 @@
+from unittest.mock import patch
+import os
+import tempfile
+import unittest
+
+from passivetotal import analyzer
+from passivetotal.analyzer import suffixes
+from passivetotal.analyzer.hostname import Hostname
+
+
+class SuffixesTestCase(unittest.TestCase):
+
+    """Test case for offline suffix lists and cached domain extraction."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'suffixes.dat')
+        with open(self.path, 'w') as stream:
+            stream.write('// ===BEGIN ICANN DOMAINS===\ncom\ninternal\nlab.internal\n')
+
+    def tearDown(self):
+        analyzer.set_suffix_list()
+
+    def test_offline(self):
+        """Test extraction uses a pinned list and never fetches one."""
+        with patch('socket.socket.connect', side_effect=AssertionError('network used')):
+            analyzer.set_suffix_list(self.path)
+            assert suffixes.suffix_list_path() == self.path
+            assert suffixes.extract('www.corp.lab.internal') == ('www', 'corp', 'lab.internal', 'corp.lab.internal')
+            assert suffixes.extract('example.co.uk').registered_domain == ''
+            analyzer.set_suffix_list(os.path.join(self.dir, 'missing.dat'))
+            assert suffixes.suffix_list_path() is None
+            assert suffixes.extract('example.co.uk').registered_domain == 'example.co.uk'
+
+    def test_shared_cache(self):
+        """Test hostnames share the bounded cache and extract_many bypasses it."""
+        analyzer.set_suffix_list(self.path)
+        Hostname._instances.pop('mail.example.com', None)
+        host = Hostname('mail.example.com')
+        assert (host.subdomain, host.domain, host.tld, host.registered_domain) == (
+            'mail', 'example', 'com', 'example.com')
+        assert suffixes.extract.cache_info().currsize == 1
+        parts = suffixes.extract_many(['a.example.com', 'b.lab.internal', 'a.example.com'])
+        assert [p.registered_domain for p in parts] == ['example.com', 'b.lab.internal', 'example.com']
+        assert parts[0] is parts[2]
+        assert suffixes.extract.cache_info().currsize == 1
+
+    def test_refresh(self):
+        """Test a refreshed list is validated, saved atomically and used."""
+        class Response:
+            text = '// ===BEGIN ICANN DOMAINS===\nexample\n'
+            def raise_for_status(self):
+                pass
+        target = os.path.join(self.dir, 'nested', 'psl.dat')
+        with patch('requests.get', return_value=Response()):
+            assert suffixes.refresh_suffix_list(target) == target
+        assert suffixes.extract('a.b.example').registered_domain == 'b.example'
+        Response.text = '<html>'
+        with patch('requests.get', return_value=Response()):
+            with self.assertRaises(analyzer.AnalyzerError):
+                suffixes.refresh_suffix_list(target)
+        assert os.listdir(os.path.dirname(target)) == ['psl.dat']
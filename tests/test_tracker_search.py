@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+import threading
+import unittest
+
+from passivetotal import analyzer
+from passivetotal.analyzer import AnalyzerAPIError
+from passivetotal.analyzer.hostname import Hostname
+from passivetotal.analyzer.trackers import Tracker, load_tracker_references
+
+
+def fake_tracker_request(calls, totals):
+    """Serve paged tracker searches with `totals[(type, searchtype)]` records per value."""
+    lock = threading.Lock()
+
+    def request(client, endpoint, value, searchtype, **params):
+        with lock:
+            calls.append((value, params['type'], searchtype, params['page']))
+        total = totals.get((params['type'], searchtype))
+        if total is None:
+            raise AnalyzerAPIError(SimpleNamespace(status_code=404))
+        start = params['page'] * 2000
+        return {'totalRecords': total, 'results': [
+            {'entity': 'host{}.example.com'.format(i % 2500), 'firstSeen': '2021-01-01', 'lastSeen': '2021-02-01'}
+            for i in range(start, min(start + 2000, total))
+        ]}
+    return request
+
+
+class TrackerReferencesTestCase(unittest.TestCase):
+
+    """Test case for concurrent tracker reference searches."""
+
+    def setUp(self):
+        self.calls = []
+        self.totals = {
+            ('DocumentBaseHost', 'hosts'): 4500,
+            ('DocumentBaseHost', 'addresses'): 3,
+            ('HTTrackSourceHost', 'hosts'): 0,
+            ('HTTrackSourceHost', 'addresses'): 0,
+            ('MarkOfTheWebSourceHost', 'hosts'): 2,
+            ('MarkOfTheWebSourceHost', 'addresses'): 0,
+        }
+        self.patcher = patch('passivetotal.api.Client._get', fake_tracker_request(self.calls, self.totals))
+        self.patcher.start()
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+        Tracker._instances.clear()
+        Hostname._instances.clear()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_tracker_references(self):
+        """Test every reference search is paged fully and merged without duplicates."""
+        refs = analyzer.Hostname('www.example.com').tracker_references
+        assert len(self.calls) == 8 + 2
+        assert sorted(page for value, t, s, page in self.calls if t == 'DocumentBaseHost' and s == 'hosts') == [0, 1, 2]
+        assert len(refs) == 2500 + 3 + 2
+        assert refs.totalrecords == len(refs)
+        assert not refs.has_more_records
+        assert {r.searchtype for r in refs} == {'hosts', 'addresses'}
+        assert len(Tracker('DocumentBaseHost', 'www.example.com').observations_by_hostname) == 4500
+        assert len(self.calls) == 10
+
+    def test_sweep(self):
+        """Test a sweep over many hosts shares one batch of searches."""
+        results = load_tracker_references(['a.example.com', 'b.example.com'], concurrency=4)
+        assert sorted(results) == ['a.example.com', 'b.example.com']
+        assert len(self.calls) == 2 * (8 + 2)
+        assert len(results['b.example.com']) == 2505
+        assert analyzer.Hostname('a.example.com').tracker_references is results['a.example.com']
+        assert len(self.calls) == 20
+
+
+class TrackerSearchManyTestCase(unittest.TestCase):
+
+    """Test case for searching many trackers at once."""
+
+    def setUp(self):
+        self.calls = []
+        self.patcher = patch('passivetotal.api.Client._get', fake_tracker_request(self.calls, {
+            ('GoogleAnalyticsTrackingId', 'hosts'): 2600,
+            ('GoogleAnalyticsAccountNumber', 'hosts'): 4,
+        }))
+        self.patcher.start()
+        analyzer.init(username='--No-User--', api_key='--No-Key--')
+        Tracker._instances.clear()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_search_many(self):
+        """Test trackers are searched concurrently and shared hosts appear once."""
+        ua = Tracker('GoogleAnalyticsTrackingId', 'UA-1')
+        results = Tracker.search_many([ua, ('GoogleAnalyticsTrackingId', 'UA-2'), ua,
+                                       ('GoogleAnalyticsAccountNumber', 'UA-3')], concurrency=4)
+        assert sorted(self.calls) == [
+            ('UA-1', 'GoogleAnalyticsTrackingId', 'hosts', 0), ('UA-1', 'GoogleAnalyticsTrackingId', 'hosts', 1),
+            ('UA-2', 'GoogleAnalyticsTrackingId', 'hosts', 0), ('UA-2', 'GoogleAnalyticsTrackingId', 'hosts', 1),
+            ('UA-3', 'GoogleAnalyticsAccountNumber', 'hosts', 0),
+        ]
+        assert len(results) == 2500
+        assert len(results.by_tracker[ua]) == 2600
+        assert [str(t) for t in results.provenance['host0.example.com']] == [
+            'GoogleAnalyticsTrackingId:UA-1', 'GoogleAnalyticsTrackingId:UA-2', 'GoogleAnalyticsAccountNumber:UA-3']
+        assert len(results.provenance['host2400.example.com']) == 2
+        assert ua.observations_by_hostname is results.by_tracker[ua]
+        assert len(self.calls) == 5
+
+    def test_search_many_failure(self):
+        """Test completed searches are cached when another search fails."""
+        request = fake_tracker_request(self.calls, {('GoogleAnalyticsTrackingId', 'hosts'): 2600})
+        def failing(client, endpoint, value, searchtype, **params):
+            if value == 'UA-2' and params['page'] == 1:
+                self.calls.append((value, params['type'], searchtype, params['page']))
+                raise AnalyzerAPIError(SimpleNamespace(status_code=500))
+            return request(client, endpoint, value, searchtype, **params)
+        self.patcher.stop()
+        self.patcher = patch('passivetotal.api.Client._get', failing)
+        self.patcher.start()
+        ua1, ua2 = Tracker('GoogleAnalyticsTrackingId', 'UA-1'), Tracker('GoogleAnalyticsTrackingId', 'UA-2')
+        with self.assertRaises(AnalyzerAPIError):
+            Tracker.search_many([ua1, ua2], concurrency=4)
+        assert len(self.calls) == 4
+        assert len(ua1._get_search('hosts')) == 2600
+        assert ua2._get_search('hosts') is None
+        self.calls.clear()
+        with self.assertRaises(AnalyzerAPIError):
+            Tracker.search_many([ua1, ua2])
+        assert sorted(self.calls) == [
+            ('UA-2', 'GoogleAnalyticsTrackingId', 'hosts', 0), ('UA-2', 'GoogleAnalyticsTrackingId', 'hosts', 1)]